@@ -1,22 +1,145 @@
 import os
+import time
 import asyncio
+import importlib
 from typing import List, Dict, Any, Optional
 import logging
 import json
-from emergentintegrations.llm.chat import LlmChat, UserMessage
+
+from shared_cache import cache_key
+from metrics import Counters
+from model_routing import ModelRouter, ModelSpec
+from skill_taxonomy import get_taxonomy
+from tracing import span
 
 logger = logging.getLogger(__name__)
 
+LLM_MODULE = "emergentintegrations.llm.chat"
+# Upper bound on LLM calls in flight per worker; excess callers wait for a slot
+AI_MAX_CONCURRENCY = int(os.environ.get("AI_MAX_CONCURRENCY", "16"))
+
 class AIService:
-    def __init__(self):
+    def __init__(self, cache=None, jd_index=None, router: Optional[ModelRouter] = None):
         self.emergent_key = os.environ.get('EMERGENT_LLM_KEY', 'sk-emergent-c0e1a9a7d2f11A12b4')
-
-    def _get_chat_client(self, system_message: str) -> LlmChat:
-        return LlmChat(
+        # Optional shared cache namespace for LLM responses, keyed by model + prompt
+        self.cache = cache
+        # Optional JDSimilarityIndex; keys JD-level state such as incremental-optimize sessions, never LLM responses
+        self.jd_index = jd_index
+        # Which model (and max tokens) serves each task, with per-route health and failover
+        self.router = router or ModelRouter()
+        # The LLM SDK is heavy to import; it is loaded on first use or by warm_up()
+        self._llm = None
+        self._slots = asyncio.Semaphore(AI_MAX_CONCURRENCY)
+        self.in_flight = 0
+        self.counters = Counters()
+
+    def _llm_module(self):
+        if self._llm is None:
+            self._llm = importlib.import_module(LLM_MODULE)
+        return self._llm
+
+    @property
+    def llm_loaded(self) -> bool:
+        return self._llm is not None
+
+    async def warm_up(self) -> None:
+        """Import the LLM SDK in a worker thread so the first request doesn't pay for it"""
+        if self._llm is None:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._llm_module)
+
+    def _get_chat_client(self, system_message: str, spec: ModelSpec):
+        chat = self._llm_module().LlmChat(
             api_key=self.emergent_key,
             session_id="career_ai_session",
             system_message=system_message
-        ).with_model("openai", "gpt-4o-mini")
+        ).with_model(spec.provider, spec.model)
+        # Older SDK releases have no max-token setting; the prompt still asks for short output
+        if spec.max_tokens and hasattr(chat, "with_max_tokens"):
+            chat = chat.with_max_tokens(spec.max_tokens)
+        return chat
+
+    async def _send(self, system_message: str, prompt: str, task: str = "default") -> str:
+        """Send a prompt to the model routed for this task. If the primary fails or overruns the
+        route's budget, the secondary model gets the call. Responses are cached by the exact prompt;
+        near-duplicate postings can differ in requirements, salary or notes, so they never share one."""
+        route = self.router.route(task)
+        candidates = self.router.candidates(task)
+        # Rough token estimate (~4 characters per token); enough to spot oversized prompts in traces
+        with span(f"ai.{route.task}", task=route.task, promptTokens=(len(system_message) + len(prompt)) // 4) as trace:
+            keys = [cache_key(spec.provider, spec.model, system_message, prompt) if self.cache else None for spec in candidates]
+            for spec, key in zip(candidates, keys):
+                if key:
+                    cached = await self.cache.get(key)
+                    if cached is not None:
+                        trace.set(cacheHit=True, model=spec.name)
+                        return cached
+            trace.set(cacheHit=False)
+
+            deadline = time.monotonic() + self.router.total_budget
+            for attempt, (spec, key) in enumerate(zip(candidates, keys)):
+                is_last = attempt == len(candidates) - 1
+                trace.set(model=spec.name, fallbackUsed=attempt > 0)
+                started = time.monotonic()
+                # Every attempt shares the total budget; only a non-last attempt is cut at the route budget
+                timeout = deadline - started
+                if not is_last and route.budget is not None:
+                    timeout = min(timeout, route.budget)
+                if timeout <= 0:
+                    break
+                try:
+                    with span("ai.call", model=spec.name, attempt=attempt):
+                        response = await asyncio.wait_for(self._call(system_message, prompt, spec), timeout=timeout)
+                except asyncio.TimeoutError:
+                    self.router.record(task, spec, time.monotonic() - started, ok=False, timed_out=True)
+                    if is_last:
+                        raise
+                    self.counters.incr(f"failover.{route.task}")
+                    logger.warning(f"{spec.name} exceeded {timeout:.1f}s for {route.task}; failing over")
+                    continue
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.router.record(task, spec, time.monotonic() - started, ok=False)
+                    if is_last:
+                        raise
+                    self.counters.incr(f"failover.{route.task}")
+                    logger.warning(f"{spec.name} failed for {route.task} ({str(e)}); failing over")
+                    continue
+                self.router.record(task, spec, time.monotonic() - started, ok=True)
+                trace.set(responseChars=len(response or ""))
+                if key and response:
+                    await self.cache.set(key, response)
+                return response
+            raise asyncio.TimeoutError(f"No model answered {route.task} within budget")
+
+    async def _call(self, system_message: str, prompt: str, spec: ModelSpec) -> str:
+        chat_client = self._get_chat_client(system_message, spec)
+        try:
+            # Cancellation (client gone, deadline, failover) propagates through here and releases the slot
+            async with self._slots:
+                self.in_flight += 1
+                try:
+                    self.counters.incr("calls")
+                    return await chat_client.send_message(self._llm_module().UserMessage(text=prompt))
+                finally:
+                    self.in_flight -= 1
+        except asyncio.CancelledError:
+            self.counters.incr("cancelled")
+            raise
+        except Exception:
+            self.counters.incr("errors")
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "maxConcurrency": AI_MAX_CONCURRENCY,
+            "inFlight": self.in_flight,
+            "sdkLoaded": self.llm_loaded,
+            "counters": self.counters.snapshot(),
+            "jdIndex": self.jd_index.stats() if self.jd_index else None,
+            "routes": self.router.stats(),
+        }
 
     async def generate_career_identity(self, user_data: Dict[str, Any]) -> str:
         try:
@@ -41,15 +164,15 @@ class AIService:
             Keep it concise but impactful.
             """
 
-            chat_client = self._get_chat_client("You are a professional career counselor and resume writer. Create compelling career identity statements.")
-            response = await chat_client.send_message(UserMessage(text=prompt))
+            response = await self._send("You are a professional career counselor and resume writer. Create compelling career identity statements.", prompt, task="identity")
             return response.strip()
         except Exception as e:
             logger.error(f"Error generating career identity: {str(e)}")
             return self._fallback_career_identity(user_data)
 
-    async def optimize_resume(self, job_info: Dict[str, Any]) -> Dict[str, Any]:
-        """Optimize resume content. Accepts either 'currentResume' string or structured 'jobs'. Returns guide, jobEdits, proTips."""
+    async def optimize_resume(self, job_info: Dict[str, Any], use_fallback: bool = True) -> Dict[str, Any]:
+        """Optimize resume content. Accepts either 'currentResume' string or structured 'jobs'. Returns guide, jobEdits, proTips.
+        With use_fallback=False an LLM failure raises instead of returning the generic guide."""
         try:
             job_title = job_info.get('jobTitle', 'Professional Role')
             company = job_info.get('company', 'Target Company')
@@ -60,6 +183,8 @@ class AIService:
             if jobs and isinstance(jobs, list):
                 resume_section = json.dumps(jobs, ensure_ascii=False)
                 resume_desc = "Structured jobs (JSON)"
+                if job_info.get('resumeContext'):
+                    resume_section += f"\n\nOTHER RESUME SECTIONS (context for the guide and tips; not bullets to edit):\n{job_info['resumeContext']}"
             else:
                 resume_section = (resume_text or "").strip()
                 resume_desc = "Plain text resume"
@@ -84,8 +209,7 @@ class AIService:
             - Return STRICT JSON only. No extra commentary. No markdown fences.
             """
 
-            chat_client = self._get_chat_client("You write structured resume improvements and return strict JSON when asked.")
-            response = await chat_client.send_message(UserMessage(text=prompt))
+            response = await self._send("You write structured resume improvements and return strict JSON when asked.", prompt, task="optimize")
             text = response.strip()
 
             optimized_guide = ""
@@ -94,7 +218,8 @@ class AIService:
             flat_bullets: List[Dict[str, Any]] = []
 
             try:
-                data = json.loads(text)
+                with span("ai.parse_json", task="optimize", chars=len(text)):
+                    data = json.loads(text)
                 optimized_guide = data.get("optimizedGuide", "")
                 job_edits = data.get("jobEdits", [])
                 pro_tips = data.get("proTips", [])
@@ -133,6 +258,8 @@ class AIService:
             }
         except Exception as e:
             logger.error(f"Error optimizing resume: {str(e)}")
+            if not use_fallback:
+                raise
             return self._fallback_resume_optimization(job_info)
 
     async def rewrite_bullet(self, job_info: Dict[str, Any], original: str, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
@@ -154,10 +281,10 @@ class AIService:
             Return STRICT JSON with keys: improved (string), rationale (string), keywords (array of strings).
             No extra commentary.
             """
-            chat_client = self._get_chat_client("You provide precise bullet rewrites with rationale and keywords, JSON only.")
-            text = (await chat_client.send_message(UserMessage(text=prompt))).strip()
+            text = (await self._send("You provide precise bullet rewrites with rationale and keywords, JSON only.", prompt, task="rewrite-bullet")).strip()
             try:
-                data = json.loads(text)
+                with span("ai.parse_json", task="rewrite-bullet", chars=len(text)):
+                    data = json.loads(text)
                 return {
                     "improved": data.get("improved", ""),
                     "rationale": data.get("rationale", ""),
@@ -178,7 +305,9 @@ class AIService:
                 "keywords": [],
             }
 
-    async def generate_cover_letter(self, job_info: Dict[str, Any], user_profile: Optional[Dict[str, Any]] = None) -> str:
+    async def generate_cover_letter(self, job_info: Dict[str, Any], user_profile: Optional[Dict[str, Any]] = None,
+                                    use_fallback: bool = True) -> str:
+        """Cover letter text; with use_fallback=False an LLM failure raises instead of returning the template letter"""
         try:
             user_context = ""
             if user_profile:
@@ -211,43 +340,55 @@ class AIService:
             Format as a complete cover letter with proper structure.
             """
 
-            chat_client = self._get_chat_client("You are a professional career counselor specializing in cover letter writing.")
-            response = await chat_client.send_message(UserMessage(text=prompt))
+            response = await self._send("You are a professional career counselor specializing in cover letter writing.", prompt, task="cover-letter")
             return response.strip()
         except Exception as e:
             logger.error(f"Error generating cover letter: {str(e)}")
+            if not use_fallback:
+                raise
             return self._fallback_cover_letter(job_info)
 
     async def analyze_career_match(self, user_profile: Dict[str, Any], career: Dict[str, Any]) -> float:
-        try:
-            prompt = f"""
-            Analyze how well this user profile matches this career opportunity:
-
-            User Profile:
-            - Current Role: {user_profile.get('currentRole', 'Professional')}
-            - Skills: {', '.join(user_profile.get('skills', []))}
-            - Experience: {user_profile.get('yearsExperience', 'Some experience')}
-            - Interests: {user_profile.get('interests', 'Professional growth')}
-            - Goals: {user_profile.get('careerGoals', 'Career advancement')}
-
-            Career Opportunity:
-            - Title: {career.get('title', 'Professional Role')}
-            - Required Skills: {', '.join(career.get('skills', []))}
-            - Description: {career.get('description', 'Professional opportunity')}
-            - Category: {career.get('category', 'Professional')}
-
-            Provide a match score 0-100. Return only the number.
-            """
-            chat_client = self._get_chat_client("You are a career matching specialist.")
-            response = await chat_client.send_message(UserMessage(text=prompt))
-            import re
-            score_match = re.search(r"\d+", response.strip())
-            if score_match:
-                score = min(100, max(0, int(score_match.group())))
-                return float(score)
-            return 75.0
-        except Exception:
-            return 70.0
+        with span("ai.analyze_career_match", career=career.get('id') or career.get('title')) as trace:
+            try:
+                # Canonical skill names keep the prompt (and its cache key) stable across spellings
+                taxonomy = get_taxonomy()
+                user_skills = [taxonomy.name(i) for i in taxonomy.normalize_all(user_profile.get('skills', []))] or user_profile.get('skills', [])
+                prompt = f"""
+                Analyze how well this user profile matches this career opportunity:
+
+                User Profile:
+                - Current Role: {user_profile.get('currentRole', 'Professional')}
+                - Skills: {', '.join(user_skills)}
+                - Experience: {user_profile.get('yearsExperience', 'Some experience')}
+                - Interests: {user_profile.get('interests', 'Professional growth')}
+                - Goals: {user_profile.get('careerGoals', 'Career advancement')}
+
+                Career Opportunity:
+                - Title: {career.get('title', 'Professional Role')}
+                - Required Skills: {', '.join(career.get('skills', []))}
+                - Description: {career.get('description', 'Professional opportunity')}
+                - Category: {career.get('category', 'Professional')}
+
+                Provide a match score 0-100. Return only the number.
+                """
+                response = await self._send("You are a career matching specialist.", prompt, task="career-match")
+                import re
+                score_match = re.search(r"\d+", response.strip())
+                if score_match:
+                    score = min(100, max(0, int(score_match.group())))
+                    trace.set(score=score)
+                    return float(score)
+                return 75.0
+            except Exception as e:
+                trace.set(fallbackUsed=True, fallbackReason=type(e).__name__)
+                return self._fallback_career_match(user_profile, career)
+
+    def _fallback_career_match(self, user_profile: Dict[str, Any], career: Dict[str, Any]) -> float:
+        taxonomy = get_taxonomy()
+        career_skill_ids = career.get('skillIds') or taxonomy.normalize_all(career.get('skills', []))
+        overlap = taxonomy.overlap(taxonomy.normalize_all(user_profile.get('skills', [])), career_skill_ids)
+        return float(round(50 + 50 * overlap))
 
     def _fallback_career_identity(self, user_data: Dict[str, Any]) -> str:
         role = user_data.get('currentRole', 'professional')
@@ -0,0 +1,223 @@
+import os
+import math
+import asyncio
+import argparse
+import logging
+from collections import defaultdict
+from typing import List, Dict, Any, Optional, Iterable, Set, Tuple
+
+import numpy as np
+
+from resume_analyzer import tokenize, STOPWORDS
+from skill_taxonomy import get_taxonomy, PARENT_CREDIT
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOP_N = 5
+
+# Relative importance of each feature family in the similarity score
+SKILL_WEIGHT = 3.0
+CATEGORY_WEIGHT = 2.0
+DESCRIPTION_WEIGHT = 1.0
+
+# Postings longer than this are too common to enumerate candidates from; they still count
+# toward the score of candidates found through rarer features
+MAX_CANDIDATE_POSTINGS = int(os.environ.get("CAREER_GRAPH_MAX_POSTINGS", "1000"))
+
+
+def career_features(career: Dict[str, Any]) -> Dict[str, float]:
+    """Raw (pre-IDF) feature weights for a career: skills, category and description/title terms"""
+    features: Dict[str, float] = defaultdict(float)
+    if career.get("skillIds"):
+        # Canonical ids: "JS" and "JavaScript" are one feature, and parent skills give partial overlap
+        taxonomy = get_taxonomy()
+        for skill_id in career["skillIds"]:
+            features[f"skill:{skill_id}"] += SKILL_WEIGHT
+            for parent in taxonomy.ancestors(skill_id)[:1]:
+                features[f"skill:{parent}"] += SKILL_WEIGHT * PARENT_CREDIT
+    else:
+        for skill in career.get("skills") or []:
+            skill = (skill or "").strip().lower()
+            if skill:
+                features[f"skill:{skill}"] += SKILL_WEIGHT
+    category = (career.get("category") or "").strip().lower()
+    if category:
+        features[f"cat:{category}"] += CATEGORY_WEIGHT
+    text = f"{career.get('title', '')} {career.get('description', '')}"
+    for token in tokenize(text):
+        if token not in STOPWORDS and len(token) > 2:
+            features[f"term:{token}"] += DESCRIPTION_WEIGHT
+    return features
+
+
+class CareerSimilarityIndex:
+    """TF-IDF cosine similarity over career features, backed by an inverted index (numpy postings)
+    so that neighbor search only touches careers sharing at least one feature."""
+
+    def __init__(self, careers: Iterable[Dict[str, Any]], max_df_ratio: float = 0.5,
+                 max_postings: int = MAX_CANDIDATE_POSTINGS):
+        self.max_postings = max_postings
+        self.titles: Dict[str, Dict[str, Any]] = {}
+        raw: Dict[str, Dict[str, float]] = {}
+        for career in careers:
+            cid = str(career.get("id") or career.get("_id"))
+            raw[cid] = career_features(career)
+            self.titles[cid] = {"title": career.get("title", ""), "category": career.get("category", "")}
+
+        n = len(raw)
+        df: Dict[str, int] = defaultdict(int)
+        for feats in raw.values():
+            for f in feats:
+                df[f] += 1
+        # Features shared by most of a large catalog carry no signal and blow up the postings lists
+        max_df = max(2, int(n * max_df_ratio)) if n >= 50 else n
+
+        self.ids: List[str] = list(raw)
+        self.positions: Dict[str, int] = {cid: i for i, cid in enumerate(self.ids)}
+        self.vectors: Dict[str, Dict[str, float]] = {}
+        postings: Dict[str, List[tuple]] = defaultdict(list)
+        for cid, feats in raw.items():
+            vec = {}
+            for f, w in feats.items():
+                if df[f] > max_df:
+                    continue
+                vec[f] = w * (math.log((1 + n) / (1 + df[f])) + 1.0)
+            norm = math.sqrt(sum(v * v for v in vec.values())) or 1.0
+            vec = {f: v / norm for f, v in vec.items()}
+            self.vectors[cid] = vec
+            row = self.positions[cid]
+            for f, v in vec.items():
+                postings[f].append((row, v))
+        # feature -> (career rows, weights)
+        self.postings: Dict[str, tuple] = {
+            f: (np.array([r for r, _ in items], dtype=np.int64), np.array([w for _, w in items]))
+            for f, items in postings.items()
+        }
+        # Scratch buffers for candidate_scores: score accumulator and dedupe stamps
+        self._acc = np.zeros(n)
+        self._stamp = np.zeros(n, dtype=np.int64)
+
+    def __contains__(self, career_id: str) -> bool:
+        return career_id in self.vectors
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def candidate_scores(self, career_id: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(career rows, cosine scores) for the careers sharing one of this career's rarer features.
+
+        Candidates come only from postings of at most max_postings entries, so a catalog-wide
+        refresh does not score all pairs; common features still add to those candidates' scores."""
+        vector = self.vectors.get(career_id, {})
+        self_row = self.positions.get(career_id, -1)
+        acc = self._acc
+        rare, common = [], []
+        for f, v in vector.items():
+            rows, weights = self.postings[f]
+            (common if len(rows) > self.max_postings else rare).append((len(rows), f, v))
+        candidates = np.zeros(0, dtype=np.int64)
+        if rare:
+            candidates = np.concatenate([self.postings[f][0] for _, f, _ in rare])
+            # Dedupe without sorting: keep each row where its own position is the last one stamped
+            order = np.arange(len(candidates))
+            self._stamp[candidates] = order
+            candidates = candidates[(self._stamp[candidates] == order) & (candidates != self_row)]
+        if not len(candidates) and common:
+            # Nothing shares a rare feature: take a bounded slice of the rarest common one instead
+            candidates = self.postings[min(common)[1]][0][:self.max_postings + 1]
+            candidates = candidates[candidates != self_row]
+        touched = []
+        for _, f, v in rare + common:
+            rows, weights = self.postings[f]
+            acc[rows] += v * weights
+            touched.append(rows)
+        scores = acc[candidates]
+        # Reset only what was written so the scratch buffer is reused without an O(n) clear
+        for rows in touched:
+            acc[rows] = 0.0
+        return candidates, scores
+
+    def scores(self, career_id: str) -> Dict[str, float]:
+        """Cosine similarity of one career to each of its candidate careers"""
+        rows, scores = self.candidate_scores(career_id)
+        return {self.ids[r]: float(s) for r, s in zip(rows, scores)}
+
+    def top_neighbors(self, career_id: str, top_n: int = DEFAULT_TOP_N,
+                      scored: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> List[Dict[str, Any]]:
+        rows, scores = scored if scored is not None else self.candidate_scores(career_id)
+        keep = scores > 1e-12
+        rows, scores = rows[keep], scores[keep]
+        if len(rows) > top_n:
+            best = np.argpartition(-scores, top_n)[:top_n]
+            rows, scores = rows[best], scores[best]
+        ranked = sorted(zip(scores.tolist(), (self.ids[r] for r in rows)), key=lambda x: (-x[0], x[1]))
+        return [{"id": other, "score": round(score, 4), **self.titles[other]} for score, other in ranked]
+
+
+def compute_neighbor_updates(
+    careers: List[Dict[str, Any]],
+    existing: Dict[str, List[Dict[str, Any]]],
+    changed_ids: Optional[Set[str]] = None,
+    top_n: int = DEFAULT_TOP_N,
+) -> Dict[str, Any]:
+    """Work out which neighbor lists need rewriting.
+
+    With ``changed_ids=None`` every career is recomputed. Otherwise only the changed careers,
+    careers whose lists referenced a changed or removed career, and careers that a changed
+    career now outranks an existing neighbor of are recomputed.
+    Returns {"upserts": {career_id: neighbors}, "deletes": [career_id, ...]}.
+    """
+    index = CareerSimilarityIndex(careers)
+    deletes = [cid for cid in existing if cid not in index]
+    scored: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    if changed_ids is None:
+        targets = set(index.vectors)
+    else:
+        changed = {cid for cid in changed_ids if cid in index}
+        removed = set(deletes) | {cid for cid in changed_ids if cid not in index}
+        targets = set(changed)
+        # Careers never indexed before (e.g. the first load) need a list too
+        targets.update(cid for cid in index.vectors if cid not in existing)
+        # On a first load every career is already a target, so the outrank check is skipped
+        if len(targets) < len(index):
+            # A candidate is affected when its list is short or the new score beats its last neighbor
+            threshold = np.full(len(index), -1.0)
+            for cid, neighbors in existing.items():
+                if cid in index and len(neighbors) >= top_n:
+                    threshold[index.positions[cid]] = neighbors[-1].get("score", 0.0)
+            for cid in changed:
+                rows, scores = scored[cid] = index.candidate_scores(cid)
+                targets.update(index.ids[r] for r in rows[scores > threshold[rows]])
+        for cid, neighbors in existing.items():
+            if cid in index and any(n.get("id") in changed or n.get("id") in removed for n in neighbors):
+                targets.add(cid)
+
+    upserts = {cid: index.top_neighbors(cid, top_n, scored.get(cid)) for cid in targets}
+    return {"upserts": upserts, "deletes": deletes}
+
+
+async def _main(args: argparse.Namespace) -> None:
+    from pathlib import Path
+    from dotenv import load_dotenv
+    from database import DatabaseService
+
+    load_dotenv(Path(__file__).parent / ".env")
+    db_service = DatabaseService()
+    await db_service.connect()
+    try:
+        stats = await db_service.refresh_related_careers(
+            changed_ids=set(args.career_ids) if args.career_ids else None,
+            top_n=args.top_n,
+        )
+        logger.info(f"Related careers refreshed: {stats}")
+    finally:
+        await db_service.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Precompute the related-careers similarity index")
+    parser.add_argument("career_ids", nargs="*", help="Only refresh these careers (default: full rebuild)")
+    parser.add_argument("--top-n", type=int, default=DEFAULT_TOP_N, help="Neighbors stored per career")
+    asyncio.run(_main(parser.parse_args()))
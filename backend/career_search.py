@@ -0,0 +1,312 @@
+import math
+import bisect
+import logging
+from collections import defaultdict
+from typing import List, Dict, Any, Optional, Tuple, Iterable
+
+import numpy as np
+
+from resume_analyzer import tokenize
+from skill_taxonomy import get_taxonomy, PARENT_CREDIT
+
+logger = logging.getLogger(__name__)
+
+# Field boosts: a hit in the title outranks one in the description
+FIELD_WEIGHTS = {"title": 3.0, "skills": 2.0, "description": 1.0}
+BM25_K1 = 1.2
+BM25_B = 0.75
+PREFIX_WEIGHT = 0.8
+FUZZY_WEIGHT = 0.6
+# A query naming a skill (by any synonym) matches careers tagged with its canonical id
+SKILL_MATCH_WEIGHT = 2.0
+MAX_EXPANSIONS = 20
+MAX_PREFIX_SCAN = 200
+# Cached per-term impact arrays are recomputed once average doc length drifts this much
+AVG_LENGTH_DRIFT = 0.1
+
+
+def trigrams(term: str) -> List[str]:
+    padded = f"  {term} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+def max_edits(term: str) -> int:
+    """Edit budget grows with term length so short terms don't match everything"""
+    if len(term) <= 3:
+        return 0
+    if len(term) <= 6:
+        return 1
+    return 2
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Optimal string alignment distance (adjacent transpositions count as one edit), with an
+    early exit once every path exceeds ``limit``. Returns limit + 1 when over the limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev_prev = None
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        row_min = cur[0]
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if prev_prev is not None and i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev_prev[j - 2] + 1)
+            row_min = min(row_min, cur[j])
+        if row_min > limit:
+            return limit + 1
+        prev_prev, prev = prev, cur
+    return prev[-1]
+
+
+class CareerSearchIndex:
+    """In-process career search: BM25 over title/skills/description with prefix and typo-tolerant
+    term expansion via a trigram index over the vocabulary. Supports incremental add/remove."""
+
+    def __init__(self):
+        self.docs: Dict[str, Dict[str, Any]] = {}
+        self.doc_terms: Dict[str, Dict[str, float]] = {}
+        self.doc_lengths: Dict[str, float] = {}
+        self.total_length = 0.0
+        # Docs get a dense ordinal so per-query scoring is array arithmetic; removed ordinals stay dead
+        self.ordinals: Dict[str, int] = {}
+        self.ordinal_ids: List[Optional[str]] = []
+        self.postings: Dict[str, Dict[str, float]] = defaultdict(dict)
+        # skill id -> {doc id: weight}; parents of a career's skills get partial weight
+        self.skill_postings: Dict[int, Dict[str, float]] = defaultdict(dict)
+        self.doc_skills: Dict[str, Dict[int, float]] = {}
+        self._skill_arrays: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        self.vocabulary: List[str] = []
+        # (trigram, term length) -> terms; keyed by length so fuzzy lookup only visits plausible lengths
+        self.term_trigrams: Dict[Tuple[str, int], set] = defaultdict(set)
+        self._expansions: Dict[str, List[Tuple[str, float]]] = {}
+        # term -> (doc ordinals, BM25 tf component); built lazily, dropped when the term's postings change
+        self._impacts: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._impacts_avg_length = 0.0
+        self.category_codes: Dict[str, int] = {}
+        self.ordinal_categories: List[int] = []
+        self._categories_array: Optional[np.ndarray] = None
+        self.version = None
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    @staticmethod
+    def field_terms(doc: Dict[str, Any]) -> Dict[str, float]:
+        """Token weights for a career, boosted by the field each token appears in"""
+        weighted: Dict[str, float] = defaultdict(float)
+        for field, weight in FIELD_WEIGHTS.items():
+            value = doc.get(field)
+            text = " ".join(value) if isinstance(value, list) else (value or "")
+            for token in tokenize(text):
+                weighted[token] += weight
+        return weighted
+
+    def add(self, doc: Dict[str, Any], terms: Optional[Dict[str, float]] = None) -> None:
+        """Index a career; terms are its weighted field tokens if already computed (e.g. from a snapshot)"""
+        doc_id = str(doc["id"])
+        if doc_id in self.docs:
+            self.remove(doc_id)
+        terms = terms if terms is not None else self.field_terms(doc)
+        self.docs[doc_id] = doc
+        self.doc_terms[doc_id] = terms
+        if doc_id not in self.ordinals:
+            self.ordinals[doc_id] = len(self.ordinal_ids)
+            self.ordinal_ids.append(doc_id)
+            self.ordinal_categories.append(-1)
+        category_code = self.category_codes.setdefault(doc.get("category") or "", len(self.category_codes))
+        self.ordinal_categories[self.ordinals[doc_id]] = category_code
+        self._categories_array = None
+        length = sum(terms.values())
+        self.doc_lengths[doc_id] = length
+        self.total_length += length
+        for term, tf in terms.items():
+            if term not in self.postings or not self.postings[term]:
+                self._add_term(term)
+            self.postings[term][doc_id] = tf
+            self._impacts.pop(term, None)
+        skills: Dict[int, float] = {}
+        taxonomy = get_taxonomy()
+        for skill_id in doc.get("skillIds") or []:
+            skills[skill_id] = 1.0
+            for parent in taxonomy.ancestors(skill_id)[:1]:
+                skills.setdefault(parent, PARENT_CREDIT)
+        self.doc_skills[doc_id] = skills
+        for skill_id, weight in skills.items():
+            self.skill_postings[skill_id][doc_id] = weight
+            self._skill_arrays.pop(skill_id, None)
+
+    def remove(self, doc_id: str) -> None:
+        terms = self.doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        self.docs.pop(doc_id, None)
+        for skill_id in self.doc_skills.pop(doc_id, {}):
+            self._skill_arrays.pop(skill_id, None)
+            postings = self.skill_postings.get(skill_id)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self.skill_postings[skill_id]
+        self.total_length -= self.doc_lengths.pop(doc_id, 0.0)
+        self.ordinal_categories[self.ordinals[doc_id]] = -1
+        self._categories_array = None
+        for term in terms:
+            self._impacts.pop(term, None)
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self.postings[term]
+                    self._remove_term(term)
+
+    def _category_array(self) -> np.ndarray:
+        if self._categories_array is None:
+            self._categories_array = np.array(self.ordinal_categories, dtype=np.int64)
+        return self._categories_array
+
+    def _add_term(self, term: str) -> None:
+        bisect.insort(self.vocabulary, term)
+        for gram in trigrams(term):
+            self.term_trigrams[(gram, len(term))].add(term)
+        self._expansions.clear()
+
+    def _remove_term(self, term: str) -> None:
+        i = bisect.bisect_left(self.vocabulary, term)
+        if i < len(self.vocabulary) and self.vocabulary[i] == term:
+            self.vocabulary.pop(i)
+        for gram in trigrams(term):
+            self.term_trigrams[(gram, len(term))].discard(term)
+        self._expansions.clear()
+
+    def expand(self, token: str, prefix: bool = True) -> List[Tuple[str, float]]:
+        """Index terms a query token should match, with a match-quality weight. Memoized until the
+        vocabulary changes, since search-as-you-type re-sends the same leading tokens."""
+        key = f"{int(prefix)}{token}"
+        cached = self._expansions.get(key)
+        if cached is None:
+            if len(self._expansions) > 10000:
+                self._expansions.clear()
+            cached = self._expansions[key] = self._expand(token, prefix)
+        return cached
+
+    def _expand(self, token: str, prefix: bool) -> List[Tuple[str, float]]:
+        expansions: Dict[str, float] = {}
+        if token in self.postings:
+            expansions[token] = 1.0
+        if prefix and len(token) >= 2:
+            i = bisect.bisect_left(self.vocabulary, token)
+            completions = []
+            while i < len(self.vocabulary) and self.vocabulary[i].startswith(token) and len(completions) < MAX_PREFIX_SCAN:
+                if self.vocabulary[i] != token:
+                    completions.append(self.vocabulary[i])
+                i += 1
+            # Prefer the completions that occur in the most careers
+            completions.sort(key=lambda t: -len(self.postings[t]))
+            for term in completions[:MAX_EXPANSIONS]:
+                expansions[term] = PREFIX_WEIGHT
+        limit = max_edits(token)
+        # Fuzzy matching is the expensive path; only take it when the token matched nothing as typed
+        if limit and not expansions:
+            grams = trigrams(token)
+            shared: Dict[str, int] = defaultdict(int)
+            for length in range(len(token) - limit, len(token) + limit + 1):
+                for gram in grams:
+                    for term in self.term_trigrams.get((gram, length), ()):
+                        shared[term] += 1
+            # Each edit destroys at most 3 trigrams; skip candidates that can't be within budget
+            min_shared = max(1, len(grams) - 3 * limit)
+            candidates = sorted((t for t, n in shared.items() if n >= min_shared and t not in expansions),
+                                key=lambda t: -shared[t])
+            for term in candidates[:200]:
+                distance = edit_distance(token, term, limit)
+                if distance <= limit:
+                    expansions[term] = FUZZY_WEIGHT / distance
+                elif prefix and len(term) > len(token) and edit_distance(token, term[:len(token)], limit) <= limit:
+                    # Typo inside a word that is still being typed
+                    expansions[term] = FUZZY_WEIGHT * PREFIX_WEIGHT
+        return sorted(expansions.items(), key=lambda x: -x[1])[:MAX_EXPANSIONS]
+
+    def _term_impacts(self, term: str, avg_length: float) -> Tuple[np.ndarray, np.ndarray]:
+        if abs(avg_length - self._impacts_avg_length) > AVG_LENGTH_DRIFT * max(self._impacts_avg_length, 1.0):
+            self._impacts.clear()
+            self._impacts_avg_length = avg_length
+        cached = self._impacts.get(term)
+        if cached is None:
+            postings = self.postings[term]
+            ords = np.fromiter((self.ordinals[d] for d in postings), dtype=np.int64, count=len(postings))
+            tf = np.fromiter(postings.values(), dtype=np.float64, count=len(postings))
+            lengths = np.fromiter((self.doc_lengths[d] for d in postings), dtype=np.float64, count=len(postings))
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / self._impacts_avg_length)
+            cached = (ords, tf * (BM25_K1 + 1) / (tf + norm))
+            self._impacts[term] = cached
+        return cached
+
+    def _token_scores(self, token: str, prefix: bool = True) -> np.ndarray:
+        n = len(self.docs)
+        avg_length = self.total_length / n if n else 1.0
+        scores = np.zeros(len(self.ordinal_ids), dtype=np.float64)
+        for term, quality in self.expand(token, prefix):
+            ords, impact = self._term_impacts(term, avg_length)
+            idf = math.log(1 + (n - len(ords) + 0.5) / (len(ords) + 0.5))
+            # A doc matched by several expansions of one token keeps its best match
+            scores[ords] = np.maximum(scores[ords], quality * idf * impact)
+        return scores
+
+    def _skill_scores(self, query: str) -> Optional[np.ndarray]:
+        skill_ids = [s for s in get_taxonomy().normalize(query) if s in self.skill_postings]
+        if not skill_ids:
+            return None
+        n = len(self.docs)
+        scores = np.zeros(len(self.ordinal_ids), dtype=np.float64)
+        for skill_id in skill_ids:
+            arrays = self._skill_arrays.get(skill_id)
+            if arrays is None:
+                postings = self.skill_postings[skill_id]
+                arrays = self._skill_arrays[skill_id] = (
+                    np.fromiter((self.ordinals[d] for d in postings), dtype=np.int64, count=len(postings)),
+                    np.fromiter(postings.values(), dtype=np.float64, count=len(postings)),
+                )
+            ords, weights = arrays
+            idf = math.log(1 + (n - len(ords) + 0.5) / (len(ords) + 0.5))
+            scores[ords] += SKILL_MATCH_WEIGHT * idf * weights
+        return scores
+
+    def search(self, query: str, category: Optional[str] = None, limit: int = 50) -> List[Tuple[Dict[str, Any], float]]:
+        """Ranked (career, score) pairs. Every query token must match, exactly, as a prefix or within
+        its typo budget, or the query must name a skill the career has; if that yields nothing,
+        documents matching any token are returned instead."""
+        tokens = tokenize(query)
+        if not tokens or not self.docs:
+            return []
+        per_token = np.vstack([self._token_scores(t) for t in tokens])
+        totals = per_token.sum(axis=0)
+        matched = (per_token > 0).all(axis=0)
+        skill_scores = self._skill_scores(query)
+        if skill_scores is not None:
+            # "JS" finds careers listing JavaScript even though the text never says "js"
+            totals += skill_scores
+            matched |= skill_scores > 0
+        if not matched.any():
+            matched = totals > 0
+        if category:
+            matched &= self._category_array() == self.category_codes.get(category, -1)
+        candidates = np.flatnonzero(matched)
+        if len(candidates) > limit:
+            top = np.argpartition(-totals[candidates], limit - 1)[:limit]
+            candidates = candidates[top]
+        ranked = sorted(candidates, key=lambda o: (-totals[o], self.docs[self.ordinal_ids[o]].get("title", "")))
+        return [(self.docs[self.ordinal_ids[o]], round(float(totals[o]), 4)) for o in ranked]
+
+    def rebuild(self, docs: Iterable[Dict[str, Any]], version: Any = None,
+                terms: Optional[Iterable[Dict[str, float]]] = None) -> None:
+        self.__init__()
+        for doc, doc_terms in zip(docs, terms) if terms is not None else ((doc, None) for doc in docs):
+            self.add(doc, doc_terms)
+        # Materialize every term's impact array now rather than on the first query that needs it
+        avg_length = self.total_length / len(self.docs) if self.docs else 1.0
+        for term in self.vocabulary:
+            self._term_impacts(term, avg_length)
+        self.version = version
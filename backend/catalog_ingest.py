@@ -0,0 +1,317 @@
+import io
+import re
+import csv
+import json
+import time
+import asyncio
+import hashlib
+import argparse
+import logging
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Iterable, Iterator, TextIO, Tuple
+
+from pydantic import ValidationError
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from models import Career
+from skill_taxonomy import get_taxonomy
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 1000
+MAX_INFLIGHT_BATCHES = 2
+MAX_REPORTED_ERRORS = 20
+CSV_LIST_FIELDS = ("skills", "companies", "relatedCareers")
+CSV_LIST_SEPARATOR = re.compile(r"\s*[|;]\s*")
+
+
+def natural_key(row: Dict[str, Any]) -> str:
+    """Stable upsert key: explicit key/code column if present, otherwise a slug of the title"""
+    explicit = row.get("key") or row.get("code")
+    if explicit:
+        return str(explicit).strip().lower()
+    return re.sub(r"[^a-z0-9]+", "-", (row.get("title") or "").lower()).strip("-")
+
+
+def detect_format(filename: str) -> str:
+    name = (filename or "").lower()
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl", ".json")):
+        return "ndjson"
+    raise ValueError(f"Cannot detect catalog format from file name: {filename}")
+
+
+def iter_rows(stream: TextIO, fmt: str) -> Iterator[Tuple[int, Any]]:
+    """Yield (line_number, row) pairs one at a time; rows that fail to parse are yielded as exceptions"""
+    if fmt == "ndjson":
+        for line_no, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield line_no, json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_no, ValueError(f"Invalid JSON: {e}")
+    elif fmt == "csv":
+        reader = csv.DictReader(stream)
+        for line_no, row in enumerate(reader, start=2):
+            row = {k: v for k, v in row.items() if k}
+            for field in CSV_LIST_FIELDS:
+                if isinstance(row.get(field), str):
+                    row[field] = [v for v in CSV_LIST_SEPARATOR.split(row[field].strip()) if v]
+            yield line_no, row
+    else:
+        raise ValueError(f"Unsupported catalog format: {fmt}")
+
+
+SALARY_RE = re.compile(r"(\$)?\s*(\d[\d,]*(?:\.\d+)?)\s*([kKmM]\b)?")
+SALARY_MULTIPLIERS = {"k": 1000, "m": 1000000}
+YEAR_RE = re.compile(r"(?:19|20)\d{2}")
+GROWTH_RE = re.compile(r"(-?\d+(?:\.\d+)?)\s*%")
+# A bound below a tenth of the top of the range is a stray number, not a salary
+MIN_SALARY_RATIO = 0.1
+
+
+def parse_salary_range(value: str) -> Tuple[Optional[int], Optional[int]]:
+    """'$75,000 - $120,000' -> (75000, 120000); '$90k+' -> (90000, 90000); '$60-90k' -> (60000, 90000).
+    Only amounts marked with $ or k, or bare numbers of at least 1000 that are not years, count."""
+    matches = SALARY_RE.findall(value or "")
+    in_thousands = any(suffix.lower() == "k" for _, _, suffix in matches)
+    amounts = []
+    for dollar, number, suffix in matches:
+        amount = float(number.replace(",", ""))
+        if suffix:
+            amount *= SALARY_MULTIPLIERS[suffix.lower()]
+        elif in_thousands and amount < 1000:
+            # '$60-90k': the k on the upper bound applies to the lower one too
+            amount *= 1000
+        elif not dollar and (amount < 1000 or YEAR_RE.fullmatch(number)):
+            continue
+        amounts.append(int(amount))
+    if not amounts:
+        return None, None
+    top = max(amounts)
+    amounts = [a for a in amounts if a >= top * MIN_SALARY_RATIO]
+    return min(amounts), top
+
+
+def parse_growth_percent(value: str) -> Optional[float]:
+    """'13% (Much faster than average)' -> 13.0"""
+    match = GROWTH_RE.search(value or "")
+    return float(match.group(1)) if match else None
+
+
+def numeric_fields(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalized, indexable numbers derived from the display strings"""
+    salary_min, salary_max = parse_salary_range(doc.get("averageSalary", ""))
+    return {
+        "salaryMin": salary_min,
+        "salaryMax": salary_max,
+        "growthPercent": parse_growth_percent(doc.get("growthRate", "")),
+    }
+
+
+def validate_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate against the Career model and return the document to store (without _id/createdAt)"""
+    career = Career(**{k: v for k, v in row.items() if k not in ("_id", "id")})
+    # relatedCareers is owned by the precomputed similarity index (career_graph)
+    doc = career.dict(exclude={"id", "createdAt", "relatedCareers"})
+    doc.update(numeric_fields(doc))
+    doc["skillIds"] = get_taxonomy().normalize_all(doc["skills"])
+    doc["key"] = natural_key(row)
+    if not doc["key"]:
+        raise ValueError("Row has no title or key to upsert on")
+    doc["contentHash"] = hashlib.sha1(json.dumps(doc, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    return doc
+
+
+class IngestReport:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.rows = 0
+        self.invalid = 0
+        self.inserted = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.errors: List[Dict[str, Any]] = []
+        self.changed_ids: List[str] = []
+
+    def add_error(self, line_no: int, error: Exception) -> None:
+        self.invalid += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            message = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in error.errors()) \
+                if isinstance(error, ValidationError) else str(error)
+            self.errors.append({"line": line_no, "error": message})
+
+    def to_dict(self) -> Dict[str, Any]:
+        seconds = max(time.perf_counter() - self.started, 1e-9)
+        return {
+            "rows": self.rows,
+            "invalid": self.invalid,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "unchanged": self.unchanged,
+            "seconds": round(seconds, 3),
+            "rowsPerSec": round(self.rows / seconds, 1),
+            "errors": self.errors,
+        }
+
+
+class CatalogIngestor:
+    """Streams catalog rows into the careers collection as batched, unordered bulk upserts keyed
+    on the natural key. Memory is bounded by batch_size * MAX_INFLIGHT_BATCHES rows."""
+
+    def __init__(self, db, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.db = db
+        self.batch_size = batch_size
+
+    async def ensure_key_index(self) -> None:
+        # Careers stored before keys/numeric fields/skill ids existed get them, so re-ingesting updates
+        # instead of duplicating, and range filters and skill matching see every career
+        backfill = []
+        legacy = {"$or": [{"key": {"$exists": False}}, {"salaryMin": {"$exists": False}}, {"skillIds": {"$exists": False}}]}
+        taxonomy = get_taxonomy()
+        async for doc in self.db.careers.find(legacy, {"title": 1, "averageSalary": 1, "growthRate": 1, "skills": 1}):
+            derived = {"key": natural_key(doc), "skillIds": taxonomy.normalize_all(doc.get("skills") or []), **numeric_fields(doc)}
+            backfill.append(UpdateOne({"_id": doc["_id"]}, {"$set": derived}))
+        if backfill:
+            await self.db.careers.bulk_write(backfill, ordered=False)
+        # Upserts look documents up by key, so this one has to exist before the load
+        await self.db.careers.create_index("key", unique=True, sparse=True)
+
+    async def ensure_indexes(self) -> None:
+        """Secondary indexes are built once after the load instead of being maintained per write"""
+        await self.db.careers.create_index("category")
+        await self.db.careers.create_index("title")
+        # Range filters and sorts on /api/careers, alone or within a category
+        for field in ("salaryMin", "salaryMax", "growthPercent", "jobPostings"):
+            await self.db.careers.create_index(field)
+        await self.db.careers.create_index([("category", 1), ("growthPercent", -1)])
+        await self.db.careers.create_index([("category", 1), ("salaryMax", -1)])
+        await self.db.careers.create_index("skillIds")
+
+    async def ingest(self, rows: Iterable[Tuple[int, Any]]) -> IngestReport:
+        report = IngestReport()
+        await self.ensure_key_index()
+        inflight = asyncio.Semaphore(MAX_INFLIGHT_BATCHES)
+        tasks = set()
+
+        async def write(batch):
+            try:
+                await self._write_batch(batch, report)
+            finally:
+                inflight.release()
+
+        batch: List[Dict[str, Any]] = []
+        for line_no, row in rows:
+            report.rows += 1
+            if isinstance(row, Exception):
+                report.add_error(line_no, row)
+                continue
+            try:
+                batch.append(validate_row(row))
+            except (ValidationError, ValueError, TypeError) as e:
+                report.add_error(line_no, e)
+                continue
+            if len(batch) >= self.batch_size:
+                await inflight.acquire()
+                task = asyncio.create_task(write(batch))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                batch = []
+                # Yield so in-flight writes progress while we keep parsing
+                await asyncio.sleep(0)
+        if batch:
+            await inflight.acquire()
+            tasks.add(asyncio.create_task(write(batch)))
+        if tasks:
+            await asyncio.gather(*tasks)
+
+        await self.ensure_indexes()
+        logger.info(f"Catalog ingest finished: {report.to_dict()}")
+        return report
+
+    async def _write_batch(self, batch: List[Dict[str, Any]], report: IngestReport) -> None:
+        # Last row wins when a key repeats inside one batch
+        by_key = {doc["key"]: doc for doc in batch}
+        existing = {}
+        async for doc in self.db.careers.find({"key": {"$in": list(by_key)}}, {"key": 1, "contentHash": 1}):
+            existing[doc["key"]] = doc
+
+        now = datetime.utcnow()
+        ops = []
+        op_keys = []
+        for key, doc in by_key.items():
+            current = existing.get(key)
+            if current and current.get("contentHash") == doc["contentHash"]:
+                report.unchanged += 1
+                continue
+            ops.append(UpdateOne(
+                {"key": key},
+                {"$set": {**doc, "updatedAt": now}, "$setOnInsert": {"createdAt": now}},
+                upsert=True
+            ))
+            op_keys.append(key)
+            if current:
+                report.changed_ids.append(str(current["_id"]))
+        report.unchanged += len(batch) - len(by_key)
+        if not ops:
+            return
+        try:
+            result = await self.db.careers.bulk_write(ops, ordered=False)
+            report.inserted += result.upserted_count
+            report.updated += result.modified_count
+            report.changed_ids.extend(str(_id) for _id in result.upserted_ids.values())
+        except BulkWriteError as e:
+            details = e.details
+            report.inserted += details.get("nUpserted", 0)
+            report.updated += details.get("nModified", 0)
+            report.changed_ids.extend(str(u["_id"]) for u in details.get("upserted", []))
+            # Two in-flight batches can race to insert the same key; the loser just needs a retry
+            retry = [err["index"] for err in details.get("writeErrors", []) if err.get("code") == 11000]
+            for err in details.get("writeErrors", []):
+                if err.get("code") != 11000:
+                    report.add_error(0, ValueError(err.get("errmsg", "write failed")))
+            if retry:
+                result = await self.db.careers.bulk_write([ops[i] for i in retry], ordered=False)
+                report.inserted += result.upserted_count
+                report.updated += result.modified_count
+                # The winning batch inserted these keys, so their ids are looked up rather than returned
+                upserted = {str(_id) for _id in result.upserted_ids.values()}
+                report.changed_ids.extend(upserted)
+                async for doc in self.db.careers.find({"key": {"$in": [op_keys[i] for i in retry]}}, {"_id": 1}):
+                    if str(doc["_id"]) not in upserted:
+                        report.changed_ids.append(str(doc["_id"]))
+
+
+def open_catalog(path: str) -> TextIO:
+    return io.open(path, "r", encoding="utf-8", newline="")
+
+
+async def _main(args: argparse.Namespace) -> None:
+    from pathlib import Path
+    from dotenv import load_dotenv
+    from database import DatabaseService
+
+    load_dotenv(Path(__file__).parent / ".env")
+    db_service = DatabaseService()
+    await db_service.connect()
+    try:
+        with open_catalog(args.path) as stream:
+            rows = iter_rows(stream, args.format or detect_format(args.path))
+            report = await db_service.ingest_careers(rows, batch_size=args.batch_size, refresh_related=not args.no_related)
+        print(json.dumps(report, indent=2))
+    finally:
+        await db_service.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Stream an NDJSON or CSV career catalog into MongoDB")
+    parser.add_argument("path", help="Catalog file (.ndjson/.jsonl or .csv)")
+    parser.add_argument("--format", choices=["ndjson", "csv"], help="Override format detection")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--no-related", action="store_true", help="Skip the related-careers refresh")
+    asyncio.run(_main(parser.parse_args()))
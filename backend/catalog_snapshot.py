@@ -0,0 +1,425 @@
+import os
+import json
+import mmap
+import struct
+import asyncio
+import hashlib
+import argparse
+import logging
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+from bson import ObjectId
+
+from career_search import CareerSearchIndex
+from database import DatabaseService, SORT_FIELDS, SALARY_BANDS, check_career_fields, timed_query
+
+logger = logging.getLogger(__name__)
+
+# Layout: magic | u32 header length | JSON header | sections, each starting on an 8-byte boundary.
+# The header lists every section as [offset, length, dtype]; readers reject other format versions.
+SNAPSHOT_MAGIC = b"CPSNAP\x00\x00"
+SNAPSHOT_FORMAT_VERSION = 1
+SNAPSHOT_ALIGN = 8
+NUMERIC_COLUMNS = ("salaryMin", "salaryMax", "growthPercent", "jobPostings")
+
+
+class ReadOnlyCatalogError(RuntimeError):
+    """Raised for writes against the snapshot-backed catalog"""
+
+
+def compute_facets(categories: List[Optional[str]], codes: np.ndarray, salary_min: np.ndarray,
+                   mask: Optional[np.ndarray] = None) -> Dict[str, Any]:
+    """Same shape as DatabaseService.get_career_facets, computed over snapshot columns"""
+    if mask is not None:
+        codes, salary_min = codes[mask], salary_min[mask]
+    # Code -1 is a career without a category; it sits in the last bincount slot
+    counts = np.bincount(np.where(codes < 0, len(categories), codes), minlength=len(categories) + 1)
+    values = list(categories) + [None]
+    category_counts = sorted(
+        ({"value": values[i], "count": int(n)} for i, n in enumerate(counts) if n),
+        key=lambda c: (-c["count"], c["value"] is not None, c["value"] or ""),
+    )
+    banded = salary_min[~np.isnan(salary_min)]
+    banded = banded[banded >= SALARY_BANDS[0]]
+    # The last slot is the open-ended top band, as in the Mongo facet's default bucket
+    band_counts = np.bincount(np.searchsorted(SALARY_BANDS, banded, side="right") - 1, minlength=len(SALARY_BANDS))
+    return {
+        "total": int(len(codes)),
+        "categories": category_counts,
+        "salaryBands": [
+            {"min": SALARY_BANDS[i], "max": SALARY_BANDS[i + 1] if i + 1 < len(SALARY_BANDS) else None, "count": int(n)}
+            for i, n in enumerate(band_counts) if n
+        ],
+    }
+
+
+def write_snapshot(path: str, careers: List[Dict[str, Any]], neighbors: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+                   catalog_version: Any = 0, updated_at: Optional[datetime] = None) -> Dict[str, Any]:
+    """Write careers (clean docs with string ids, in serving order) and their derived data to path"""
+    sections: List[Tuple[str, bytes, str]] = []
+
+    encoded = [json.dumps(c, default=str, ensure_ascii=False, separators=(",", ":")).encode("utf-8") for c in careers]
+    sections.append(("docs", b"".join(encoded), "bytes"))
+    sections.append(("docOffsets", np.cumsum([0] + [len(e) for e in encoded], dtype=np.uint64).tobytes(), "uint64"))
+
+    ids = [c["id"] for c in careers]
+    id_width = max((len(i) for i in ids), default=1)
+    id_order = np.argsort(np.array(ids, dtype=f"S{id_width}"), kind="stable").astype(np.uint32)
+    sections.append(("ids", np.array(ids, dtype=f"S{id_width}")[id_order].tobytes(), f"S{id_width}"))
+    sections.append(("idOrdinals", id_order.tobytes(), "uint32"))
+
+    columns = {}
+    for field in NUMERIC_COLUMNS:
+        columns[field] = np.array([c[field] if c.get(field) is not None else np.nan for c in careers], dtype=np.float64)
+        sections.append((field, columns[field].tobytes(), "float64"))
+    categories = list(dict.fromkeys(c["category"] for c in careers if c.get("category")))
+    category_codes = {name: i for i, name in enumerate(categories)}
+    codes = np.array([category_codes.get(c.get("category"), -1) for c in careers], dtype=np.int32)
+    sections.append(("category", codes.tobytes(), "int32"))
+    title_rank = np.empty(len(careers), dtype=np.uint32)
+    title_rank[sorted(range(len(careers)), key=lambda i: careers[i].get("title") or "")] = np.arange(len(careers), dtype=np.uint32)
+    sections.append(("titleRank", title_rank.tobytes(), "uint32"))
+
+    # Search index as pre-tokenized field weights per career (CSR), so loading it skips tokenization
+    vocabulary: Dict[str, int] = {}
+    term_ids, term_weights, term_offsets = [], [], [0]
+    for career in careers:
+        for term, weight in CareerSearchIndex.field_terms(career).items():
+            term_ids.append(vocabulary.setdefault(term, len(vocabulary)))
+            term_weights.append(weight)
+        term_offsets.append(len(term_ids))
+    sections.append(("vocabulary", json.dumps(list(vocabulary), ensure_ascii=False).encode("utf-8"), "json"))
+    sections.append(("termOffsets", np.array(term_offsets, dtype=np.uint32).tobytes(), "uint32"))
+    sections.append(("termIds", np.array(term_ids, dtype=np.uint32).tobytes(), "uint32"))
+    sections.append(("termWeights", np.array(term_weights, dtype=np.float32).tobytes(), "float32"))
+    sections.append(("neighbors", json.dumps(neighbors or {}, default=str, ensure_ascii=False).encode("utf-8"), "json"))
+
+    content_hash = hashlib.sha1(b"".join(encoded)).hexdigest()
+    header = {
+        "formatVersion": SNAPSHOT_FORMAT_VERSION,
+        "catalogVersion": catalog_version,
+        # ETag version: two snapshots of the same catalog version can still differ in content
+        "version": f"{catalog_version}-{content_hash[:12]}",
+        "updatedAt": (updated_at or datetime.utcnow()).isoformat(),
+        "createdAt": datetime.utcnow().isoformat(),
+        "count": len(careers),
+        "categories": categories,
+        "facets": compute_facets(categories, codes, columns["salaryMin"]),
+        "sections": {},
+    }
+    # Offsets depend on the header length, which depends on the offsets; lay out until stable
+    header_bytes = b""
+    while True:
+        offset = _align(len(SNAPSHOT_MAGIC) + 4 + len(header_bytes))
+        for name, data, dtype in sections:
+            header["sections"][name] = [offset, len(data), dtype]
+            offset = _align(offset + len(data))
+        encoded_header = json.dumps(header, separators=(",", ":")).encode("utf-8")
+        stable = len(encoded_header) == len(header_bytes)
+        header_bytes = encoded_header
+        if stable:
+            break
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(SNAPSHOT_MAGIC + struct.pack("<I", len(header_bytes)) + header_bytes)
+        for name, data, _ in sections:
+            f.write(b"\x00" * (header["sections"][name][0] - f.tell()))
+            f.write(data)
+    # Readers that already mapped the old file keep it; new readers see the complete new one
+    os.replace(tmp_path, path)
+    return header
+
+
+def _align(offset: int) -> int:
+    return (offset + SNAPSHOT_ALIGN - 1) // SNAPSHOT_ALIGN * SNAPSHOT_ALIGN
+
+
+class CatalogSnapshot:
+    """Read-only view of a snapshot file. The file is memory-mapped, columns are numpy views over
+    the mapping and docs are decoded on access, so opening is cheap and worker processes share
+    the pages through the OS page cache."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+            raise ValueError(f"{path} is not a catalog snapshot")
+        (header_length,) = struct.unpack_from("<I", self._mm, len(SNAPSHOT_MAGIC))
+        start = len(SNAPSHOT_MAGIC) + 4
+        self.header = json.loads(self._mm[start:start + header_length])
+        if self.header.get("formatVersion") != SNAPSHOT_FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot format {self.header.get('formatVersion')} in {path}")
+        self.count = self.header["count"]
+        self._arrays: Dict[str, np.ndarray] = {}
+
+    def array(self, name: str) -> np.ndarray:
+        if name not in self._arrays:
+            offset, length, dtype = self.header["sections"][name]
+            self._arrays[name] = np.frombuffer(self._mm, dtype=np.dtype(dtype), count=length // np.dtype(dtype).itemsize, offset=offset)
+        return self._arrays[name]
+
+    def raw(self, name: str) -> bytes:
+        offset, length, _ = self.header["sections"][name]
+        return self._mm[offset:offset + length]
+
+    def doc(self, ordinal: int) -> Dict[str, Any]:
+        offsets = self.array("docOffsets")
+        base = self.header["sections"]["docs"][0]
+        return json.loads(self._mm[base + int(offsets[ordinal]):base + int(offsets[ordinal + 1])])
+
+    def ordinal(self, career_id: str) -> Optional[int]:
+        ids = self.array("ids")
+        key = career_id.encode("utf-8")
+        if len(key) > ids.dtype.itemsize:
+            return None
+        i = int(np.searchsorted(ids, key))
+        if i < len(ids) and ids[i] == key:
+            return int(self.array("idOrdinals")[i])
+        return None
+
+    def field_terms(self) -> List[Dict[str, float]]:
+        vocabulary = json.loads(self.raw("vocabulary"))
+        offsets, term_ids, weights = self.array("termOffsets"), self.array("termIds"), self.array("termWeights")
+        return [
+            {vocabulary[t]: float(w) for t, w in zip(term_ids[offsets[i]:offsets[i + 1]], weights[offsets[i]:offsets[i + 1]])}
+            for i in range(self.count)
+        ]
+
+    def close(self) -> None:
+        self._arrays.clear()
+        try:
+            self._mm.close()
+        except BufferError:
+            # A caller still holds a column view; the mapping is released with it
+            pass
+
+
+class SnapshotDatabaseService(DatabaseService):
+    """Serves the career catalog from a snapshot file instead of MongoDB. Catalog reads match
+    DatabaseService; users, ingest and other writes raise ReadOnlyCatalogError."""
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.snapshot_path = path
+        self.snapshot: Optional[CatalogSnapshot] = None
+        self.neighbors: Optional[Dict[str, List[Dict[str, Any]]]] = None
+
+    def open(self):
+        if self.snapshot is None:
+            self.snapshot = CatalogSnapshot(self.snapshot_path)
+
+    async def ping(self):
+        self.open()
+
+    async def warm_up(self):
+        self.open()
+        logger.info(f"Serving catalog snapshot {self.snapshot_path}: {self.snapshot.count} careers, "
+                    f"version {self.snapshot.header['version']}")
+
+    async def close(self):
+        if self.snapshot is not None:
+            self.snapshot.close()
+            self.snapshot = None
+
+    def stats(self) -> Dict[str, Any]:
+        header = self.snapshot.header if self.snapshot else {}
+        return {
+            "config": {"backend": "snapshot", "path": self.snapshot_path},
+            "snapshot": {k: header.get(k) for k in ("formatVersion", "version", "count", "createdAt")},
+            "queries": self.query_stats.snapshot(),
+        }
+
+    async def get_catalog_version(self) -> Dict[str, Any]:
+        self.open()
+        header = self.snapshot.header
+        return {"version": header["version"], "updatedAt": datetime.fromisoformat(header["updatedAt"])}
+
+    async def _read_only(self, *args, **kwargs):
+        raise ReadOnlyCatalogError("The catalog is served from a read-only snapshot")
+
+    ingest_careers = refresh_related_careers = bump_catalog_version = _read_only
+    create_user = get_user_by_email = get_user_by_id = update_user = _read_only
+    save_career_identity = save_user_career = remove_user_career = _read_only
+
+    # Catalog reads
+    def _mask(self, category: str = None, min_salary: int = None, max_salary: int = None,
+              min_growth: float = None, max_growth: float = None) -> np.ndarray:
+        """Row mask for the same filters as DatabaseService._range_filter (missing values never match)"""
+        snap = self.snapshot
+        mask = np.ones(snap.count, dtype=bool)
+        if category:
+            categories = snap.header["categories"]
+            code = categories.index(category) if category in categories else -2
+            mask &= snap.array("category") == code
+        if min_salary is not None:
+            mask &= snap.array("salaryMax") >= min_salary
+        if max_salary is not None:
+            mask &= snap.array("salaryMin") <= max_salary
+        if min_growth is not None:
+            mask &= snap.array("growthPercent") >= min_growth
+        if max_growth is not None:
+            mask &= snap.array("growthPercent") <= max_growth
+        return mask
+
+    def _sort_key(self, sort_field: str) -> np.ndarray:
+        if sort_field == "title":
+            return self.snapshot.array("titleRank").astype(np.float64)
+        # Missing values sort lowest, as in MongoDB
+        return np.nan_to_num(self.snapshot.array(sort_field), nan=-np.inf)
+
+    @timed_query
+    async def get_careers(self, search: str = None, category: str = None, limit: int = 50,
+                          min_salary: int = None, max_salary: int = None, min_growth: float = None,
+                          max_growth: float = None, sort: str = None, order: str = "desc") -> List[Dict[str, Any]]:
+        self.open()
+        mask = self._mask(category, min_salary, max_salary, min_growth, max_growth)
+        sort_field = SORT_FIELDS.get(sort) if sort else None
+        if search:
+            await self._search_index_ready()
+            ranked = self.search_index.search(search, category=category, limit=len(self.search_index))
+            ordinals = np.array([self.snapshot.ordinal(career["id"]) for career, _ in ranked], dtype=np.int64)
+            ordinals = ordinals[mask[ordinals]] if len(ordinals) else ordinals
+        else:
+            ordinals = np.flatnonzero(mask)
+        if sort_field:
+            keys = self._sort_key(sort_field)[ordinals]
+            # Stable sort keeps search rank (or catalog order) among equal values
+            ordinals = ordinals[np.argsort(keys if order == "asc" else -keys, kind="stable")]
+        return [self.snapshot.doc(int(o)) for o in ordinals[:limit]]
+
+    @timed_query
+    async def get_career_facets(self, category: str = None, min_salary: int = None, max_salary: int = None,
+                                min_growth: float = None, max_growth: float = None) -> Dict[str, Any]:
+        self.open()
+        snap = self.snapshot
+        if not any(v is not None for v in (category, min_salary, max_salary, min_growth, max_growth)):
+            return snap.header["facets"]
+        mask = self._mask(category, min_salary, max_salary, min_growth, max_growth)
+        return compute_facets(snap.header["categories"], snap.array("category"), snap.array("salaryMin"), mask)
+
+    @timed_query
+    async def get_career_by_id(self, career_id: str) -> Optional[Dict[str, Any]]:
+        self.open()
+        ordinal = self.snapshot.ordinal(career_id)
+        return self.snapshot.doc(ordinal) if ordinal is not None else None
+
+    @timed_query
+    async def get_careers_by_ids(self, career_ids: List[str], fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        check_career_fields(fields)
+        self.open()
+        results = []
+        for career_id in career_ids:
+            if not ObjectId.is_valid(career_id):
+                results.append({"id": career_id, "found": False, "error": "invalid_id"})
+                continue
+            ordinal = self.snapshot.ordinal(career_id)
+            if ordinal is None:
+                results.append({"id": career_id, "found": False, "error": "not_found"})
+                continue
+            career = self.snapshot.doc(ordinal)
+            if fields:
+                career = {"id": career["id"], **{f: career[f] for f in fields if f in career and f != "id"}}
+            results.append({"id": career_id, "found": True, "career": career})
+        return results
+
+    @timed_query
+    async def get_career_categories(self) -> List[str]:
+        self.open()
+        return list(self.snapshot.header["categories"])
+
+    @timed_query
+    async def get_related_careers(self, career_id: str) -> Optional[List[Dict[str, Any]]]:
+        self.open()
+        if self.neighbors is None:
+            self.neighbors = json.loads(self.snapshot.raw("neighbors"))
+        return self.neighbors.get(career_id)
+
+    # Search index: loaded from the snapshot's pre-tokenized terms on first use
+    async def _search_index_ready(self) -> bool:
+        if not len(self.search_index):
+            await self.sync_search_index()
+        return True
+
+    async def sync_search_index(self) -> None:
+        async with self._search_lock:
+            self.open()
+            if len(self.search_index) or not self.snapshot.count:
+                return
+            # Only what ranking needs stays in memory; results are decoded from the snapshot
+            docs = [
+                {k: v for k, v in self.snapshot.doc(i).items() if k in ("id", "title", "category", "skillIds")}
+                for i in range(self.snapshot.count)
+            ]
+            index = CareerSearchIndex()
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, index.rebuild, docs, self.snapshot.header["version"], self.snapshot.field_terms())
+            self.search_index = index
+            logger.info(f"Search index loaded from snapshot: {len(index)} careers")
+
+
+def careers_from_catalog_file(path: str, fmt: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Validated careers from a catalog file, with ids derived from their natural keys"""
+    from pydantic import ValidationError
+    from catalog_ingest import iter_rows, detect_format, open_catalog, validate_row
+
+    careers = []
+    with open_catalog(path) as stream:
+        for line_no, row in iter_rows(stream, fmt or detect_format(path)):
+            try:
+                if isinstance(row, Exception):
+                    raise row
+                doc = validate_row(row)
+            except (ValueError, ValidationError) as e:
+                logger.warning(f"Skipping catalog line {line_no}: {str(e)}")
+                continue
+            # Deterministic ObjectId-shaped ids, so the same file always yields the same ids
+            doc["id"] = hashlib.sha1(doc["key"].encode("utf-8")).hexdigest()[:24]
+            careers.append({k: v for k, v in doc.items() if v is not None})
+    return careers
+
+
+async def export_from_database(path: str) -> Dict[str, Any]:
+    db_service = DatabaseService()
+    await db_service.connect()
+    try:
+        careers = [db_service._clean_career(c) async for c in db_service.db.careers.find({}).sort("_id", 1)]
+        neighbors = {doc["_id"]: doc.get("neighbors", []) async for doc in db_service.db.career_neighbors.find({})}
+        version = await db_service.get_catalog_version()
+    finally:
+        await db_service.close()
+    return write_snapshot(path, careers, neighbors, version["version"], version["updatedAt"])
+
+
+def _main(args: argparse.Namespace) -> None:
+    from pathlib import Path
+    from dotenv import load_dotenv
+
+    load_dotenv(Path(__file__).parent / ".env")
+    if args.command == "export":
+        if args.catalog:
+            header = write_snapshot(args.out, careers_from_catalog_file(args.catalog))
+        else:
+            header = asyncio.run(export_from_database(args.out))
+        path = args.out
+    else:
+        snapshot = CatalogSnapshot(args.path)
+        header, path = snapshot.header, args.path
+        snapshot.close()
+    summary = {k: header[k] for k in ("formatVersion", "version", "count", "createdAt", "categories")}
+    print(json.dumps({"path": path, "bytes": os.path.getsize(path), **summary}, indent=2))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Export or inspect a read-only career catalog snapshot")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="Write a snapshot of the catalog in MongoDB (or a catalog file)")
+    export.add_argument("--out", required=True, help="Snapshot path; replaced atomically")
+    export.add_argument("--catalog", help="Build from an NDJSON/CSV catalog file instead of MongoDB")
+    info = commands.add_parser("info", help="Print a snapshot's header")
+    info.add_argument("path")
+    _main(parser.parse_args())
@@ -0,0 +1,314 @@
+import os
+import math
+import shutil
+import tempfile
+import time
+import json
+import asyncio
+import argparse
+import logging
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple, TextIO
+
+import numpy as np
+from pydantic import ValidationError
+
+from models import UserProfile
+from catalog_ingest import iter_rows, detect_format, open_catalog, validate_row
+from resume_analyzer import tokenize, STOPWORDS
+from skill_taxonomy import get_taxonomy, PARENT_CREDIT
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 512
+DEFAULT_TOP_N = 10
+# Each career keeps only its highest-weighted description terms, so the text index stays sparse
+MAX_CAREER_TERMS = int(os.environ.get("COHORT_MAX_CAREER_TERMS", "64"))
+# matchScore = 50 + SKILL_POINTS * skill overlap + TEXT_POINTS * interest/goal similarity, so a
+# profile with no text scores like the API's skill-overlap fallback scaled into the same range
+SKILL_POINTS = 40.0
+TEXT_POINTS = 10.0
+# Columns accepted as the profile identifier, in order of preference
+PROFILE_ID_FIELDS = ("id", "studentId", "email")
+PROFILE_TEXT_FIELDS = ("currentRole", "interests", "careerGoals")
+
+
+def _terms(text: str) -> List[str]:
+    return [t for t in tokenize(text) if t not in STOPWORDS and len(t) > 2]
+
+
+def read_profiles(stream: TextIO, fmt: str) -> Tuple[List[Tuple[str, Dict[str, Any]]], List[Dict[str, Any]]]:
+    """Parse a cohort file into (profileId, UserProfile dict) pairs plus per-line errors"""
+    profiles, errors = [], []
+    for line_no, row in iter_rows(stream, fmt):
+        if isinstance(row, Exception):
+            errors.append({"line": line_no, "error": str(row)})
+            continue
+        row = {k: v for k, v in row.items() if v not in (None, "")}
+        profile_id = next((str(row[f]) for f in PROFILE_ID_FIELDS if row.get(f)), str(line_no))
+        try:
+            profiles.append((profile_id, UserProfile(**row).dict()))
+        except ValidationError as e:
+            errors.append({"line": line_no, "error": "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())})
+    return profiles, errors
+
+
+class CohortModel:
+    """Careers as matrices over canonical skill ids and IDF-weighted description terms.
+
+    Skill overlap reproduces SkillTaxonomy.overlap as a matrix product: a profile's credit for
+    each skill (1 for the skill or a more specific one, PARENT_CREDIT for a shared parent)
+    times each career's wanted skills, normalized by how many it wants.
+
+    Description text is a sparse term -> careers index (CSC: text_ptr, text_rows, text_weights)
+    holding each career's top MAX_CAREER_TERMS terms, L2-normalized."""
+
+    ARRAYS = ("parent_col", "wants", "idf", "text_ptr", "text_rows", "text_weights")
+
+    def __init__(self, careers: List[Dict[str, Any]]):
+        taxonomy = get_taxonomy()
+        self.career_ids = [str(c.get("id") or c.get("_id")) for c in careers]
+        self.titles = [c.get("title", "") for c in careers]
+        skill_ids = sorted(taxonomy.names)
+        self.skill_col = {skill_id: i for i, skill_id in enumerate(skill_ids)}
+        self.parent_col = np.array([self.skill_col.get(taxonomy.parents.get(s), -1) for s in skill_ids], dtype=np.int64)
+
+        self.wants = np.zeros((len(careers), len(skill_ids)), dtype=np.float32)
+        for row, career in enumerate(careers):
+            want = [s for s in dict.fromkeys(career.get("skillIds") or taxonomy.normalize_all(career.get("skills") or [])) if s in self.skill_col]
+            for skill_id in want:
+                self.wants[row, self.skill_col[skill_id]] = 1.0 / len(want)
+
+        docs = [Counter(_terms(f"{c.get('title', '')} {c.get('category', '')} {c.get('description', '')}")) for c in careers]
+        df = Counter(term for doc in docs for term in doc)
+        # Terms in most of the catalog ("work", "team") do not tell careers apart
+        max_df = max(1, int(0.5 * len(careers)))
+        self.vocab = {term: i for i, term in enumerate(t for t, n in df.items() if n <= max_df)}
+        self.idf = np.zeros(len(self.vocab), dtype=np.float32)
+        for term, col in self.vocab.items():
+            self.idf[col] = math.log((1 + len(careers)) / (1 + df[term])) + 1.0
+
+        cols, rows, weights = [], [], []
+        for row, doc in enumerate(docs):
+            terms = [(self.vocab[t], count * self.idf[self.vocab[t]]) for t, count in doc.items() if t in self.vocab]
+            terms = sorted(terms, key=lambda item: -item[1])[:MAX_CAREER_TERMS]
+            norm = math.sqrt(sum(w * w for _, w in terms)) or 1.0
+            for col, weight in terms:
+                cols.append(col)
+                rows.append(row)
+                weights.append(weight / norm)
+        cols = np.array(cols, dtype=np.int64)
+        order = np.argsort(cols, kind="stable")
+        self.text_ptr = np.concatenate([[0], np.cumsum(np.bincount(cols, minlength=len(self.vocab)))]).astype(np.int64)
+        self.text_rows = np.array(rows, dtype=np.int32)[order]
+        self.text_weights = np.array(weights, dtype=np.float32)[order]
+
+    @property
+    def career_count(self) -> int:
+        return self.wants.shape[0]
+
+    def save(self, directory: str) -> None:
+        """Write the scoring arrays as .npy files that worker processes memory-map instead of copying"""
+        for name in self.ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(directory, "model.json"), "w", encoding="utf-8") as out:
+            json.dump({"skills": list(self.skill_col), "vocab": list(self.vocab)}, out)
+
+    @classmethod
+    def load(cls, directory: str) -> "CohortModel":
+        model = cls.__new__(cls)
+        with open(os.path.join(directory, "model.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        model.skill_col = {skill_id: i for i, skill_id in enumerate(meta["skills"])}
+        model.vocab = {term: i for i, term in enumerate(meta["vocab"])}
+        for name in cls.ARRAYS:
+            setattr(model, name, np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r"))
+        model.career_ids = model.titles = None
+        return model
+
+    def skill_credit(self, profiles: List[Dict[str, Any]]) -> np.ndarray:
+        taxonomy = get_taxonomy()
+        full = np.zeros((len(profiles), len(self.skill_col)), dtype=np.float32)
+        near = np.zeros_like(full)
+        for row, profile in enumerate(profiles):
+            have = [s for s in taxonomy.normalize_all(profile.get("skills") or []) if s in self.skill_col]
+            for skill_id in taxonomy.expand(have):
+                full[row, self.skill_col[skill_id]] = 1.0
+            for skill_id in have:
+                near[row, self.skill_col[skill_id]] = 1.0
+                for parent in taxonomy.ancestors(skill_id)[:1]:
+                    near[row, self.skill_col[parent]] = 1.0
+        # Partial credit for a wanted skill whose parent the profile has (or shares)
+        has_parent = self.parent_col >= 0
+        partial = np.zeros_like(full)
+        partial[:, has_parent] = near[:, self.parent_col[has_parent]] * PARENT_CREDIT
+        return np.maximum(full, partial)
+
+    def text_similarity(self, profiles: List[Dict[str, Any]]) -> np.ndarray:
+        """Cosine similarity of each profile's text to each career, (profiles, careers)"""
+        by_term: Dict[int, Tuple[List[int], List[float]]] = {}
+        for row, profile in enumerate(profiles):
+            weights = {}
+            for term, count in Counter(_terms(" ".join(str(profile.get(f) or "") for f in PROFILE_TEXT_FIELDS))).items():
+                col = self.vocab.get(term)
+                if col is not None:
+                    weights[col] = count * float(self.idf[col])
+            norm = math.sqrt(sum(w * w for w in weights.values()))
+            for col, weight in weights.items():
+                rows, values = by_term.setdefault(col, ([], []))
+                rows.append(row)
+                values.append(weight / norm)
+        similarity = np.zeros((len(profiles), self.career_count), dtype=np.float32)
+        # Only careers sharing a term with a profile are touched
+        for col, (rows, values) in by_term.items():
+            start, end = self.text_ptr[col], self.text_ptr[col + 1]
+            if start == end:
+                continue
+            careers = self.text_rows[start:end]
+            similarity[np.ix_(rows, careers)] += np.outer(np.array(values, dtype=np.float32), self.text_weights[start:end])
+        return similarity
+
+    def score_chunk(self, profiles: List[Dict[str, Any]], top_n: int) -> Dict[str, np.ndarray]:
+        """Top-N careers per profile: career row indices and score components, each (profiles, top_n)"""
+        overlap = self.skill_credit(profiles) @ self.wants.T
+        similarity = self.text_similarity(profiles)
+        scores = 50.0 + SKILL_POINTS * overlap + TEXT_POINTS * similarity
+        top_n = min(top_n, scores.shape[1])
+        top = np.argpartition(-scores, top_n - 1, axis=1)[:, :top_n]
+        order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        return {
+            "career": top,
+            "matchScore": np.take_along_axis(scores, top, axis=1),
+            "skillOverlap": np.take_along_axis(overlap, top, axis=1),
+            "textSimilarity": np.take_along_axis(similarity, top, axis=1),
+        }
+
+
+# Each pool worker memory-maps the model once; the OS shares its pages between workers
+_worker_model: Optional[CohortModel] = None
+
+
+def _init_worker(model_dir: str) -> None:
+    global _worker_model
+    _worker_model = CohortModel.load(model_dir)
+
+
+def _score_in_worker(profiles: List[Dict[str, Any]], top_n: int) -> Dict[str, np.ndarray]:
+    return _worker_model.score_chunk(profiles, top_n)
+
+
+def score_cohort(model: CohortModel, profiles: List[Tuple[str, Dict[str, Any]]], top_n: int = DEFAULT_TOP_N,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, workers: int = 1) -> Dict[str, np.ndarray]:
+    """Rank careers for every profile; returns long-format columns, one row per (profile, rank)"""
+    chunks = [[p for _, p in profiles[i:i + chunk_size]] for i in range(0, len(profiles), chunk_size)]
+    if workers > 1 and len(chunks) > 1:
+        model_dir = tempfile.mkdtemp(prefix="cohort-model-")
+        try:
+            model.save(model_dir)
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(model_dir,)) as pool:
+                results = list(pool.map(_score_in_worker, chunks, [top_n] * len(chunks)))
+        finally:
+            shutil.rmtree(model_dir, ignore_errors=True)
+    else:
+        results = [model.score_chunk(chunk, top_n) for chunk in chunks]
+    if not results:
+        return {}
+
+    top = np.concatenate([r["career"] for r in results])
+    per_profile = top.shape[1]
+    career_ids = np.array(model.career_ids)
+    titles = np.array(model.titles)
+    return {
+        "profileId": np.repeat(np.array([pid for pid, _ in profiles]), per_profile),
+        "rank": np.tile(np.arange(1, per_profile + 1, dtype=np.int16), len(profiles)),
+        "careerId": career_ids[top].ravel(),
+        "title": titles[top].ravel(),
+        "matchScore": np.round(np.concatenate([r["matchScore"] for r in results]).ravel(), 2).astype(np.float32),
+        "skillOverlap": np.concatenate([r["skillOverlap"] for r in results]).ravel().astype(np.float32),
+        "textSimilarity": np.concatenate([r["textSimilarity"] for r in results]).ravel().astype(np.float32),
+    }
+
+
+def write_results(path: str, columns: Dict[str, np.ndarray]) -> str:
+    """Parquet when pyarrow is installed and the path asks for it, otherwise a compressed .npz"""
+    if path.endswith(".parquet"):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            path = path[: -len(".parquet")] + ".npz"
+            logger.warning(f"pyarrow is not installed; writing {path} instead")
+        else:
+            pq.write_table(pa.table(columns), path)
+            return path
+    np.savez_compressed(path, **columns)
+    return path if path.endswith(".npz") else path + ".npz"
+
+
+def load_catalog_file(path: str, fmt: Optional[str] = None) -> List[Dict[str, Any]]:
+    careers = []
+    with open_catalog(path) as stream:
+        for line_no, row in iter_rows(stream, fmt or detect_format(path)):
+            try:
+                if isinstance(row, Exception):
+                    raise row
+                doc = validate_row(row)
+                careers.append({"id": str(row.get("id") or doc["key"]), **doc})
+            except (ValueError, ValidationError) as e:
+                logger.warning(f"Skipping catalog line {line_no}: {str(e)}")
+    return careers
+
+
+async def load_catalog_db() -> List[Dict[str, Any]]:
+    from database import DatabaseService
+
+    db_service = DatabaseService()
+    await db_service.connect()
+    try:
+        projection = {"title": 1, "category": 1, "description": 1, "skills": 1, "skillIds": 1}
+        careers = await db_service.db.careers.find({}, projection).to_list(length=None)
+    finally:
+        await db_service.close()
+    for career in careers:
+        career["id"] = str(career.pop("_id"))
+    return careers
+
+
+def _main(args: argparse.Namespace) -> None:
+    from pathlib import Path
+    from dotenv import load_dotenv
+
+    load_dotenv(Path(__file__).parent / ".env")
+    started = time.monotonic()
+    careers = load_catalog_file(args.catalog) if args.catalog else asyncio.run(load_catalog_db())
+    with open_catalog(args.profiles) as stream:
+        profiles, errors = read_profiles(stream, args.format or detect_format(args.profiles))
+    for error in errors:
+        logger.warning(f"Skipping profile on line {error['line']}: {error['error']}")
+    if not careers or not profiles:
+        raise SystemExit("Nothing to score: the catalog or the cohort is empty")
+
+    model = CohortModel(careers)
+    logger.info(f"Scoring {len(profiles)} profiles against {len(careers)} careers "
+                f"({len(model.skill_col)} skills, {len(model.vocab)} terms) with {args.workers} workers")
+    columns = score_cohort(model, profiles, top_n=args.top_n, chunk_size=args.chunk_size, workers=args.workers)
+    path = write_results(args.out, columns)
+    print(json.dumps({
+        "profiles": len(profiles), "skipped": len(errors), "careers": len(careers), "rows": len(columns["rank"]),
+        "output": path, "seconds": round(time.monotonic() - started, 2),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Rank careers for every profile in a cohort file")
+    parser.add_argument("profiles", help="Cohort file (.csv or .ndjson/.jsonl) of UserProfile rows; skills separated by | or ;")
+    parser.add_argument("--out", required=True, help="Output path (.parquet needs pyarrow, otherwise .npz)")
+    parser.add_argument("--catalog", help="Score against a catalog file instead of MongoDB")
+    parser.add_argument("--format", choices=["ndjson", "csv"], help="Override cohort format detection")
+    parser.add_argument("--top-n", type=int, default=DEFAULT_TOP_N)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    _main(parser.parse_args())
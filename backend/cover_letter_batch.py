@@ -0,0 +1,171 @@
+import os
+import json
+import uuid
+import asyncio
+import argparse
+import logging
+from typing import List, Dict, Any, Optional, AsyncIterator, Set, TextIO, Tuple
+
+from pydantic import ValidationError
+
+from models import CoverLetterPosting
+from catalog_ingest import iter_rows, detect_format, open_catalog
+from shared_cache import cache_key
+
+logger = logging.getLogger(__name__)
+
+COVER_LETTER_BATCH_CONCURRENCY = int(os.environ.get("COVER_LETTER_BATCH_CONCURRENCY", "4"))
+MAX_BATCH_CONCURRENCY = 16
+MAX_BATCH_POSTINGS = 200
+# Column aliases accepted in CSV/NDJSON posting files
+POSTING_ALIASES = {"title": "jobTitle", "job_title": "jobTitle", "description": "jobDescription", "job_description": "jobDescription"}
+
+
+def posting_key(posting: Dict[str, Any]) -> str:
+    """Stable id for a posting within a batch: its own id, else a digest of its content"""
+    if posting.get("id"):
+        return str(posting["id"])
+    return cache_key(posting.get("jobTitle", ""), posting.get("company", ""), posting.get("jobDescription", ""))[:16]
+
+
+def read_postings(stream: TextIO, fmt: str) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Parse a CSV/NDJSON posting file into validated postings plus per-line errors"""
+    postings, errors = [], []
+    for line_no, row in iter_rows(stream, fmt):
+        if isinstance(row, Exception):
+            errors.append({"line": line_no, "error": str(row)})
+            continue
+        # Empty CSV cells count as missing, so a posting without a title or description is rejected
+        row = {POSTING_ALIASES.get(k, k): v for k, v in row.items() if v not in (None, "")}
+        try:
+            postings.append(CoverLetterPosting(**row).dict())
+        except ValidationError as e:
+            errors.append({"line": line_no, "error": "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())})
+    return postings, errors
+
+
+class CoverLetterBatchRunner:
+    """Generates cover letters for one profile against many postings with bounded concurrency,
+    yielding each result as it completes. Finished letters are saved to an optional cache
+    namespace under the batch id, so re-running the same batch only generates what is missing."""
+
+    def __init__(self, ai_service, store=None, concurrency: int = COVER_LETTER_BATCH_CONCURRENCY):
+        self.ai_service = ai_service
+        self.store = store
+        self.concurrency = max(1, min(concurrency, MAX_BATCH_CONCURRENCY))
+
+    def _store_key(self, batch_id: str, profile_digest: str, key: str) -> str:
+        # The profile is part of the key: resuming with a different profile must not reuse letters
+        return cache_key("cover-letter-batch", batch_id, profile_digest, key)
+
+    async def run(
+        self,
+        postings: List[Dict[str, Any]],
+        user_profile: Optional[Dict[str, Any]] = None,
+        batch_id: Optional[str] = None,
+        skip: Optional[Set[str]] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        batch_id = batch_id or uuid.uuid4().hex
+        profile_digest = cache_key(user_profile or {})
+        skip = skip or set()
+        yield {"type": "batch", "batchId": batch_id, "total": len(postings), "concurrency": self.concurrency}
+
+        succeeded = failed = resumed = 0
+        pending = []
+        for index, posting in enumerate(postings):
+            key = posting_key(posting)
+            if key in skip:
+                resumed += 1
+                continue
+            saved = await self.store.get(self._store_key(batch_id, profile_digest, key)) if self.store else None
+            if saved is not None:
+                resumed += 1
+                yield {"type": "result", **saved, "index": index, "resumed": True}
+                continue
+            pending.append((index, key, posting))
+
+        slots = asyncio.Semaphore(self.concurrency)
+
+        async def generate(index: int, key: str, posting: Dict[str, Any]) -> Dict[str, Any]:
+            result = {"index": index, "key": key, "jobTitle": posting.get("jobTitle"), "company": posting.get("company")}
+            try:
+                async with slots:
+                    # A template fallback letter counts as a failure, so a resumed batch retries it
+                    letter = await self.ai_service.generate_cover_letter(posting, user_profile, use_fallback=False)
+                result.update(success=True, coverLetter=letter)
+            except Exception as e:
+                logger.error(f"Cover letter for posting {key} failed: {str(e)}")
+                return {**result, "success": False, "error": str(e)}
+            if self.store:
+                await self.store.set(self._store_key(batch_id, profile_digest, key), result)
+            return result
+
+        tasks = [asyncio.create_task(generate(*item)) for item in pending]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                if result["success"]:
+                    succeeded += 1
+                else:
+                    failed += 1
+                yield {"type": "result", **result, "resumed": False}
+        finally:
+            # Consumer went away (client disconnect, Ctrl-C): stop generating letters nobody will read
+            for task in tasks:
+                task.cancel()
+
+        yield {"type": "done", "batchId": batch_id, "succeeded": succeeded, "failed": failed, "resumed": resumed}
+
+
+def _completed_keys(path: str) -> Set[str]:
+    """Keys of letters already written to an output file by an earlier, interrupted run"""
+    keys = set()
+    if not os.path.exists(path):
+        return keys
+    with open(path, "r", encoding="utf-8") as out:
+        for line in out:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("type") == "result" and record.get("success"):
+                keys.add(record["key"])
+    return keys
+
+
+async def _main(args: argparse.Namespace) -> None:
+    from pathlib import Path
+    from dotenv import load_dotenv
+    from ai_service import AIService
+
+    load_dotenv(Path(__file__).parent / ".env")
+    with open_catalog(args.postings) as stream:
+        postings, errors = read_postings(stream, args.format or detect_format(args.postings))
+    for error in errors:
+        logger.warning(f"Skipping posting on line {error['line']}: {error['error']}")
+    profile = None
+    if args.profile:
+        with open(args.profile, "r", encoding="utf-8") as f:
+            profile = json.load(f)
+
+    runner = CoverLetterBatchRunner(AIService(), concurrency=args.concurrency)
+    done = _completed_keys(args.out)
+    with open(args.out, "a", encoding="utf-8") as out:
+        async for record in runner.run(postings, profile, skip=done):
+            if record["type"] == "result":
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+                logger.info(f"[{record['index'] + 1}/{len(postings)}] {record['jobTitle']} at {record['company']}: {'ok' if record['success'] else record.get('error')}")
+            elif record["type"] == "done":
+                print(json.dumps(record, indent=2))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Generate cover letters for one profile against many postings")
+    parser.add_argument("postings", help="Postings file (.csv or .ndjson/.jsonl) with jobTitle, company, jobDescription")
+    parser.add_argument("--profile", help="JSON file with the userProfile shared by every letter")
+    parser.add_argument("--out", required=True, help="NDJSON output; re-running with the same file resumes the batch")
+    parser.add_argument("--format", choices=["ndjson", "csv"], help="Override format detection")
+    parser.add_argument("--concurrency", type=int, default=COVER_LETTER_BATCH_CONCURRENCY)
+    asyncio.run(_main(parser.parse_args()))
@@ -1,132 +1,311 @@
 from motor.motor_asyncio import AsyncIOMotorClient
-from typing import List, Dict, Any, Optional
+from pymongo import UpdateOne, DeleteOne, monitoring
+from pymongo.read_preferences import ReadPreference
+from typing import List, Dict, Any, Optional, Set
 import os
+import time
+import asyncio
 import logging
+import threading
+import functools
 from bson import ObjectId
 from datetime import datetime
 
+from pathlib import Path
+
+from career_graph import compute_neighbor_updates, DEFAULT_TOP_N
+from catalog_ingest import CatalogIngestor, iter_rows, open_catalog, DEFAULT_BATCH_SIZE
+from metrics import LatencyWindow, LatencyRegistry
+from career_search import CareerSearchIndex
+from tracing import span
+from user_writes import UserWriteBuffer
+
+SEED_CATALOG_PATH = Path(__file__).parent / "data" / "careers_seed.ndjson"
+
+# /api/careers sort keys -> indexed numeric fields
+SORT_FIELDS = {"salary": "salaryMax", "growth": "growthPercent", "demand": "jobPostings", "title": "title"}
+# Career fields a caller may project in batch lookups ("id" is always returned)
+CAREER_PUBLIC_FIELDS = frozenset({
+    "id", "title", "category", "description", "skills", "averageSalary", "growthRate", "education",
+    "relatedCareers", "jobPostings", "companies", "salaryMin", "salaryMax", "growthPercent", "skillIds", "createdAt",
+})
+# Lower bounds of the salary bands reported by the facets endpoint; salaryMin >= 250k is an open-ended top band
+SALARY_BANDS = [0, 50000, 75000, 100000, 125000, 150000, 200000, 250000]
+# Career fields left out of search index documents, and ids per $in query when re-indexing
+SEARCH_PROJECTION = {"relatedCareers": 0}
+SEARCH_SYNC_BATCH = 500
+
 logger = logging.getLogger(__name__)
 
+# Environment variable -> MongoClient option; unset variables keep the driver default
+POOL_OPTIONS = {
+    "MONGO_MAX_POOL_SIZE": ("maxPoolSize", int),
+    "MONGO_MIN_POOL_SIZE": ("minPoolSize", int),
+    "MONGO_MAX_IDLE_TIME_MS": ("maxIdleTimeMS", int),
+    "MONGO_WAIT_QUEUE_TIMEOUT_MS": ("waitQueueTimeoutMS", int),
+    "MONGO_SERVER_SELECTION_TIMEOUT_MS": ("serverSelectionTimeoutMS", int),
+    "MONGO_CONNECT_TIMEOUT_MS": ("connectTimeoutMS", int),
+    "MONGO_SOCKET_TIMEOUT_MS": ("socketTimeoutMS", int),
+    "MONGO_COMPRESSORS": ("compressors", str),
+}
+
+READ_PREFERENCES = {
+    "primary": ReadPreference.PRIMARY,
+    "primaryPreferred": ReadPreference.PRIMARY_PREFERRED,
+    "secondary": ReadPreference.SECONDARY,
+    "secondaryPreferred": ReadPreference.SECONDARY_PREFERRED,
+    "nearest": ReadPreference.NEAREST,
+}
+
+def client_options_from_env() -> Dict[str, Any]:
+    options = {}
+    for env_name, (option, cast) in POOL_OPTIONS.items():
+        value = os.environ.get(env_name)
+        if value:
+            options[option] = cast(value)
+    return options
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """Live connection-pool usage: checkouts in flight, requests waiting and checkout wait times.
+    Callbacks run on driver threads, hence the lock."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wait_started: Dict[int, float] = {}
+        self.wait_time = LatencyWindow()
+        self.checked_out = 0
+        self.waiting = 0
+        self.checkouts = 0
+        self.checkout_failures: Dict[str, int] = {}
+        self.connections_open = 0
+        self.pool_clears = 0
+
+    def _finish_wait(self, event) -> None:
+        # Checkouts are synchronous within a driver thread, so the thread id pairs start/finish events
+        started = self._wait_started.pop(threading.get_ident(), None)
+        self.waiting = max(0, self.waiting - 1)
+        if started is not None:
+            self.wait_time.observe(time.perf_counter() - started)
+
+    def connection_check_out_started(self, event):
+        with self._lock:
+            self._wait_started[threading.get_ident()] = time.perf_counter()
+            self.waiting += 1
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self._finish_wait(event)
+            self.checked_out += 1
+            self.checkouts += 1
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self._finish_wait(event)
+            reason = str(event.reason)
+            self.checkout_failures[reason] = self.checkout_failures.get(reason, 0) + 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out = max(0, self.checked_out - 1)
+
+    def connection_created(self, event):
+        with self._lock:
+            self.connections_open += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.connections_open = max(0, self.connections_open - 1)
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clears += 1
+
+    def pool_created(self, event): pass
+    def pool_ready(self, event): pass
+    def pool_closed(self, event): pass
+    def connection_ready(self, event): pass
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "checkedOut": self.checked_out,
+                "waiting": self.waiting,
+                "checkoutsTotal": self.checkouts,
+                "checkoutFailures": dict(self.checkout_failures),
+                "connectionsOpen": self.connections_open,
+                "poolCleared": self.pool_clears,
+                "waitTime": self.wait_time.snapshot(),
+            }
+
+
+def check_career_fields(fields: Optional[List[str]]) -> None:
+    unknown = sorted(set(fields or []) - CAREER_PUBLIC_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown career fields: {', '.join(unknown)}")
+
+
+def timed_query(method):
+    """Record per-method latency (and errors) in DatabaseService.query_stats, plus a span when traced"""
+    name = method.__name__
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        start = time.perf_counter()
+        error = False
+        try:
+            with span(f"db.{name}"):
+                return await method(self, *args, **kwargs)
+        except Exception:
+            error = True
+            raise
+        finally:
+            self.query_stats.observe(name, time.perf_counter() - start, error)
+    return wrapper
+
+
 class DatabaseService:
     def __init__(self):
         self.mongo_url = os.environ.get('MONGO_URL')
         self.client = None
         self.db = None
-        
+        self.catalog_db = None
+        self.client_options = client_options_from_env()
+        self.catalog_read_preference = os.environ.get('MONGO_CATALOG_READ_PREFERENCE', 'primary')
+        self.pool_stats = PoolStatsListener()
+        self.query_stats = LatencyRegistry()
+        # Profile/favorites updates are coalesced per user and flushed in bulk (see user_writes.py)
+        self.user_writes = UserWriteBuffer(lambda: self.db.users)
+        # Catalog version is read at most once per TTL per process; it backs HTTP ETags
+        self.catalog_version_ttl = float(os.environ.get('CATALOG_VERSION_TTL', '5'))
+        self._catalog_version = None
+        self._catalog_version_read_at = 0.0
+        # In-process search engine over the catalog; kept in step with the catalog version
+        self.search_index = CareerSearchIndex()
+        self._search_lock = asyncio.Lock()
+        # (contentHash, updatedAt) per indexed career; syncs diff against it rather than comparing clocks
+        self._search_fingerprints: Dict[str, Any] = {}
+        # A full reconcile also runs this often when the version is unchanged (e.g. careers deleted by hand)
+        self.search_reconcile_interval = float(os.environ.get('SEARCH_RECONCILE_INTERVAL', '300'))
+        self._search_reconciled_at = 0.0
+        # Related-careers refreshes run in the background; ids changed meanwhile are folded into the next run
+        self._related_changed: Set[str] = set()
+        self._related_full = False
+        self._related_task: Optional[asyncio.Task] = None
+
+    def open(self):
+        """Create the client without waiting for the server; the driver connects lazily"""
+        if self.client is None:
+            self.client = AsyncIOMotorClient(self.mongo_url, event_listeners=[self.pool_stats], **self.client_options)
+            self.db = self.client[os.environ.get('DB_NAME', 'careerpath_ai')]
+            read_pref = READ_PREFERENCES.get(self.catalog_read_preference)
+            if read_pref is None:
+                logger.warning(f"Unknown MONGO_CATALOG_READ_PREFERENCE '{self.catalog_read_preference}', using primary")
+                read_pref = ReadPreference.PRIMARY
+            # Catalog reads tolerate slightly stale data, so they may be served by secondaries
+            self.catalog_db = self.client.get_database(self.db.name, read_preference=read_pref)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "config": {**self.client_options, "catalogReadPreference": self.catalog_read_preference},
+            "pool": self.pool_stats.snapshot(),
+            "queries": self.query_stats.snapshot(),
+            "userWrites": self.user_writes.stats(),
+        }
+
+    async def ping(self):
+        await self.client.admin.command('ping')
+
+    async def warm_up(self):
+        """Verify the connection and seed an empty catalog"""
+        await self.ping()
+        logger.info("Connected to MongoDB successfully")
+        # Initialize collections with sample data if empty
+        await self._initialize_data()
+
     async def connect(self):
         """Connect to MongoDB"""
         try:
-            self.client = AsyncIOMotorClient(self.mongo_url)
-            self.db = self.client[os.environ.get('DB_NAME', 'careerpath_ai')]
-            # Test connection
-            await self.client.admin.command('ping')
-            logger.info("Connected to MongoDB successfully")
-            
-            # Initialize collections with sample data if empty
-            await self._initialize_data()
-            
+            self.open()
+            await self.warm_up()
         except Exception as e:
             logger.error(f"Failed to connect to MongoDB: {str(e)}")
             raise
     
     async def close(self):
-        """Close MongoDB connection"""
+        """Finish a scheduled related-careers refresh, flush buffered user writes, then close the MongoDB connection"""
         if self.client:
+            await self.wait_related_refresh()
+            await self.user_writes.stop()
             self.client.close()
     
     async def _initialize_data(self):
-        """Initialize database with sample career data"""
+        """Seed the careers collection from the bundled catalog if empty"""
         careers_count = await self.db.careers.count_documents({})
         if careers_count == 0:
-            sample_careers = [
-                {
-                    "title": "UX/UI Designer",
-                    "category": "Design & Creative",
-                    "description": "Create intuitive and engaging user experiences for digital products",
-                    "skills": ["Design Thinking", "Prototyping", "User Research", "Figma", "Adobe Creative Suite"],
-                    "averageSalary": "$75,000 - $120,000",
-                    "growthRate": "13% (Much faster than average)",
-                    "education": "Bachelor's degree in Design, Psychology, or related field",
-                    "relatedCareers": [],
-                    "jobPostings": 1250,
-                    "companies": ["Google", "Apple", "Airbnb", "Spotify", "Netflix"],
-                    "createdAt": datetime.utcnow()
-                },
-                {
-                    "title": "Frontend Developer",
-                    "category": "Technology",
-                    "description": "Build user-facing web applications using modern frameworks and technologies",
-                    "skills": ["JavaScript", "React", "HTML/CSS", "TypeScript", "Version Control"],
-                    "averageSalary": "$70,000 - $130,000",
-                    "growthRate": "22% (Much faster than average)",
-                    "education": "Bachelor's degree in Computer Science or equivalent experience",
-                    "relatedCareers": [],
-                    "jobPostings": 2100,
-                    "companies": ["Meta", "Amazon", "Microsoft", "Tesla", "Shopify"],
-                    "createdAt": datetime.utcnow()
-                },
-                {
-                    "title": "Product Manager",
-                    "category": "Business & Strategy",
-                    "description": "Drive product strategy and coordinate cross-functional teams to deliver successful products",
-                    "skills": ["Product Strategy", "Data Analysis", "Leadership", "Market Research", "Agile Methodology"],
-                    "averageSalary": "$90,000 - $160,000",
-                    "growthRate": "19% (Much faster than average)",
-                    "education": "Bachelor's degree in Business, Engineering, or related field",
-                    "relatedCareers": [],
-                    "jobPostings": 980,
-                    "companies": ["Google", "Uber", "Slack", "Zoom", "Dropbox"],
-                    "createdAt": datetime.utcnow()
-                },
-                {
-                    "title": "Data Scientist",
-                    "category": "Technology",
-                    "description": "Analyze complex data to help organizations make data-driven decisions",
-                    "skills": ["Python", "Machine Learning", "Statistics", "SQL", "Data Visualization"],
-                    "averageSalary": "$95,000 - $165,000",
-                    "growthRate": "35% (Much faster than average)",
-                    "education": "Master's degree in Data Science, Statistics, or related field",
-                    "relatedCareers": [],
-                    "jobPostings": 1580,
-                    "companies": ["Netflix", "Spotify", "Airbnb", "LinkedIn", "Twitter"],
-                    "createdAt": datetime.utcnow()
-                },
-                {
-                    "title": "Digital Marketing Manager",
-                    "category": "Marketing & Communications",
-                    "description": "Develop and execute digital marketing strategies across multiple channels",
-                    "skills": ["SEO/SEM", "Social Media Marketing", "Content Strategy", "Analytics", "Email Marketing"],
-                    "averageSalary": "$55,000 - $95,000",
-                    "growthRate": "10% (Faster than average)",
-                    "education": "Bachelor's degree in Marketing, Communications, or related field",
-                    "relatedCareers": [],
-                    "jobPostings": 1890,
-                    "companies": ["HubSpot", "Mailchimp", "Buffer", "Hootsuite", "Canva"],
-                    "createdAt": datetime.utcnow()
-                },
-                {
-                    "title": "Cybersecurity Analyst",
-                    "category": "Technology",
-                    "description": "Protect organizations from cyber threats and maintain information security",
-                    "skills": ["Network Security", "Incident Response", "Risk Assessment", "Compliance", "Ethical Hacking"],
-                    "averageSalary": "$80,000 - $140,000",
-                    "growthRate": "33% (Much faster than average)",
-                    "education": "Bachelor's degree in Cybersecurity, Computer Science, or related field",
-                    "relatedCareers": [],
-                    "jobPostings": 1650,
-                    "companies": ["IBM", "Cisco", "FireEye", "CrowdStrike", "Palo Alto Networks"],
-                    "createdAt": datetime.utcnow()
-                }
-            ]
-            
-            await self.db.careers.insert_many(sample_careers)
-            logger.info("Initialized careers collection with sample data")
-    
+            with open_catalog(str(SEED_CATALOG_PATH)) as stream:
+                report = await self.ingest_careers(iter_rows(stream, "ndjson"))
+            logger.info(f"Initialized careers collection with sample data: {report['inserted']} careers")
+
     # Career Methods
-    async def get_careers(self, search: str = None, category: str = None, limit: int = 50) -> List[Dict[str, Any]]:
-        """Get careers with optional search and filtering"""
-        query = {}
-        
+    @staticmethod
+    def _range_filter(category: str = None, min_salary: int = None, max_salary: int = None,
+                      min_growth: float = None, max_growth: float = None) -> Dict[str, Any]:
+        """Mongo filter for the numeric catalog fields; salary bounds match careers whose range overlaps"""
+        query: Dict[str, Any] = {}
+        if category:
+            query["category"] = category
+        if min_salary is not None:
+            query["salaryMax"] = {"$gte": min_salary}
+        if max_salary is not None:
+            query["salaryMin"] = {"$lte": max_salary}
+        growth = {}
+        if min_growth is not None:
+            growth["$gte"] = min_growth
+        if max_growth is not None:
+            growth["$lte"] = max_growth
+        if growth:
+            query["growthPercent"] = growth
+        return query
+
+    @staticmethod
+    def _matches_range(career: Dict[str, Any], query: Dict[str, Any]) -> bool:
+        for field, condition in query.items():
+            value = career.get(field)
+            if not isinstance(condition, dict):
+                if value != condition:
+                    return False
+                continue
+            if value is None:
+                return False
+            if "$gte" in condition and value < condition["$gte"]:
+                return False
+            if "$lte" in condition and value > condition["$lte"]:
+                return False
+        return True
+
+    @timed_query
+    async def get_careers(self, search: str = None, category: str = None, limit: int = 50,
+                          min_salary: int = None, max_salary: int = None, min_growth: float = None,
+                          max_growth: float = None, sort: str = None, order: str = "desc") -> List[Dict[str, Any]]:
+        """Get careers with optional search, range filters and sorting"""
+        query = self._range_filter(category, min_salary, max_salary, min_growth, max_growth)
+        sort_field = SORT_FIELDS.get(sort) if sort else None
+        direction = 1 if order == "asc" else -1
+
+        if search and await self._search_index_ready():
+            # Index hits are already in memory, so range filters and sorts apply to them directly; both
+            # need every hit rather than only the top `limit`
+            reorders = sort_field or any(field != "category" for field in query)
+            ranked = self.search_index.search(search, category=category, limit=len(self.search_index) if reorders else limit)
+            careers = [dict(career) for career, _ in ranked if self._matches_range(career, query)]
+            if sort_field:
+                missing = [c for c in careers if c.get(sort_field) is None]
+                careers = sorted((c for c in careers if c.get(sort_field) is not None),
+                                 key=lambda c: c[sort_field], reverse=direction < 0) + missing
+            return await self._with_related_careers(careers[:limit])
+
+        # Regex fallback while the search index is still being built
         if search:
             query["$or"] = [
                 {"title": {"$regex": search, "$options": "i"}},
@@ -134,24 +313,53 @@ class DatabaseService:
                 {"skills": {"$regex": search, "$options": "i"}}
             ]
         
-        if category:
-            query["category"] = category
-        
-        cursor = self.db.careers.find(query).limit(limit)
-        careers = await cursor.to_list(length=limit)
+        cursor = self.catalog_db.careers.find(query)
+        if sort_field:
+            cursor = cursor.sort([(sort_field, direction), ("_id", 1)])
+        careers = await cursor.limit(limit).to_list(length=limit)
         
-        # Convert ObjectId to string and clean up the data
-        for career in careers:
-            career["id"] = str(career.pop("_id"))
-            # Remove any None values and ensure all fields are properly serializable
-            career = {k: v for k, v in career.items() if v is not None}
-        
-        return careers
+        # Convert ObjectId to string and clean up the data, exactly as index hits are
+        return [self._clean_career(career) for career in careers]
+
+    @timed_query
+    async def get_career_facets(self, category: str = None, min_salary: int = None, max_salary: int = None,
+                                min_growth: float = None, max_growth: float = None) -> Dict[str, Any]:
+        """Category and salary-band counts for the filtered catalog, in a single aggregation"""
+        query = self._range_filter(category, min_salary, max_salary, min_growth, max_growth)
+        pipeline = [
+            {"$match": query},
+            {"$facet": {
+                "categories": [
+                    {"$group": {"_id": "$category", "count": {"$sum": 1}}},
+                    {"$sort": {"count": -1, "_id": 1}},
+                ],
+                "salaryBands": [
+                    {"$match": {"salaryMin": {"$ne": None}}},
+                    {"$bucket": {"groupBy": "$salaryMin", "boundaries": SALARY_BANDS, "default": "other", "output": {"count": {"$sum": 1}}}},
+                ],
+                "total": [{"$count": "count"}],
+            }},
+        ]
+        result = (await self.catalog_db.careers.aggregate(pipeline).to_list(length=1))[0]
+        bands = []
+        for bucket in result["salaryBands"]:
+            # The default bucket holds salaries at or above the last boundary: an open-ended top band
+            if bucket["_id"] == "other":
+                bands.append({"min": SALARY_BANDS[-1], "max": None, "count": bucket["count"]})
+                continue
+            i = SALARY_BANDS.index(bucket["_id"])
+            bands.append({"min": SALARY_BANDS[i], "max": SALARY_BANDS[i + 1], "count": bucket["count"]})
+        return {
+            "total": result["total"][0]["count"] if result["total"] else 0,
+            "categories": [{"value": c["_id"], "count": c["count"]} for c in result["categories"]],
+            "salaryBands": bands,
+        }
     
+    @timed_query
     async def get_career_by_id(self, career_id: str) -> Optional[Dict[str, Any]]:
         """Get specific career by ID"""
         try:
-            career = await self.db.careers.find_one({"_id": ObjectId(career_id)})
+            career = await self.catalog_db.careers.find_one({"_id": ObjectId(career_id)})
             if career:
                 career["id"] = str(career.pop("_id"))
                 # Remove any None values and ensure all fields are properly serializable
@@ -161,12 +369,233 @@ class DatabaseService:
             logger.error(f"Error getting career by ID: {str(e)}")
             return None
     
+    @timed_query
+    async def get_careers_by_ids(self, career_ids: List[str], fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Fetch many careers in one $in query; results follow request order with a per-id status.
+        Raises ValueError for fields outside CAREER_PUBLIC_FIELDS."""
+        check_career_fields(fields)
+        object_ids = {}
+        for career_id in career_ids:
+            if career_id not in object_ids and ObjectId.is_valid(career_id):
+                object_ids[career_id] = ObjectId(career_id)
+        projection = ({field: 1 for field in fields if field != "id"} or {"_id": 1}) if fields else None
+        found = {}
+        if object_ids:
+            cursor = self.catalog_db.careers.find({"_id": {"$in": list(object_ids.values())}}, projection)
+            async for career in cursor:
+                career = self._clean_career(career)
+                found[career["id"]] = career
+        results = []
+        for career_id in career_ids:
+            if career_id in found:
+                results.append({"id": career_id, "found": True, "career": found[career_id]})
+            else:
+                error = "not_found" if career_id in object_ids else "invalid_id"
+                results.append({"id": career_id, "found": False, "error": error})
+        return results
+
+    @timed_query
     async def get_career_categories(self) -> List[str]:
         """Get distinct career categories"""
-        categories = await self.db.careers.distinct("category")
+        categories = await self.catalog_db.careers.distinct("category")
         return categories
+
+    @timed_query
+    async def ingest_careers(self, rows, batch_size: int = DEFAULT_BATCH_SIZE, refresh_related: bool = True) -> Dict[str, Any]:
+        """Stream catalog rows into the careers collection via batched bulk upserts"""
+        report = await CatalogIngestor(self.db, batch_size=batch_size).ingest(rows)
+        result = report.to_dict()
+        if report.changed_ids:
+            await self.bump_catalog_version()
+            if refresh_related:
+                self.schedule_related_refresh(set(report.changed_ids))
+                result["relatedRefresh"] = "scheduled"
+        return result
+
+    # Search Index
+    async def _search_index_ready(self) -> bool:
+        if not len(self.search_index):
+            if not self._search_lock.locked():
+                asyncio.get_running_loop().create_task(self.sync_search_index())
+            return False
+        # A new catalog version (or a due reconcile) syncs in the background; requests keep using the
+        # current index until the sync swaps in its changes
+        version = await self.get_catalog_version()
+        stale = self.search_index.version != version["version"]
+        if (stale or time.monotonic() - self._search_reconciled_at > self.search_reconcile_interval) and not self._search_lock.locked():
+            asyncio.get_running_loop().create_task(self.sync_search_index())
+        return True
+
+    async def _with_related_careers(self, careers: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Index hits lack relatedCareers (see sync_search_index); add them so search results have the
+        same shape as catalog reads"""
+        if not careers:
+            return careers
+        ids = [ObjectId(career["id"]) for career in careers]
+        related = {}
+        async for doc in self.catalog_db.careers.find({"_id": {"$in": ids}}, {"relatedCareers": 1}):
+            if doc.get("relatedCareers") is not None:
+                related[str(doc["_id"])] = doc["relatedCareers"]
+        for career in careers:
+            if career["id"] in related:
+                career["relatedCareers"] = related[career["id"]]
+        return careers
+
+    async def sync_search_index(self) -> None:
+        """Build the search index, or reconcile it with the catalog: re-index careers whose content
+        fingerprint changed and drop careers that no longer exist"""
+        async with self._search_lock:
+            version = await self.get_catalog_version()
+            reconcile_due = time.monotonic() - self._search_reconciled_at > self.search_reconcile_interval
+            if len(self.search_index) and self.search_index.version == version["version"] and not reconcile_due:
+                return
+            # relatedCareers is rewritten by the related-careers refresh without a content change, so
+            # index hits never carry it
+            if not len(self.search_index):
+                careers = await self.catalog_db.careers.find({}, SEARCH_PROJECTION).to_list(length=None)
+                docs = [self._clean_career(career) for career in careers]
+                # Build off the event loop into a fresh index, then swap it in
+                index = CareerSearchIndex()
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(None, index.rebuild, docs, version["version"])
+                self.search_index = index
+                self._search_fingerprints = {doc["id"]: self._fingerprint(doc) for doc in docs}
+                logger.info(f"Search index built: {len(index)} careers")
+            else:
+                current = {}
+                async for career in self.catalog_db.careers.find({}, {"contentHash": 1, "updatedAt": 1}):
+                    current[str(career["_id"])] = self._fingerprint(career)
+                changed = [cid for cid, fingerprint in current.items() if self._search_fingerprints.get(cid) != fingerprint]
+                removed = [cid for cid in self._search_fingerprints if cid not in current]
+                for start in range(0, len(changed), SEARCH_SYNC_BATCH):
+                    ids = [ObjectId(cid) for cid in changed[start:start + SEARCH_SYNC_BATCH]]
+                    async for career in self.catalog_db.careers.find({"_id": {"$in": ids}}, SEARCH_PROJECTION):
+                        self.search_index.add(self._clean_career(career))
+                for cid in removed:
+                    self.search_index.remove(cid)
+                self.search_index.version = version["version"]
+                self._search_fingerprints = current
+                logger.info(f"Search index reconciled: {len(changed)} changed, {len(removed)} removed")
+            self._search_reconciled_at = time.monotonic()
+
+    @staticmethod
+    def _fingerprint(career: Dict[str, Any]) -> Any:
+        return career.get("contentHash"), career.get("updatedAt")
+
+    async def suggest_careers(self, query: str, category: Optional[str] = None, limit: int = 8) -> List[Dict[str, Any]]:
+        """Lightweight ranked matches for search-as-you-type (empty until the index is built)"""
+        if not await self._search_index_ready():
+            return []
+        return [
+            {"id": career["id"], "title": career.get("title"), "category": career.get("category"), "score": score}
+            for career, score in self.search_index.search(query, category=category, limit=limit)
+        ]
+
+    @staticmethod
+    def _clean_career(career: Dict[str, Any]) -> Dict[str, Any]:
+        career["id"] = str(career.pop("_id"))
+        return {k: v for k, v in career.items() if v is not None}
+
+    # Catalog Version
+    async def get_catalog_version(self) -> Dict[str, Any]:
+        """Current catalog version and modification time, cached for catalog_version_ttl seconds"""
+        now = time.monotonic()
+        if self._catalog_version is None or now - self._catalog_version_read_at > self.catalog_version_ttl:
+            doc = await self.catalog_db.catalog_meta.find_one({"_id": "careers"})
+            self._catalog_version = {
+                "version": doc.get("version", 0) if doc else 0,
+                "updatedAt": doc.get("updatedAt") if doc else None,
+            }
+            self._catalog_version_read_at = now
+        return self._catalog_version
+
+    async def bump_catalog_version(self) -> None:
+        """Signal that catalog content changed (invalidates ETags across workers)"""
+        await self.db.catalog_meta.update_one(
+            {"_id": "careers"},
+            {"$inc": {"version": 1}, "$set": {"updatedAt": datetime.utcnow()}},
+            upsert=True
+        )
+        self._catalog_version = None
+
+    # Related Careers
+    @timed_query
+    async def get_related_careers(self, career_id: str) -> Optional[List[Dict[str, Any]]]:
+        """Get precomputed related careers; a single primary-key read"""
+        doc = await self.catalog_db.career_neighbors.find_one({"_id": career_id})
+        return doc["neighbors"] if doc else None
+
+    def schedule_related_refresh(self, changed_ids: Optional[Set[str]] = None) -> None:
+        """Refresh related careers in the background; None asks for a full rebuild"""
+        if changed_ids is None:
+            self._related_full = True
+        else:
+            self._related_changed.update(changed_ids)
+        if self._related_task is None or self._related_task.done():
+            self._related_task = asyncio.get_running_loop().create_task(self._run_related_refresh())
+
+    async def _run_related_refresh(self) -> None:
+        while self._related_full or self._related_changed:
+            changed_ids = None if self._related_full else self._related_changed
+            self._related_full, self._related_changed = False, set()
+            try:
+                await self.refresh_related_careers(changed_ids=changed_ids)
+            except Exception as e:
+                # Keep the ids for the next scheduled refresh rather than retrying in a loop
+                logger.error(f"Related careers refresh failed: {str(e)}")
+                if changed_ids is None:
+                    self._related_full = True
+                else:
+                    self._related_changed.update(changed_ids)
+                return
+
+    async def wait_related_refresh(self) -> None:
+        """Wait for a scheduled related-careers refresh to finish"""
+        if self._related_task is not None:
+            await self._related_task
+
+    @timed_query
+    async def refresh_related_careers(self, changed_ids: Optional[Set[str]] = None, top_n: int = DEFAULT_TOP_N) -> Dict[str, int]:
+        """Recompute the related-careers index; incremental when changed_ids is given"""
+        projection = {"title": 1, "category": 1, "description": 1, "skills": 1, "skillIds": 1}
+        careers = await self.db.careers.find({}, projection).to_list(length=None)
+        for career in careers:
+            career["id"] = str(career.pop("_id"))
+        existing = {}
+        async for doc in self.db.career_neighbors.find({}, {"neighbors": 1}):
+            existing[doc["_id"]] = doc.get("neighbors", [])
+
+        # Similarity scoring is CPU-bound; keep it off the event loop
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(None, compute_neighbor_updates, careers, existing, changed_ids, top_n)
+
+        now = datetime.utcnow()
+        neighbor_ops = []
+        career_ops = []
+        for career_id, neighbors in result["upserts"].items():
+            neighbor_ops.append(UpdateOne(
+                {"_id": career_id},
+                {"$set": {"neighbors": neighbors, "updatedAt": now}},
+                upsert=True
+            ))
+            career_ops.append(UpdateOne(
+                {"_id": ObjectId(career_id)},
+                {"$set": {"relatedCareers": [n["id"] for n in neighbors]}}
+            ))
+        neighbor_ops.extend(DeleteOne({"_id": career_id}) for career_id in result["deletes"])
+
+        if neighbor_ops:
+            await self.db.career_neighbors.bulk_write(neighbor_ops, ordered=False)
+        if career_ops:
+            await self.db.careers.bulk_write(career_ops, ordered=False)
+        if neighbor_ops:
+            await self.bump_catalog_version()
+        stats = {"updated": len(result["upserts"]), "deleted": len(result["deletes"]), "careers": len(careers)}
+        logger.info(f"Related careers index refreshed: {stats}")
+        return stats
     
     # User Methods
+    @timed_query
     async def create_user(self, user_data: Dict[str, Any]) -> str:
         """Create new user"""
         user_data["createdAt"] = datetime.utcnow()
@@ -175,17 +604,19 @@ class DatabaseService:
         result = await self.db.users.insert_one(user_data)
         return str(result.inserted_id)
     
+    @timed_query
     async def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
-        """Get user by email"""
-        user = await self.db.users.find_one({"email": email})
+        """Get user by email, including this worker's unflushed updates"""
+        user = await self.user_writes.read(self.db.users.find_one({"email": email}))
         if user:
             user["id"] = str(user["_id"])
         return user
     
+    @timed_query
     async def get_user_by_id(self, user_id: str) -> Optional[Dict[str, Any]]:
-        """Get user by ID"""
+        """Get user by ID, including this worker's unflushed updates"""
         try:
-            user = await self.db.users.find_one({"_id": ObjectId(user_id)})
+            user = await self.user_writes.read(self.db.users.find_one({"_id": ObjectId(user_id)}))
             if user:
                 user["id"] = str(user["_id"])
             return user
@@ -193,57 +624,43 @@ class DatabaseService:
             logger.error(f"Error getting user by ID: {str(e)}")
             return None
     
+    # Updates below are buffered: True means accepted, and the write reaches Mongo on the next flush
+    @timed_query
     async def update_user(self, user_id: str, update_data: Dict[str, Any]) -> bool:
         """Update user data"""
         try:
-            update_data["updatedAt"] = datetime.utcnow()
-            result = await self.db.users.update_one(
-                {"_id": ObjectId(user_id)},
-                {"$set": update_data}
-            )
-            return result.modified_count > 0
+            return await self.user_writes.set_fields(user_id, update_data)
         except Exception as e:
             logger.error(f"Error updating user: {str(e)}")
             return False
     
+    @timed_query
     async def save_career_identity(self, user_id: str, identity_statement: str) -> bool:
         """Save career identity statement for user"""
         try:
             identity_data = {
                 "careerIdentity.statement": identity_statement,
                 "careerIdentity.generatedAt": datetime.utcnow(),
-                "updatedAt": datetime.utcnow()
             }
-            
-            result = await self.db.users.update_one(
-                {"_id": ObjectId(user_id)},
-                {"$set": identity_data}
-            )
-            return result.modified_count > 0
+            return await self.user_writes.set_fields(user_id, identity_data)
         except Exception as e:
             logger.error(f"Error saving career identity: {str(e)}")
             return False
     
+    @timed_query
     async def save_user_career(self, user_id: str, career_id: str) -> bool:
         """Save career to user's favorites"""
         try:
-            result = await self.db.users.update_one(
-                {"_id": ObjectId(user_id)},
-                {"$addToSet": {"savedCareers": career_id}}
-            )
-            return result.modified_count > 0
+            return await self.user_writes.add_to_set(user_id, "savedCareers", career_id)
         except Exception as e:
             logger.error(f"Error saving user career: {str(e)}")
             return False
     
+    @timed_query
     async def remove_user_career(self, user_id: str, career_id: str) -> bool:
         """Remove career from user's favorites"""
         try:
-            result = await self.db.users.update_one(
-                {"_id": ObjectId(user_id)},
-                {"$pull": {"savedCareers": career_id}}
-            )
-            return result.modified_count > 0
+            return await self.user_writes.pull(user_id, "savedCareers", career_id)
         except Exception as e:
             logger.error(f"Error removing user career: {str(e)}")
             return False
\ No newline at end of file
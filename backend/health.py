@@ -0,0 +1,31 @@
+import time
+from typing import Dict, Any, Optional, Iterable
+
+STARTING = "starting"
+OK = "ok"
+ERROR = "error"
+
+
+class Readiness:
+    """Tracks startup/dependency state for the liveness and readiness probes"""
+
+    def __init__(self, required: Iterable[str]):
+        self.started_at = time.time()
+        self.required = set(required)
+        self.components: Dict[str, Dict[str, Any]] = {name: {"status": STARTING} for name in self.required}
+
+    def mark(self, component: str, status: str, detail: Optional[str] = None) -> None:
+        entry = {"status": status, "since": round(time.time(), 3)}
+        if detail:
+            entry["detail"] = detail
+        self.components[component] = entry
+
+    def is_ready(self) -> bool:
+        return all(self.components.get(name, {}).get("status") == OK for name in self.required)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "ready": self.is_ready(),
+            "uptimeSeconds": round(time.time() - self.started_at, 3),
+            "components": self.components,
+        }
@@ -0,0 +1,149 @@
+import hashlib
+import logging
+from typing import List, Dict, Any, Tuple, Optional, Callable, Awaitable
+
+from shared_cache import cache_key
+from jd_similarity import canonicalize_jd
+
+logger = logging.getLogger(__name__)
+
+# Session entries are pruned to the bullets of the latest request, so this only bounds pathological input
+MAX_SESSION_BULLETS = 500
+
+
+def _normalize_bullet(text: str) -> str:
+    return " ".join((text or "").split()).lower()
+
+
+def bullet_hash(job: Dict[str, Any], bullet: str) -> str:
+    """Identity of a bullet within its job; whitespace and case edits do not count as changes"""
+    raw = f"{_normalize_bullet(job.get('company', ''))}|{_normalize_bullet(job.get('role', ''))}|{_normalize_bullet(bullet)}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:20]
+
+
+class IncrementalOptimizer:
+    """Re-optimizes structured resumes bullet by bullet. Edits from earlier requests in the same
+    session are stored per target-JD fingerprint; only new or changed bullets go to the LLM and
+    the rest are merged back in from the session."""
+
+    def __init__(self, ai_service, store):
+        self.ai_service = ai_service
+        self.store = store
+
+    def jd_fingerprint(self, job_info: Dict[str, Any]) -> str:
+        jd_index = self.ai_service.jd_index
+        if jd_index is not None:
+            return jd_index.resolve(job_info.get("jobDescription", ""), job_info.get("jobTitle", ""), job_info.get("company", "")).key
+        return cache_key(job_info.get("jobTitle", ""), job_info.get("company", ""), canonicalize_jd(job_info.get("jobDescription", "")))
+
+    async def optimize(
+        self,
+        job_info: Dict[str, Any],
+        session_id: str,
+        on_partial: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+    ) -> Tuple[Dict[str, Any], int]:
+        """Optimization result for job_info plus the number of bullets served from the session.
+        on_partial receives the reused edits before the LLM is called for the rest."""
+        jobs: List[Dict[str, Any]] = job_info.get("jobs") or []
+        session_key = cache_key("optimize-session", session_id, self.jd_fingerprint(job_info))
+        session = await self.store.get(session_key) or {}
+        known: Dict[str, Dict[str, Any]] = session.get("bullets", {})
+
+        hashes: List[List[str]] = []
+        pending_jobs = []
+        pending_count = 0
+        for job in jobs:
+            job_hashes = [bullet_hash(job, b) for b in job.get("bullets") or []]
+            hashes.append(job_hashes)
+            pending = [b for b, h in zip(job.get("bullets") or [], job_hashes) if h not in known]
+            pending_count += len(pending)
+            # Keep every job (possibly with no bullets) so jobIndex in the reply lines up with ours
+            pending_jobs.append({**job, "bullets": pending})
+
+        fresh: Dict[str, Dict[str, Any]] = {}
+        result: Dict[str, Any] = {}
+        if on_partial is not None and 0 < pending_count < sum(map(len, hashes)):
+            await on_partial({"jobEdits": self._merge(jobs, hashes, known, {})[0], "pendingBullets": pending_count})
+        # The guide and tips also draw on the non-job sections, so a change there recomputes them
+        context = cache_key("context", _normalize_bullet(job_info.get("resumeContext") or ""))
+        if pending_count or not session.get("guide") or session.get("context", context) != context:
+            try:
+                result = await self.ai_service.optimize_resume({**job_info, "jobs": pending_jobs}, use_fallback=False)
+            except Exception as e:
+                # Serve the generic guide this once but keep it out of the session, so the next
+                # request asks the LLM again
+                logger.warning(f"Incremental optimize fell back to the generic guide: {str(e)}")
+                fallback = self.ai_service._fallback_resume_optimization(job_info)
+                job_edits, reused = self._merge(jobs, hashes, known, {})
+                return {**fallback, "jobEdits": job_edits,
+                        "bulletEdits": [edit for job in job_edits for edit in job["bulletEdits"]]}, reused
+            fresh = self._index_edits(result.get("jobEdits", []), pending_jobs)
+
+        job_edits, reused = self._merge(jobs, hashes, known, fresh)
+
+        guide = result.get("optimizedGuide") or session.get("guide", "")
+        pro_tips = result.get("proTips") or session.get("proTips", [])
+        suggestions = result.get("suggestions") or session.get("suggestions", [])
+        current = {h for job_hashes in hashes for h in job_hashes}
+        bullets = {h: e for h, e in {**known, **fresh}.items() if h in current}
+        if len(bullets) <= MAX_SESSION_BULLETS:
+            await self.store.set(session_key, {"bullets": bullets, "guide": guide, "proTips": pro_tips, "suggestions": suggestions,
+                                              "context": context})
+
+        merged = {
+            "optimizedGuide": guide,
+            "optimizedContent": guide,
+            "suggestions": suggestions,
+            "jobEdits": job_edits,
+            "bulletEdits": [edit for job in job_edits for edit in job["bulletEdits"]],
+            "proTips": pro_tips,
+        }
+        logger.info(f"Incremental optimize: {reused} bullets reused, {pending_count} sent to the LLM")
+        return merged, reused
+
+    def _merge(self, jobs, hashes, known, fresh) -> Tuple[List[Dict[str, Any]], int]:
+        """Per-job bullet edits in the order of the request, plus how many came from the session"""
+        reused = 0
+        job_edits = []
+        for job_index, job in enumerate(jobs):
+            bullet_edits = []
+            for bullet, h in zip(job.get("bullets") or [], hashes[job_index]):
+                edit = known.get(h)
+                if edit is not None:
+                    reused += 1
+                else:
+                    edit = fresh.get(h)
+                if edit is not None:
+                    # The stored edit may predate a whitespace-only change; echo what was sent
+                    bullet_edits.append({**edit, "original": bullet})
+            job_edits.append({
+                "jobIndex": job_index,
+                "jobInfo": {"company": job.get("company", ""), "role": job.get("role", ""), "period": job.get("period")},
+                "bulletEdits": bullet_edits,
+            })
+        return job_edits, reused
+
+    def _index_edits(self, job_edits: List[Dict[str, Any]], pending_jobs: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Map the LLM's bullet edits back to bullet hashes: by original text, else by position"""
+        fresh: Dict[str, Dict[str, Any]] = {}
+        for job_edit in job_edits:
+            try:
+                job_index = int(job_edit.get("jobIndex", -1))
+            except (TypeError, ValueError):
+                continue
+            if not 0 <= job_index < len(pending_jobs):
+                continue
+            job = pending_jobs[job_index]
+            by_text = {_normalize_bullet(b): b for b in job["bullets"]}
+            unmatched = list(job["bullets"])
+            positional = []
+            for edit in job_edit.get("bulletEdits", []):
+                bullet = by_text.get(_normalize_bullet(edit.get("original", "")))
+                if bullet is not None and bullet in unmatched:
+                    unmatched.remove(bullet)
+                    fresh[bullet_hash(job, bullet)] = edit
+                else:
+                    positional.append(edit)
+            for bullet, edit in zip(unmatched, positional):
+                fresh[bullet_hash(job, bullet)] = edit
+        return fresh
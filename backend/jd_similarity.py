@@ -0,0 +1,150 @@
+import os
+import re
+import hashlib
+import logging
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
+
+from resume_analyzer import tokenize
+from metrics import Counters
+
+logger = logging.getLogger(__name__)
+
+JD_SIMILARITY_THRESHOLD = float(os.environ.get("JD_SIMILARITY_THRESHOLD", "0.85"))
+JD_SIMILARITY_MAX_ENTRIES = int(os.environ.get("JD_SIMILARITY_MAX_ENTRIES", "5000"))
+NUM_PERMUTATIONS = 128
+# 16 bands x 8 rows: pairs above ~0.7 Jaccard almost always share a band; candidates are then verified
+LSH_BANDS = 16
+SHINGLE_SIZE = 5
+# Below this many shingles a changed line is a large fraction of the posting; only exact matches count
+MIN_SHINGLES = 20
+
+URL_RE = re.compile(r"https?://\S+|www\.\S+", re.IGNORECASE)
+EMAIL_RE = re.compile(r"\S+@\S+\.\w+")
+# Job-board chrome that varies between copies of the same posting
+BOILERPLATE_RE = re.compile(
+    r"^\s*(apply (now|here|today)|posted \d+ \w+ ago|job (id|ref|reference)|req(uisition)? (id|#)|share this job|"
+    r"\d+ applicants|easy apply|report this job|save job)\b.*$",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+
+def canonicalize_jd(text: str) -> str:
+    """Job description with tracking links, job-board boilerplate and whitespace noise removed"""
+    text = URL_RE.sub(" ", text or "")
+    text = BOILERPLATE_RE.sub(" ", text)
+    lines = [" ".join(line.split()) for line in text.splitlines()]
+    return "\n".join(line for line in lines if line)
+
+
+def _normalize_name(value: str) -> str:
+    return " ".join(tokenize(value or ""))
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> List[str]:
+    tokens = tokenize(EMAIL_RE.sub(" ", text))
+    if len(tokens) < size:
+        return [" ".join(tokens)] if tokens else []
+    return [" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)]
+
+
+class MinHasher:
+    """MinHash signatures from multiply-shift hashes of 32-bit shingle hashes"""
+
+    def __init__(self, num_permutations: int = NUM_PERMUTATIONS, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        self.a = (rng.randint(0, 2 ** 32, size=num_permutations, dtype=np.uint64) << np.uint64(32)) | rng.randint(
+            0, 2 ** 32, size=num_permutations, dtype=np.uint64) | np.uint64(1)
+        self.b = rng.randint(0, 2 ** 32, size=num_permutations, dtype=np.uint64)
+
+    def signature(self, items: List[str]) -> np.ndarray:
+        hashes = np.fromiter(
+            (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little") for s in set(items)),
+            dtype=np.uint64,
+        )
+        # (a * x + b) mod 2^64, top 32 bits; uint64 overflow is the intended modular arithmetic
+        with np.errstate(over="ignore"):
+            permuted = (np.outer(self.a, hashes) + self.b[:, None]) >> np.uint64(32)
+        return permuted.min(axis=1).astype(np.uint32)
+
+
+@dataclass
+class JDMatch:
+    key: str
+    text: str
+    similarity: float
+    exact: bool
+
+
+class JDSimilarityIndex:
+    """Maps job descriptions to a representative copy, so near-duplicate postings (same title and
+    company, differing in whitespace, tracking text or a line or two) share JD-level artifacts
+    such as extracted keywords. In-process and bounded; the least recently matched entries are evicted."""
+
+    def __init__(self, threshold: float = JD_SIMILARITY_THRESHOLD, max_entries: int = JD_SIMILARITY_MAX_ENTRIES):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.hasher = MinHasher()
+        self.rows = NUM_PERMUTATIONS // LSH_BANDS
+        # key -> (text, guard, signature)
+        self.entries: "OrderedDict[str, Tuple[str, Tuple[str, str], Optional[np.ndarray]]]" = OrderedDict()
+        self.buckets: Dict[Tuple[int, bytes], set] = defaultdict(set)
+        self.counters = Counters()
+
+    def _bands(self, signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        return [(i, signature[i * self.rows:(i + 1) * self.rows].tobytes()) for i in range(LSH_BANDS)]
+
+    def resolve(self, job_description: str, job_title: str = "", company: str = "") -> JDMatch:
+        """Representative JD for this posting, registering it as new if nothing similar is known"""
+        text = canonicalize_jd(job_description)
+        guard = (_normalize_name(job_title), _normalize_name(company))
+        key = hashlib.sha256(f"{guard}|{text}".encode("utf-8")).hexdigest()
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.counters.incr("exact")
+            return JDMatch(key, text, 1.0, True)
+
+        items = shingles(text)
+        signature = self.hasher.signature(items) if len(items) >= MIN_SHINGLES else None
+        if signature is not None:
+            best_key, best_similarity = None, 0.0
+            candidates = set()
+            for band in self._bands(signature):
+                candidates |= self.buckets.get(band, set())
+            for candidate in candidates:
+                _, candidate_guard, candidate_signature = self.entries[candidate]
+                # Same posting text at a different company or for a different title is a different job
+                if candidate_guard != guard:
+                    continue
+                similarity = float(np.mean(candidate_signature == signature))
+                if similarity > best_similarity:
+                    best_key, best_similarity = candidate, similarity
+            if best_key is not None and best_similarity >= self.threshold:
+                self.entries.move_to_end(best_key)
+                self.counters.incr("near")
+                return JDMatch(best_key, self.entries[best_key][0], round(best_similarity, 3), False)
+
+        self._add(key, text, guard, signature)
+        self.counters.incr("new")
+        return JDMatch(key, text, 1.0, True)
+
+    def _add(self, key: str, text: str, guard: Tuple[str, str], signature: Optional[np.ndarray]) -> None:
+        self.entries[key] = (text, guard, signature)
+        if signature is not None:
+            for band in self._bands(signature):
+                self.buckets[band].add(key)
+        while len(self.entries) > self.max_entries:
+            old_key, (_, _, old_signature) = self.entries.popitem(last=False)
+            if old_signature is not None:
+                for band in self._bands(old_signature):
+                    bucket = self.buckets.get(band)
+                    if bucket is not None:
+                        bucket.discard(old_key)
+                        if not bucket:
+                            del self.buckets[band]
+
+    def stats(self) -> Dict[str, object]:
+        return {"entries": len(self.entries), "threshold": self.threshold, "counters": self.counters.snapshot()}
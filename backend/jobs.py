@@ -0,0 +1,288 @@
+import os
+import uuid
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, Callable, Awaitable
+
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+TERMINAL_STATES = (SUCCEEDED, FAILED)
+
+JOB_TTL_SECONDS = int(os.environ.get("JOB_TTL_SECONDS", "86400"))
+JOB_LEASE_SECONDS = int(os.environ.get("JOB_LEASE_SECONDS", "120"))
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", "3"))
+JOB_POLL_INTERVAL = float(os.environ.get("JOB_POLL_INTERVAL", "1.0"))
+
+Handler = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+def public_job(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Client-facing view of a job document"""
+    return {
+        "id": doc["_id"],
+        "type": doc["type"],
+        "status": doc["status"],
+        "result": doc.get("result"),
+        "error": doc.get("error"),
+        "attempts": doc.get("attempts", 0),
+        "createdAt": doc.get("createdAt"),
+        "updatedAt": doc.get("updatedAt"),
+    }
+
+
+class MongoJobStore:
+    """Jobs persisted in the ai_jobs collection; expired jobs are removed by a TTL index"""
+
+    def __init__(self, db_service):
+        # The client is opened at startup, so resolve the collection lazily
+        self.db_service = db_service
+
+    @property
+    def collection(self):
+        return self.db_service.db.ai_jobs
+
+    async def ensure_indexes(self) -> None:
+        await self.collection.create_index([("status", 1), ("createdAt", 1)])
+        await self.collection.create_index("expiresAt", expireAfterSeconds=0)
+
+    async def create(self, doc: Dict[str, Any]) -> None:
+        await self.collection.insert_one(doc)
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"_id": job_id})
+
+    async def claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """Atomically take the oldest queued job, or a running job whose worker stopped renewing its lease"""
+        now = datetime.utcnow()
+        return await self.collection.find_one_and_update(
+            {"$or": [{"status": QUEUED}, {"status": RUNNING, "leaseUntil": {"$lt": now}}]},
+            {
+                "$set": {"status": RUNNING, "workerId": worker_id, "leaseUntil": now + timedelta(seconds=JOB_LEASE_SECONDS), "updatedAt": now},
+                "$inc": {"attempts": 1},
+            },
+            sort=[("createdAt", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def renew(self, job_id: str, worker_id: str) -> None:
+        await self.collection.update_one(
+            {"_id": job_id, "workerId": worker_id, "status": RUNNING},
+            {"$set": {"leaseUntil": datetime.utcnow() + timedelta(seconds=JOB_LEASE_SECONDS)}},
+        )
+
+    async def finish(self, job_id: str, worker_id: str, update: Dict[str, Any]) -> None:
+        await self.collection.update_one({"_id": job_id, "workerId": worker_id}, {"$set": update})
+
+
+class InMemoryJobStore:
+    """Local stand-in for single-process/dev use (JOB_STORE=memory). Jobs do not survive restarts."""
+
+    def __init__(self):
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+
+    async def ensure_indexes(self) -> None:
+        pass
+
+    def _expire(self) -> None:
+        now = datetime.utcnow()
+        for job_id in [k for k, v in self.jobs.items() if v["expiresAt"] < now]:
+            del self.jobs[job_id]
+
+    async def create(self, doc: Dict[str, Any]) -> None:
+        self._expire()
+        self.jobs[doc["_id"]] = dict(doc)
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        doc = self.jobs.get(job_id)
+        return dict(doc) if doc else None
+
+    async def claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        now = datetime.utcnow()
+        candidates = [
+            doc for doc in self.jobs.values()
+            if doc["status"] == QUEUED or (doc["status"] == RUNNING and doc.get("leaseUntil") and doc["leaseUntil"] < now)
+        ]
+        if not candidates:
+            return None
+        doc = min(candidates, key=lambda d: d["createdAt"])
+        doc.update(status=RUNNING, workerId=worker_id, leaseUntil=now + timedelta(seconds=JOB_LEASE_SECONDS), updatedAt=now)
+        doc["attempts"] = doc.get("attempts", 0) + 1
+        return dict(doc)
+
+    async def renew(self, job_id: str, worker_id: str) -> None:
+        doc = self.jobs.get(job_id)
+        if doc and doc.get("workerId") == worker_id and doc["status"] == RUNNING:
+            doc["leaseUntil"] = datetime.utcnow() + timedelta(seconds=JOB_LEASE_SECONDS)
+
+    async def finish(self, job_id: str, worker_id: str, update: Dict[str, Any]) -> None:
+        doc = self.jobs.get(job_id)
+        if doc and doc.get("workerId") == worker_id:
+            doc.update(update)
+
+
+class JobQueue:
+    """Bounded pool of workers running registered AI tasks from a persistent job store.
+
+    Jobs are leased rather than locked: a worker renews its lease while it runs a job, and if the
+    process dies the lease lapses and another worker (or this one after restart) picks it up again,
+    up to JOB_MAX_ATTEMPTS times.
+    """
+
+    def __init__(self, store, workers: int = 4):
+        self.store = store
+        self.workers = workers
+        self.handlers: Dict[str, Handler] = {}
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._wakeup = asyncio.Event()
+        self._tasks = []
+        self._adopted = set()
+        self._indexed = False
+        # Notified whenever this process finishes a job; stream readers re-check the store on wakeup
+        self._finished = asyncio.Condition()
+
+    def register(self, job_type: str, handler: Handler) -> None:
+        self.handlers[job_type] = handler
+
+    async def submit(self, job_type: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        if job_type not in self.handlers:
+            raise ValueError(f"Unknown job type: {job_type}")
+        now = datetime.utcnow()
+        doc = {
+            "_id": uuid.uuid4().hex,
+            "type": job_type,
+            "payload": payload,
+            "status": QUEUED,
+            "attempts": 0,
+            "createdAt": now,
+            "updatedAt": now,
+            "expiresAt": now + timedelta(seconds=JOB_TTL_SECONDS),
+        }
+        await self.store.create(doc)
+        self._wakeup.set()
+        return doc
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await self.store.get(job_id)
+
+    async def adopt(self, job_type: str, payload: Dict[str, Any], task: "asyncio.Future") -> Dict[str, Any]:
+        """Record work already running in this process as a leased job, so its result can be fetched
+        or streamed later. If this process dies first, the lease lapses and a worker reruns the payload."""
+        now = datetime.utcnow()
+        doc = {
+            "_id": uuid.uuid4().hex,
+            "type": job_type,
+            "payload": payload,
+            "status": RUNNING,
+            "attempts": 1,
+            "workerId": self.worker_id,
+            "leaseUntil": now + timedelta(seconds=JOB_LEASE_SECONDS),
+            "createdAt": now,
+            "updatedAt": now,
+            "expiresAt": now + timedelta(seconds=JOB_TTL_SECONDS),
+        }
+        await self.store.create(doc)
+        follower = asyncio.create_task(self._follow(doc, task))
+        self._adopted.add(follower)
+        follower.add_done_callback(self._adopted.discard)
+        return doc
+
+    async def wait_for_change(self, timeout: float) -> None:
+        """Wait until this process finishes some job or the timeout passes (jobs run elsewhere are polled)"""
+        async with self._finished:
+            try:
+                await asyncio.wait_for(self._finished.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> None:
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+
+    async def stop(self) -> None:
+        tasks = self._tasks + list(self._adopted)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self, index: int) -> None:
+        delay = JOB_POLL_INTERVAL
+        while True:
+            try:
+                if not self._indexed:
+                    await self.store.ensure_indexes()
+                    self._indexed = True
+                self._wakeup.clear()
+                job = await self.store.claim(self.worker_id)
+                delay = JOB_POLL_INTERVAL
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Job worker {index} could not claim a job: {str(e)}")
+                job = None
+                delay = min(delay * 2, 30.0)
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self._run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # A job (or the store) misbehaving must not cost the pool a worker
+                logger.error(f"Job worker {index} failed handling job {job.get('_id')}: {str(e)}")
+
+    async def _run(self, job: Dict[str, Any]) -> None:
+        if job.get("attempts", 0) > JOB_MAX_ATTEMPTS:
+            await self._finish(job["_id"], {"status": FAILED, "error": "Job exceeded maximum attempts"})
+            return
+        if job.get("type") not in self.handlers:
+            # Stale or foreign job type (e.g. submitted by a newer deploy); retrying cannot help
+            await self._finish(job["_id"], {"status": FAILED, "error": f"Unknown job type: {job.get('type')}"})
+            return
+        await self._follow(job, self.handlers[job["type"]](job["payload"]))
+
+    async def _follow(self, job: Dict[str, Any], work: Awaitable[Dict[str, Any]]) -> None:
+        """Await a job's work while renewing its lease, then record the outcome"""
+        job_id = job["_id"]
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        try:
+            result = await work
+            await self._finish(job_id, {"status": SUCCEEDED, "result": result})
+        except asyncio.CancelledError:
+            # Shutting down: leave the job leased; it is reclaimed once the lease lapses
+            raise
+        except Exception as e:
+            logger.error(f"Job {job_id} ({job['type']}) failed: {str(e)}")
+            try:
+                await self._finish(job_id, {"status": FAILED, "error": str(e)})
+            except Exception as finish_error:
+                # The lease lapses and the job is retried (up to JOB_MAX_ATTEMPTS)
+                logger.error(f"Could not record failure of job {job_id}: {str(finish_error)}")
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat(self, job_id: str) -> None:
+        while True:
+            await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+            try:
+                await self.store.renew(job_id, self.worker_id)
+            except Exception as e:
+                logger.warning(f"Failed to renew lease for job {job_id}: {str(e)}")
+
+    async def _finish(self, job_id: str, update: Dict[str, Any]) -> None:
+        now = datetime.utcnow()
+        update.update(updatedAt=now, expiresAt=now + timedelta(seconds=JOB_TTL_SECONDS), leaseUntil=None)
+        await self.store.finish(job_id, self.worker_id, update)
+        async with self._finished:
+            self._finished.notify_all()
@@ -0,0 +1,126 @@
+import os
+import sys
+import time
+import asyncio
+import logging
+import threading
+import traceback
+from collections import deque
+from datetime import datetime
+from typing import Dict, Any, Optional, Iterable
+
+from metrics import LatencyWindow, Counters
+
+logger = logging.getLogger(__name__)
+
+LOOP_LAG_INTERVAL = float(os.environ.get("LOOP_LAG_INTERVAL", "0.1"))
+# A loop blocked this long gets its stack sampled and logged
+LOOP_STALL_THRESHOLD = float(os.environ.get("LOOP_STALL_THRESHOLD", "0.25"))
+# Low-priority routes are shed while smoothed lag is above this
+LOOP_LAG_BUDGET = float(os.environ.get("LOOP_LAG_BUDGET", "0.2"))
+LOW_PRIORITY_ROUTES = [
+    p.strip() for p in os.environ.get("LOW_PRIORITY_ROUTES", "/api/careers/recommend").split(",") if p.strip()
+]
+STALL_SAMPLES_KEPT = 20
+LAG_SMOOTHING = 0.3
+
+
+class LoopLagMonitor:
+    """Measures event-loop scheduling delay with a heartbeat task. A watchdog thread notices when
+    the heartbeat stops and samples the loop thread's stack, so blocking calls show up in logs."""
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL, stall_threshold: float = LOOP_STALL_THRESHOLD):
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self.lag = LatencyWindow()
+        # Exponentially smoothed lag in seconds; what admission decisions look at
+        self.current_lag = 0.0
+        self.stalls: deque = deque(maxlen=STALL_SAMPLES_KEPT)
+        self._last_beat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _heartbeat(self) -> None:
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - started - self.interval)
+            self._last_beat = now
+            self.lag.observe(lag)
+            self.current_lag += LAG_SMOOTHING * (lag - self.current_lag)
+
+    def _watch(self) -> None:
+        sampled_beat = None
+        while not self._stopped.wait(self.stall_threshold / 2):
+            beat = self._last_beat
+            blocked = time.monotonic() - beat - self.interval
+            # One sample per stall: the stack at the time the threshold was crossed
+            if blocked > self.stall_threshold and beat != sampled_beat:
+                sampled_beat = beat
+                self._sample(blocked)
+
+    def _sample(self, blocked: float) -> None:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = "".join(traceback.format_stack(frame)) if frame is not None else ""
+        self.stalls.append({"at": datetime.utcnow(), "blockedMs": round(blocked * 1000, 1), "stack": stack})
+        logger.warning(f"Event loop blocked for {blocked * 1000:.0f}ms; loop thread stack:\n{stack}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "currentLagMs": round(self.current_lag * 1000, 3),
+            "lag": self.lag.snapshot(),
+            "stallThresholdMs": self.stall_threshold * 1000,
+            "recentStalls": list(self.stalls),
+        }
+
+
+class AdmissionController:
+    """Rejects low-priority requests while the event loop is lagging, keeping the rest responsive"""
+
+    def __init__(self, monitor: LoopLagMonitor, budget: float = LOOP_LAG_BUDGET, low_priority: Iterable[str] = LOW_PRIORITY_ROUTES):
+        self.monitor = monitor
+        self.budget = budget
+        self.low_priority = tuple(low_priority)
+        self.counters = Counters()
+
+    def is_low_priority(self, path: str) -> bool:
+        return path.startswith(self.low_priority)
+
+    def admit(self, path: str, route: Optional[str] = None) -> bool:
+        """Counters are keyed by the route template (not the raw path), so unmatched paths share a bucket"""
+        if not self.is_low_priority(path):
+            return True
+        key = route or "unmatched"
+        if self.monitor.current_lag > self.budget:
+            self.counters.incr(f"shed.{key}")
+            return False
+        self.counters.incr(f"admitted.{key}")
+        return True
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "budgetMs": self.budget * 1000,
+            "shedding": self.monitor.current_lag > self.budget,
+            "lowPriorityRoutes": list(self.low_priority),
+            "counters": self.counters.snapshot(),
+        }
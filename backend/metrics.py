@@ -0,0 +1,94 @@
+import threading
+from collections import deque, defaultdict
+from typing import Dict, Any
+
+DEFAULT_WINDOW = 1024
+
+
+class LatencyWindow:
+    """Count/total/max since start plus percentiles over the most recent samples. Thread-safe,
+    since driver monitoring callbacks run outside the event loop."""
+
+    def __init__(self, window: int = DEFAULT_WINDOW):
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=window)
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float, error: bool = False) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+            if error:
+                self.errors += 1
+
+    def percentile(self, q: float) -> float:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return 0.0
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            samples = sorted(self._samples)
+            count, errors, total, max_ = self.count, self.errors, self.total, self.max
+
+        def pct(q):
+            return round(samples[min(len(samples) - 1, int(q * len(samples)))] * 1000, 3) if samples else 0.0
+
+        return {
+            "count": count,
+            "errors": errors,
+            "avgMs": round(total / count * 1000, 3) if count else 0.0,
+            "maxMs": round(max_ * 1000, 3),
+            "p50Ms": pct(0.50),
+            "p95Ms": pct(0.95),
+            "p99Ms": pct(0.99),
+        }
+
+
+class LatencyRegistry:
+    """Named LatencyWindows, e.g. one per DatabaseService method"""
+
+    def __init__(self, window: int = DEFAULT_WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self._latencies: Dict[str, LatencyWindow] = {}
+
+    def get(self, name: str) -> LatencyWindow:
+        latency = self._latencies.get(name)
+        if latency is None:
+            with self._lock:
+                latency = self._latencies.setdefault(name, LatencyWindow(self.window))
+        return latency
+
+    def observe(self, name: str, seconds: float, error: bool = False) -> None:
+        self.get(name).observe(seconds, error)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {name: latency.snapshot() for name, latency in sorted(self._latencies.items())}
+
+
+class Counters:
+    """Thread-safe named counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values: Dict[str, int] = defaultdict(int)
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._values[name] += amount
+
+    def get(self, name: str) -> int:
+        return self._values.get(name, 0)
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(sorted(self._values.items()))
@@ -0,0 +1,159 @@
+import os
+import time
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional, List
+
+from metrics import LatencyWindow
+
+logger = logging.getLogger(__name__)
+
+# A model that fails or overruns its budget this many times in a row is skipped for the cooldown
+FAILOVER_THRESHOLD = int(os.environ.get("AI_FAILOVER_THRESHOLD", "3"))
+FAILOVER_COOLDOWN = float(os.environ.get("AI_FAILOVER_COOLDOWN", "30"))
+# Ceiling on one AI call including failover; stays under the frontend's 30s request timeout
+AI_TOTAL_BUDGET = float(os.environ.get("AI_TOTAL_BUDGET", "25"))
+
+
+@dataclass(frozen=True)
+class ModelSpec:
+    provider: str
+    model: str
+    max_tokens: Optional[int] = None
+
+    @classmethod
+    def parse(cls, value: str) -> "ModelSpec":
+        """provider:model[:max_tokens], e.g. openai:gpt-4o-mini:300"""
+        parts = value.strip().split(":")
+        if len(parts) not in (2, 3) or not all(parts[:2]):
+            raise ValueError(f"Invalid model spec '{value}', expected provider:model[:max_tokens]")
+        return cls(parts[0], parts[1], int(parts[2]) if len(parts) == 3 and parts[2] else None)
+
+    @property
+    def name(self) -> str:
+        return f"{self.provider}:{self.model}"
+
+
+@dataclass
+class Route:
+    task: str
+    primary: ModelSpec
+    secondary: Optional[ModelSpec] = None
+    # Seconds the primary gets before the call fails over to the secondary; None means it may use
+    # the whole AI_TOTAL_BUDGET and only errors fail over
+    budget: Optional[float] = None
+
+
+# Every task keeps the baseline model; the secondary only answers when the primary errors (or
+# overruns an opt-in budget). Max-token caps are opt-in too, via provider:model:max_tokens.
+BASELINE = ModelSpec("openai", "gpt-4o-mini")
+FALLBACK = ModelSpec("gemini", "gemini-2.0-flash")
+DEFAULT_ROUTES = {
+    task: Route(task, BASELINE, FALLBACK)
+    for task in ("career-match", "rewrite-bullet", "identity", "cover-letter", "optimize")
+}
+DEFAULT_ROUTES["default"] = Route("default", BASELINE)
+
+
+def load_routes(environ=os.environ) -> Dict[str, Route]:
+    """Default routes with AI_ROUTE_<TASK>, AI_ROUTE_<TASK>_SECONDARY ('none' to disable) and
+    AI_ROUTE_<TASK>_BUDGET overrides, where TASK is upper-case with '-' as '_'"""
+    routes = {}
+    total = float(environ.get("AI_TOTAL_BUDGET", AI_TOTAL_BUDGET))
+    for task, default in DEFAULT_ROUTES.items():
+        prefix = f"AI_ROUTE_{task.upper().replace('-', '_')}"
+        primary = ModelSpec.parse(environ[prefix]) if environ.get(prefix) else default.primary
+        secondary = default.secondary
+        if environ.get(f"{prefix}_SECONDARY"):
+            value = environ[f"{prefix}_SECONDARY"]
+            secondary = None if value.lower() == "none" else ModelSpec.parse(value)
+        budget = float(environ[f"{prefix}_BUDGET"]) if environ.get(f"{prefix}_BUDGET") else default.budget
+        if budget is not None and budget >= total:
+            logger.warning(f"{prefix}_BUDGET={budget}s leaves no time for failover within AI_TOTAL_BUDGET={total}s; ignoring it")
+            budget = None
+        routes[task] = Route(task, primary, secondary, budget)
+    return routes
+
+
+@dataclass
+class ModelHealth:
+    latency: LatencyWindow = field(default_factory=LatencyWindow)
+    timeouts: int = 0
+    consecutive_failures: int = 0
+    skip_until: float = 0.0
+
+    def available(self, now: float) -> bool:
+        return now >= self.skip_until
+
+    def record(self, seconds: float, ok: bool, timed_out: bool = False) -> None:
+        self.latency.observe(seconds, error=not ok)
+        if timed_out:
+            self.timeouts += 1
+        if ok:
+            self.consecutive_failures = 0
+            return
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= FAILOVER_THRESHOLD:
+            self.skip_until = time.monotonic() + FAILOVER_COOLDOWN
+
+
+class ModelRouter:
+    """Maps AI tasks to models and tracks latency and failures per task and model. A model that
+    keeps failing or overrunning its budget is skipped for a cooldown, then tried again."""
+
+    def __init__(self, routes: Optional[Dict[str, Route]] = None, total_budget: float = AI_TOTAL_BUDGET):
+        self.routes = routes or load_routes()
+        self.total_budget = total_budget
+        self.health: Dict[tuple, ModelHealth] = {}
+
+    def route(self, task: str) -> Route:
+        return self.routes.get(task) or self.routes["default"]
+
+    def _health(self, task: str, spec: ModelSpec) -> ModelHealth:
+        key = (task, spec.name)
+        if key not in self.health:
+            self.health[key] = ModelHealth()
+        return self.health[key]
+
+    def candidates(self, task: str) -> List[ModelSpec]:
+        """Models to try in order; a cooling-down primary goes last rather than being dropped"""
+        route = self.route(task)
+        specs = [route.primary] + ([route.secondary] if route.secondary else [])
+        now = time.monotonic()
+        ready = [s for s in specs if self._health(route.task, s).available(now)]
+        return ready + [s for s in specs if s not in ready]
+
+    def record(self, task: str, spec: ModelSpec, seconds: float, ok: bool, timed_out: bool = False) -> None:
+        route = self.route(task)
+        health = self._health(route.task, spec)
+        was_available = health.available(time.monotonic())
+        health.record(seconds, ok, timed_out)
+        if was_available and not health.available(time.monotonic()):
+            logger.warning(f"Model {spec.name} failed {health.consecutive_failures} times in a row for {route.task}; "
+                           f"skipping it for {FAILOVER_COOLDOWN:.0f}s")
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        routes = {}
+        for task, route in self.routes.items():
+            models = {}
+            for spec in [route.primary] + ([route.secondary] if route.secondary else []):
+                health = self.health.get((task, spec.name))
+                if health is None:
+                    continue
+                snapshot = health.latency.snapshot()
+                models[spec.name] = {
+                    **snapshot,
+                    "errorRate": round(snapshot["errors"] / snapshot["count"], 4) if snapshot["count"] else 0.0,
+                    "timeouts": health.timeouts,
+                    "consecutiveFailures": health.consecutive_failures,
+                    "coolingDownS": round(max(0.0, health.skip_until - now), 1),
+                }
+            routes[task] = {
+                "primary": route.primary.name,
+                "secondary": route.secondary.name if route.secondary else None,
+                "maxTokens": route.primary.max_tokens,
+                "budgetMs": route.budget * 1000 if route.budget is not None else None,
+                "models": models,
+            }
+        return routes
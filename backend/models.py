@@ -61,6 +61,12 @@ class Career(BaseModel):
     relatedCareers: List[str] = []
     jobPostings: int
     companies: List[str]
+    # Normalized from averageSalary/growthRate at ingest time for range filters and sorting
+    salaryMin: Optional[int] = None
+    salaryMax: Optional[int] = None
+    growthPercent: Optional[float] = None
+    # Canonical skill_taxonomy ids for `skills`, derived at ingest time
+    skillIds: List[int] = []
     createdAt: datetime = Field(default_factory=datetime.utcnow)
 
     class Config:
@@ -88,6 +94,8 @@ class IdentityGenerationResponse(BaseModel):
     success: bool
     statement: str
     message: Optional[str] = None
+    provisional: bool = False  # deadline fallback; the final result is fetched via resultToken
+    resultToken: Optional[str] = None
 
 class ResumeOptimizationRequest(BaseModel):
     jobTitle: str
@@ -95,6 +103,7 @@ class ResumeOptimizationRequest(BaseModel):
     jobDescription: str
     currentResume: Optional[str] = None  # backward compatibility
     jobs: Optional[List[JobInput]] = None
+    sessionId: Optional[str] = Field(None, max_length=128)  # enables incremental re-optimization of structured jobs
 
 class ResumeOptimizationResponse(BaseModel):
     success: bool
@@ -105,6 +114,10 @@ class ResumeOptimizationResponse(BaseModel):
     jobEdits: List[Dict[str, Any]] = []  # [{jobIndex, jobInfo, bulletEdits: [...] }]
     proTips: List[str] = []
     message: Optional[str] = None
+    provisional: bool = False  # deadline fallback; the final result is fetched via resultToken
+    resultToken: Optional[str] = None
+    sessionId: Optional[str] = None
+    reusedBullets: int = 0  # bullet edits served from the session instead of the LLM
 
 class CoverLetterRequest(BaseModel):
     jobTitle: str
@@ -116,6 +129,8 @@ class CoverLetterResponse(BaseModel):
     success: bool
     coverLetter: str
     message: Optional[str] = None
+    provisional: bool = False  # deadline fallback; the final result is fetched via resultToken
+    resultToken: Optional[str] = None
 
 class CareerRecommendationRequest(BaseModel):
     userProfile: UserProfile
@@ -139,4 +154,57 @@ class RewriteBulletResponse(BaseModel):
     improved: str
     rationale: str
     keywords: List[str] = []
-    message: Optional[str] = None
\ No newline at end of file
+    message: Optional[str] = None
+
+class ResumeAnalysisRequest(BaseModel):
+    jobTitle: str = ""
+    company: str = ""
+    jobDescription: str
+    currentResume: Optional[str] = None
+    jobs: Optional[List[JobInput]] = None
+
+class ResumeAnalysisResponse(BaseModel):
+    success: bool
+    atsScore: float = 0.0
+    keywordCoverage: float = 0.0
+    keywords: List[Dict[str, Any]] = []
+    matchedKeywords: List[str] = []
+    missingKeywords: List[str] = []
+    missingSkills: List[str] = []
+    bulletScores: List[Dict[str, Any]] = []
+    actionVerbStats: Dict[str, Any] = {}
+    suggestions: List[str] = []
+    message: Optional[str] = None
+
+class ResumeSegmentRequest(BaseModel):
+    text: str = Field(..., max_length=50000)
+
+class SegmentedJob(JobInput):
+    confidence: float = 0.0
+
+class ResumeSegmentResponse(BaseModel):
+    success: bool
+    sections: List[Dict[str, Any]] = []  # [{name, heading, startLine, endLine, confidence}]
+    jobs: List[SegmentedJob] = []
+    confidence: float = 0.0
+    message: Optional[str] = None
+
+class JobSubmitRequest(BaseModel):
+    type: str
+    payload: Dict[str, Any]
+
+class CareerBatchRequest(BaseModel):
+    ids: List[str] = Field(..., min_length=1, max_length=100)
+    fields: Optional[List[str]] = None
+
+class CoverLetterPosting(BaseModel):
+    id: Optional[str] = None
+    jobTitle: str
+    company: str
+    jobDescription: str
+
+class CoverLetterBatchRequest(BaseModel):
+    postings: List[CoverLetterPosting] = Field(..., min_length=1, max_length=200)
+    userProfile: Optional[Dict[str, Any]] = None
+    batchId: Optional[str] = None  # pass the id from an interrupted batch to resume it
+    concurrency: Optional[int] = None
@@ -0,0 +1,246 @@
+import re
+from collections import Counter
+from typing import List, Dict, Any, Optional, Tuple
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*(?:[./\-][a-z0-9+#]+)*")
+BULLET_GLYPHS = "•·▪◦●○■□►▶➢✓✔*-–— \t"
+NUMBER_RE = re.compile(r"(\d[\d,.]*\s*(%|percent|x\b|k\b|m\b|\+)?|\$\s?\d)")
+
+STOPWORDS = frozenset("""
+a about above across after again against all also am an and any are as at be because been before being
+below between both but by can could did do does doing down during each either etc every few for from
+further had has have having he her here hers him his how i if in into is it its itself just least less
+like made make many may me more most much must my no nor not now of off on once one only or other our
+ours out over own per plus same several shall she should so some such than that the their them then
+there these they this those through to too under until up upon us use used using very via was we well
+were what when where whether which while who whom whose why will with within without would yet you your
+ability able across advanced candidate candidates company environment excellent experience including
+job new plus position preferred required requirements responsibilities role strong team teams work
+working years year knowledge skills skill understanding related looking join help ideal opportunity
+""".split())
+
+ACTION_VERBS = frozenset("""
+accelerated achieved administered advanced analyzed architected assembled automated boosted built
+captured championed coached collaborated completed conceived consolidated coordinated created cut
+debugged decreased defined delivered deployed designed developed devised directed doubled drove
+eliminated enabled engineered established evaluated exceeded executed expanded facilitated forecasted
+founded generated grew guided headed identified implemented improved increased influenced initiated
+innovated integrated introduced launched led leveraged maintained managed maximized mentored migrated
+minimized modernized monitored negotiated optimized orchestrated organized oversaw partnered piloted
+pioneered planned presented prioritized produced programmed published raised rebuilt redesigned reduced
+refactored resolved restructured revamped saved scaled secured shipped simplified spearheaded
+standardized streamlined strengthened supervised tested trained transformed tripled unified upgraded won
+wrote
+""".split())
+
+WEAK_OPENERS = frozenset(["responsible", "helped", "assisted", "worked", "participated", "involved", "tasked", "duties"])
+
+# Compact lexicon of common hard skills; used to split missing keywords into skills vs. general terms
+SKILL_TERMS = frozenset([
+    "python", "java", "javascript", "typescript", "go", "golang", "rust", "ruby", "php", "scala", "kotlin",
+    "swift", "c++", "c#", "sql", "nosql", "html", "css", "react", "angular", "vue", "node.js", "django",
+    "flask", "fastapi", "spring", "rails", ".net", "graphql", "rest", "api", "apis", "aws", "azure", "gcp",
+    "docker", "kubernetes", "terraform", "ansible", "linux", "git", "ci/cd", "jenkins", "kafka", "spark",
+    "hadoop", "airflow", "snowflake", "tableau", "excel", "powerbi", "looker", "pandas", "numpy",
+    "tensorflow", "pytorch", "scikit-learn", "machine learning", "deep learning", "nlp", "statistics",
+    "analytics", "data analysis", "data visualization", "etl", "figma", "sketch", "prototyping",
+    "wireframing", "user research", "usability", "design thinking", "agile", "scrum", "kanban", "jira",
+    "product strategy", "roadmap", "stakeholder management", "market research", "seo", "sem", "crm",
+    "salesforce", "hubspot", "email marketing", "content strategy", "social media", "copywriting",
+    "network security", "incident response", "risk assessment", "compliance", "penetration testing",
+    "siem", "leadership", "communication", "project management", "budgeting", "forecasting", "negotiation",
+])
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens, keeping tech terms like c++, node.js and ci/cd intact"""
+    return [t.rstrip(".-/") for t in TOKEN_RE.findall((text or "").lower())]
+
+
+def split_bullets(text: str) -> List[str]:
+    """Split plain resume text into candidate bullet lines"""
+    bullets = []
+    for raw in (text or "").splitlines():
+        raw = raw.strip()
+        line = raw.lstrip(BULLET_GLYPHS).strip()
+        # Unmarked short lines are usually headings or contact details, not bullets
+        min_words = 3 if line != raw else 5
+        if len(line.split()) >= min_words:
+            bullets.append(line)
+    return bullets
+
+
+def _terms(tokens: List[str]) -> List[str]:
+    """Unigrams and bigrams that do not start or end on a stopword"""
+    terms = [t for t in tokens if t not in STOPWORDS and len(t) > 1 and not t.isdigit()]
+    for a, b in zip(tokens, tokens[1:]):
+        if a not in STOPWORDS and b not in STOPWORDS and not a.isdigit() and not b.isdigit():
+            terms.append(f"{a} {b}")
+    return terms
+
+
+def extract_keywords(job_description: str, job_title: str = "", top_n: int = 30) -> List[Tuple[str, float]]:
+    """Rank JD terms by frequency, boosting known skills and title terms. Returns (term, weight) pairs."""
+    tokens = tokenize(job_description)
+    counts = Counter(_terms(tokens))
+    if not counts:
+        return []
+    title_tokens = set(tokenize(job_title))
+    scored = []
+    for term, count in counts.items():
+        is_bigram = " " in term
+        # A bigram must repeat (or be a known skill) to count; one-off adjacent word pairs are noise
+        if is_bigram and count < 2 and term not in SKILL_TERMS:
+            continue
+        weight = float(count)
+        if term in SKILL_TERMS:
+            weight *= 2.0
+        if is_bigram:
+            weight *= 1.5
+        if title_tokens & set(term.split()):
+            weight *= 1.5
+        scored.append((term, weight))
+    scored.sort(key=lambda x: (-x[1], x[0]))
+    top = scored[:top_n]
+    max_weight = top[0][1] if top else 1.0
+    return [(term, round(weight / max_weight, 4)) for term, weight in top]
+
+
+class ResumeAnalyzer:
+    """Deterministic ATS-style analysis of a resume against a job description. No LLM calls."""
+
+    def __init__(self, top_keywords: int = 30):
+        self.top_keywords = top_keywords
+
+    def analyze(
+        self,
+        job_description: str,
+        job_title: str = "",
+        resume_text: Optional[str] = None,
+        jobs: Optional[List[Dict[str, Any]]] = None,
+        keywords: Optional[List[Tuple[str, float]]] = None,
+    ) -> Dict[str, Any]:
+        if keywords is None:
+            keywords = extract_keywords(job_description, job_title, self.top_keywords)
+        bullets, bullet_refs = self._collect_bullets(resume_text, jobs)
+
+        terms = [k for k, _ in keywords]
+        weights = np.array([w for _, w in keywords], dtype=np.float64)
+
+        # hits[i, j] is True when bullet i contains keyword j
+        bullet_terms = [set(_terms(tokenize(b))) for b in bullets]
+        hits = np.zeros((len(bullets), len(terms)), dtype=bool)
+        term_index = {t: j for j, t in enumerate(terms)}
+        for i, present in enumerate(bullet_terms):
+            cols = [term_index[t] for t in present if t in term_index]
+            hits[i, cols] = True
+
+        # Keywords can also be satisfied outside bullets (summary, skills section)
+        full_text_terms = set(_terms(tokenize(resume_text or "")))
+        for job in jobs or []:
+            full_text_terms.update(_terms(tokenize(f"{job.get('role', '')} {job.get('company', '')}")))
+        in_text = np.array([t in full_text_terms for t in terms], dtype=bool)
+
+        covered = hits.any(axis=0) | in_text if len(terms) else np.zeros(0, dtype=bool)
+        total_weight = weights.sum()
+        coverage = float(weights[covered].sum() / total_weight) if total_weight > 0 else 0.0
+
+        relevance = (hits @ weights) / total_weight if total_weight > 0 and len(bullets) else np.zeros(len(bullets))
+        first_tokens = [tokenize(b)[:1] for b in bullets]
+        starts_action = np.array([bool(t) and t[0] in ACTION_VERBS for t in first_tokens], dtype=bool)
+        starts_weak = np.array([bool(t) and t[0] in WEAK_OPENERS for t in first_tokens], dtype=bool)
+        quantified = np.array([bool(NUMBER_RE.search(b)) for b in bullets], dtype=bool)
+        lengths = np.array([len(b.split()) for b in bullets], dtype=np.int64)
+
+        matched = [t for t, c in zip(terms, covered) if c]
+        missing = [t for t, c in zip(terms, covered) if not c]
+        missing_skills = [t for t in missing if t in SKILL_TERMS]
+
+        bullet_scores = []
+        for i, text in enumerate(bullets):
+            bullet_scores.append({
+                **bullet_refs[i],
+                "text": text,
+                "relevance": round(float(relevance[i]), 4),
+                "matchedKeywords": [terms[j] for j in np.flatnonzero(hits[i])],
+                "startsWithActionVerb": bool(starts_action[i]),
+                "quantified": bool(quantified[i]),
+                "wordCount": int(lengths[i]),
+            })
+
+        n = len(bullets)
+        verb_counts = Counter(t[0] for t, ok in zip(first_tokens, starts_action) if ok)
+        action_verb_stats = {
+            "totalBullets": n,
+            "actionVerbRatio": round(float(starts_action.mean()), 4) if n else 0.0,
+            "weakOpenerCount": int(starts_weak.sum()),
+            "quantifiedRatio": round(float(quantified.mean()), 4) if n else 0.0,
+            "repeatedVerbs": sorted(v for v, c in verb_counts.items() if c > 1),
+            "averageWordCount": round(float(lengths.mean()), 1) if n else 0.0,
+        }
+
+        ats_score = self._score(coverage, action_verb_stats, relevance)
+        return {
+            "atsScore": ats_score,
+            "keywordCoverage": round(coverage, 4),
+            "keywords": [{"term": t, "weight": w} for t, w in keywords],
+            "matchedKeywords": matched,
+            "missingKeywords": missing,
+            "missingSkills": missing_skills,
+            "bulletScores": bullet_scores,
+            "actionVerbStats": action_verb_stats,
+            "suggestions": self._suggestions(missing_skills, missing, action_verb_stats, relevance),
+        }
+
+    def _collect_bullets(self, resume_text: Optional[str], jobs: Optional[List[Dict[str, Any]]]):
+        bullets: List[str] = []
+        refs: List[Dict[str, Any]] = []
+        if jobs:
+            for job_index, job in enumerate(jobs):
+                for bullet_index, bullet in enumerate(job.get("bullets") or []):
+                    text = (bullet or "").strip().lstrip(BULLET_GLYPHS).strip()
+                    if text:
+                        bullets.append(text)
+                        refs.append({"jobIndex": job_index, "bulletIndex": bullet_index})
+        else:
+            for bullet_index, text in enumerate(split_bullets(resume_text or "")):
+                bullets.append(text)
+                refs.append({"jobIndex": None, "bulletIndex": bullet_index})
+        return bullets, refs
+
+    def _score(self, coverage: float, stats: Dict[str, Any], relevance: np.ndarray) -> float:
+        if not stats["totalBullets"]:
+            return round(100 * coverage * 0.6, 1)
+        relevant_share = float((relevance > 0).mean())
+        score = (
+            0.55 * coverage
+            + 0.15 * relevant_share
+            + 0.15 * stats["actionVerbRatio"]
+            + 0.15 * stats["quantifiedRatio"]
+        )
+        return round(100 * score, 1)
+
+    def _suggestions(self, missing_skills: List[str], missing: List[str], stats: Dict[str, Any], relevance: np.ndarray) -> List[str]:
+        suggestions = []
+        if missing_skills:
+            suggestions.append(f"Add evidence of these skills from the job description: {', '.join(missing_skills[:6])}")
+        elif missing:
+            suggestions.append(f"Mirror these job description terms where accurate: {', '.join(missing[:6])}")
+        if stats["totalBullets"]:
+            if stats["actionVerbRatio"] < 0.7:
+                suggestions.append("Start more bullets with strong action verbs")
+            if stats["weakOpenerCount"]:
+                suggestions.append("Replace passive openers like 'responsible for' or 'helped' with ownership verbs")
+            if stats["quantifiedRatio"] < 0.5:
+                suggestions.append("Quantify more achievements with numbers, percentages or scale")
+            if stats["repeatedVerbs"]:
+                suggestions.append(f"Vary repeated opening verbs: {', '.join(stats['repeatedVerbs'][:4])}")
+            off_target = int((relevance == 0).sum())
+            if off_target:
+                suggestions.append(f"{off_target} bullet(s) share no keywords with the job description; tailor or trim them")
+        return suggestions
@@ -0,0 +1,140 @@
+import os
+import json
+import asyncio
+import logging
+from typing import Dict, Any, Callable, Awaitable, Optional, Set
+
+from pydantic import ValidationError
+from starlette.websockets import WebSocket, WebSocketDisconnect
+
+from metrics import Counters
+from tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+WS_MAX_IN_FLIGHT = int(os.environ.get("WS_MAX_IN_FLIGHT", "8"))
+MAX_MESSAGE_BYTES = 256 * 1024
+
+# op(payload, push) -> final result; push sends a partial result for the same request id
+Push = Callable[[Dict[str, Any]], Awaitable[None]]
+Handler = Callable[[Dict[str, Any], Push], Awaitable[Dict[str, Any]]]
+
+
+class ResumeChannel:
+    """Multiplexes Resume Assistant operations over one WebSocket.
+
+    Client messages are {id, op, payload, key?} or {id, op: "cancel"}. A request that carries a
+    key (e.g. "bullet:0-2") supersedes any unfinished request with the same key, whose LLM call is
+    cancelled. Replies are {id, type} with type accepted, partial, result, error or cancelled."""
+
+    counters = Counters()
+
+    def __init__(self, websocket: WebSocket, handlers: Dict[str, Handler], max_in_flight: int = WS_MAX_IN_FLIGHT):
+        self.websocket = websocket
+        self.handlers = handlers
+        self.max_in_flight = max_in_flight
+        self.tasks: Dict[str, asyncio.Task] = {}
+        # Cancelled tasks still winding down; they no longer count toward max_in_flight
+        self.cancelling: Set[asyncio.Task] = set()
+        self.keys: Dict[str, str] = {}
+        self._send_lock = asyncio.Lock()
+
+    async def send(self, message: Dict[str, Any]) -> None:
+        async with self._send_lock:
+            await self.websocket.send_text(json.dumps(message, default=str, ensure_ascii=False))
+
+    async def run(self) -> None:
+        await self.websocket.accept()
+        self.counters.incr("connections")
+        try:
+            while True:
+                raw = await self.websocket.receive_text()
+                await self._dispatch(raw)
+        except WebSocketDisconnect:
+            pass
+        finally:
+            # Nobody is left to read these results
+            for task in list(self.tasks.values()):
+                task.cancel()
+            if self.tasks:
+                self.counters.incr("cancelled.disconnect", len(self.tasks))
+            if self.tasks or self.cancelling:
+                await asyncio.gather(*self.tasks.values(), *self.cancelling, return_exceptions=True)
+
+    async def _dispatch(self, raw: str) -> None:
+        if len(raw) > MAX_MESSAGE_BYTES:
+            await self.send({"type": "error", "error": "message too large"})
+            return
+        try:
+            message = json.loads(raw)
+            request_id = str(message["id"])
+            op = message["op"]
+        except (ValueError, KeyError, TypeError):
+            await self.send({"type": "error", "error": "expected JSON with id and op"})
+            return
+
+        if op == "cancel":
+            if self._cancel(request_id, "cancelled.client"):
+                await self.send({"id": request_id, "type": "cancelled", "reason": "client"})
+            return
+        handler = self.handlers.get(op)
+        if handler is None:
+            await self.send({"id": request_id, "type": "error", "error": f"unknown op '{op}'"})
+            return
+        if request_id in self.tasks:
+            await self.send({"id": request_id, "type": "error", "error": "duplicate request id"})
+            return
+
+        key = message.get("key")
+        if key and key in self.keys:
+            superseded = self.keys[key]
+            if self._cancel(superseded, "cancelled.superseded"):
+                await self.send({"id": superseded, "type": "cancelled", "reason": "superseded", "by": request_id})
+        if len(self.tasks) >= self.max_in_flight:
+            await self.send({"id": request_id, "type": "error", "error": "too many requests in flight"})
+            return
+
+        self.counters.incr(f"requests.{op}")
+        task = asyncio.create_task(self._run(request_id, op, handler, message.get("payload") or {}))
+        self.tasks[request_id] = task
+        if key:
+            self.keys[key] = request_id
+        task.add_done_callback(lambda done: self._forget(request_id, done, key))
+        await self.send({"id": request_id, "type": "accepted", "op": op})
+
+    def _cancel(self, request_id: str, counter: str) -> bool:
+        task = self.tasks.get(request_id)
+        if task is None or task.done():
+            return False
+        task.cancel()
+        # Free the slot now rather than when the task finishes unwinding
+        del self.tasks[request_id]
+        self.cancelling.add(task)
+        task.add_done_callback(self.cancelling.discard)
+        self.counters.incr(counter)
+        return True
+
+    def _forget(self, request_id: str, task: asyncio.Task, key: Optional[str]) -> None:
+        if self.tasks.get(request_id) is task:
+            del self.tasks[request_id]
+        if key and self.keys.get(key) == request_id:
+            del self.keys[key]
+
+    async def _run(self, request_id: str, op: str, handler: Handler, payload: Dict[str, Any]) -> None:
+        async def push(partial: Dict[str, Any]) -> None:
+            await self.send({"id": request_id, "type": "partial", "data": partial})
+
+        try:
+            with tracer.start_trace(f"ws {op}", requestId=request_id):
+                result = await handler(payload, push)
+            await self.send({"id": request_id, "type": "result", "data": result})
+        except asyncio.CancelledError:
+            raise
+        except ValidationError as e:
+            await self.send({"id": request_id, "type": "error", "error": "invalid payload", "detail": e.errors()})
+        except Exception as e:
+            logger.error(f"WebSocket {op} request {request_id} failed: {str(e)}")
+            try:
+                await self.send({"id": request_id, "type": "error", "error": "internal error"})
+            except Exception:
+                pass
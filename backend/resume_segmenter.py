@@ -0,0 +1,221 @@
+import re
+import logging
+from typing import List, Dict, Any, Optional
+
+from resume_analyzer import BULLET_GLYPHS, ACTION_VERBS
+
+logger = logging.getLogger(__name__)
+
+# Below this overall confidence, optimize keeps sending the raw text instead of the segmented jobs
+SEGMENT_MIN_CONFIDENCE = 0.6
+MAX_HEADING_WORDS = 5
+
+SECTION_HEADINGS = {
+    "summary": ["summary", "professional summary", "profile", "professional profile", "objective", "career objective", "about me", "about"],
+    "experience": ["experience", "work experience", "professional experience", "employment", "employment history",
+                   "work history", "relevant experience", "career history", "professional background"],
+    "education": ["education", "academic background", "education and training", "academics"],
+    "skills": ["skills", "technical skills", "core skills", "core competencies", "competencies", "key skills", "technologies", "tools"],
+    "projects": ["projects", "personal projects", "selected projects", "key projects"],
+    "certifications": ["certifications", "certificates", "licenses", "licenses and certifications", "certifications and licenses"],
+    "awards": ["awards", "honors", "honors and awards", "achievements", "accomplishments"],
+    "volunteer": ["volunteer", "volunteering", "volunteer experience", "community involvement"],
+    "publications": ["publications", "research"],
+    "languages": ["languages"],
+    "interests": ["interests", "hobbies"],
+}
+HEADING_LOOKUP = {label: name for name, labels in SECTION_HEADINGS.items() for label in labels}
+
+MONTH = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?"
+SEASON = r"(?:spring|summer|fall|autumn|winter)"
+DATE = rf"(?:(?:{MONTH}|{SEASON})\s*,?\s*\d{{4}}|\d{{1,2}}\s*/\s*\d{{4}}|\d{{4}})"
+PERIOD_RE = re.compile(
+    rf"(?P<period>{DATE}\s*(?:-|–|—|to|until)\s*(?:{DATE}|present|current|now|today)|(?:{MONTH}|{SEASON})\s*\d{{4}}|\b(?:19|20)\d{{2}}\b)",
+    re.IGNORECASE,
+)
+FIELD_SEPARATOR = re.compile(r"\s*(?:\||•|·|\s[-–—]\s|,\s|\t|\s{3,})\s*")
+AT_RE = re.compile(r"^(?P<role>.+?)\s+(?:at|@)\s+(?P<company>.+)$", re.IGNORECASE)
+
+ROLE_WORDS = frozenset("""
+engineer developer programmer manager analyst designer scientist intern director lead specialist consultant
+coordinator associate architect administrator officer head vp president assistant representative technician
+accountant teacher nurse editor writer researcher strategist owner founder co-founder cto ceo cfo coo
+supervisor executive advisor recruiter marketer producer instructor tutor fellow contractor freelancer
+""".split())
+COMPANY_WORDS = frozenset("""
+inc inc. llc ltd ltd. corp corp. corporation company co co. group technologies technology labs gmbh plc
+university college bank solutions systems partners agency studio studios hospital institute foundation
+""".split())
+
+
+def heading_section(line: str) -> Optional[str]:
+    """Section name if the line is a heading: a known label, optionally with a trailing colon"""
+    label = re.sub(r"[^a-z& ]", "", line.lower().replace("&", " and ")).strip()
+    label = " ".join(label.split())
+    if not label or len(label.split()) > MAX_HEADING_WORDS:
+        return None
+    return HEADING_LOOKUP.get(label)
+
+
+def _is_bullet(raw: str) -> bool:
+    stripped = raw.lstrip()
+    return bool(stripped) and stripped[0] in BULLET_GLYPHS.strip() and stripped[1:2] in (" ", "\t", "")
+
+
+def _clean(raw: str) -> str:
+    return raw.strip().lstrip(BULLET_GLYPHS).strip()
+
+
+def _looks_like_role(text: str) -> bool:
+    return any(word.strip(",.()") in ROLE_WORDS for word in text.lower().split())
+
+
+def _looks_like_company(text: str) -> bool:
+    return any(word.strip(",()") in COMPANY_WORDS for word in text.lower().split())
+
+
+def _sentence_like(text: str) -> bool:
+    words = text.split()
+    return len(words) >= 6 or (len(words) >= 3 and words[0].lower() in ACTION_VERBS)
+
+
+class ResumeSegmenter:
+    """Splits plain resume text into sections and job entries (company, role, period, bullets)
+    using headings, date ranges and bullet glyphs. Every job carries a 0-1 confidence."""
+
+    def segment(self, text: str) -> Dict[str, Any]:
+        lines = (text or "").splitlines()
+        sections = self._sections(lines)
+        experience = [s for s in sections if s["name"] in ("experience", "volunteer")]
+        if experience:
+            ranges = [(s["startLine"] + 1, s["endLine"]) for s in experience]
+        else:
+            # No experience heading: look for job headers anywhere outside recognized non-job sections
+            other = [s for s in sections if s["name"] in ("other",)] or [{"startLine": -1, "endLine": len(lines)}]
+            ranges = [(s["startLine"] + 1, s["endLine"]) for s in other]
+        jobs = []
+        for start, end in ranges:
+            jobs.extend(self._jobs(lines[start:end], heading_found=bool(experience)))
+        jobs = [job for job in jobs if job["bullets"] or job["confidence"] >= 0.5]
+        confidence = round(sum(job["confidence"] for job in jobs) / len(jobs), 2) if jobs else 0.0
+        return {"sections": sections, "jobs": jobs, "confidence": confidence}
+
+    def _sections(self, lines: List[str]) -> List[Dict[str, Any]]:
+        sections: List[Dict[str, Any]] = []
+        current = {"name": "other", "heading": None, "startLine": -1, "confidence": 0.5}
+        for i, raw in enumerate(lines):
+            name = heading_section(raw) if not _is_bullet(raw) else None
+            if name is None:
+                continue
+            current["endLine"] = i
+            sections.append(current)
+            current = {"name": name, "heading": raw.strip(), "startLine": i, "confidence": 1.0}
+        current["endLine"] = len(lines)
+        sections.append(current)
+        # Drop the preamble (name, contact details) when it is empty
+        return [s for s in sections if s["heading"] or any(l.strip() for l in lines[max(0, s["startLine"]):s["endLine"]])]
+
+    def _jobs(self, lines: List[str], heading_found: bool) -> List[Dict[str, Any]]:
+        jobs: List[Dict[str, Any]] = []
+        header: List[str] = []
+        job: Optional[Dict[str, Any]] = None
+        for raw in lines:
+            line = _clean(raw)
+            if not line:
+                continue
+            bullet = _is_bullet(raw)
+            if not bullet and job is not None and job["bullets"] and not header and line[0].islower():
+                # A wrapped bullet continues on the next line (common in PDF extraction)
+                job["bullets"][-1] = f"{job['bullets'][-1]} {line}"
+                continue
+            # Unmarked bullets: sentence-like lines once a header with dates (or an earlier job) is open
+            header_complete = any(PERIOD_RE.search(h) for h in header)
+            unmarked = _sentence_like(line) and not PERIOD_RE.search(line) and (header_complete or (job is not None and not header))
+            if bullet or unmarked:
+                if header:
+                    job = self._job_from_header(header, heading_found)
+                    jobs.append(job)
+                    header = []
+                if job is not None:
+                    job["bullets"].append(line)
+                continue
+            header.append(line)
+            if len(header) > 3:
+                header = header[-3:]
+        if header:
+            jobs.append(self._job_from_header(header, heading_found))
+        for job in jobs:
+            job["confidence"] = self._confidence(job, heading_found)
+            del job["_signals"]
+        return jobs
+
+    def _job_from_header(self, header: List[str], heading_found: bool) -> Dict[str, Any]:
+        period = None
+        parts: List[str] = []
+        for line in header:
+            match = PERIOD_RE.search(line)
+            if match and period is None:
+                period = " ".join(match.group("period").split())
+                line = re.sub(r"\(\s*\)", "", line[:match.start()] + " " + line[match.end():]).strip(" ,|-–—()")
+            parts.extend(p.strip(" ,|-–—()") for p in FIELD_SEPARATOR.split(line) if p.strip(" ,|-–—()"))
+
+        role = company = ""
+        for part in parts:
+            at = AT_RE.match(part)
+            if at and not role and not company:
+                role, company = at.group("role").strip(), at.group("company").strip()
+        if not role:
+            role = next((p for p in parts if _looks_like_role(p)), "")
+        if not company:
+            company = next((p for p in parts if p != role and _looks_like_company(p)), "")
+        if not company:
+            company = next((p for p in parts if p != role and not PERIOD_RE.fullmatch(p)), "")
+        if not role:
+            role = next((p for p in parts if p not in (company,)), "")
+        return {
+            "company": company,
+            "role": role,
+            "period": period,
+            "bullets": [],
+            "_signals": {"period": period is not None, "role": _looks_like_role(role), "company": bool(company) and (
+                _looks_like_company(company) or any(AT_RE.match(p) for p in parts))},
+        }
+
+    @staticmethod
+    def _confidence(job: Dict[str, Any], heading_found: bool) -> float:
+        signals = job["_signals"]
+        score = 0.2 if heading_found else 0.1
+        score += 0.3 if signals["period"] else 0.0
+        score += 0.2 if signals["role"] else (0.05 if job["role"] else 0.0)
+        score += 0.15 if signals["company"] else (0.05 if job["company"] else 0.0)
+        score += 0.15 if job["bullets"] else 0.0
+        return round(min(score, 1.0), 2)
+
+
+_segmenter = ResumeSegmenter()
+
+
+def segment_resume(text: str) -> Dict[str, Any]:
+    return _segmenter.segment(text)
+
+
+def context_from_text(text: str) -> str:
+    """Text of the recognized sections that carry no job bullets (summary, skills, education, ...)"""
+    lines = (text or "").splitlines()
+    blocks = []
+    for section in segment_resume(text)["sections"]:
+        if section["name"] in ("other", "experience", "volunteer"):
+            continue
+        block = "\n".join(l.strip() for l in lines[section["startLine"]:section["endLine"]] if l.strip())
+        if block:
+            blocks.append(block)
+    return "\n\n".join(blocks)
+
+
+def jobs_from_text(text: str, min_confidence: float = SEGMENT_MIN_CONFIDENCE) -> Optional[List[Dict[str, Any]]]:
+    """JobInput-shaped jobs for plain resume text, or None when segmentation is not confident enough"""
+    result = segment_resume(text)
+    jobs = [job for job in result["jobs"] if job["bullets"]]
+    if not jobs or result["confidence"] < min_confidence:
+        return None
+    return [{k: job[k] for k in ("company", "role", "period", "bullets")} for job in jobs]
@@ -1,12 +1,16 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, UploadFile, File
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, UploadFile, File, Form, Header, Request, WebSocket
+from fastapi.responses import JSONResponse, StreamingResponse, Response
+from pydantic import ValidationError
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
+from starlette.routing import Match
 import os
 import logging
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Literal
+import json
 import asyncio
+import hashlib
 
 # Import our custom modules
 from models import (
@@ -14,27 +18,58 @@ from models import (
     ResumeOptimizationRequest, ResumeOptimizationResponse,
     CoverLetterRequest, CoverLetterResponse,
     CareerRecommendationRequest, CareerRecommendationResponse,
-    Career, RewriteBulletRequest, RewriteBulletResponse
+    Career, RewriteBulletRequest, RewriteBulletResponse,
+    ResumeAnalysisRequest, ResumeAnalysisResponse, JobSubmitRequest, CareerBatchRequest,
+    CoverLetterBatchRequest, ResumeSegmentRequest, ResumeSegmentResponse
 )
 from database import DatabaseService
+from catalog_snapshot import SnapshotDatabaseService, ReadOnlyCatalogError
 from ai_service import AIService
+from resume_analyzer import ResumeAnalyzer, extract_keywords
+from jd_similarity import JDSimilarityIndex
+from skill_taxonomy import get_taxonomy
+from loop_monitor import LoopLagMonitor, AdmissionController
+from incremental_optimize import IncrementalOptimizer
+from resume_segmenter import segment_resume, jobs_from_text, context_from_text
+from resume_channel import ResumeChannel
+from cover_letter_batch import CoverLetterBatchRunner, read_postings, COVER_LETTER_BATCH_CONCURRENCY, MAX_BATCH_POSTINGS
+from catalog_ingest import iter_rows, detect_format, DEFAULT_BATCH_SIZE
+from health import Readiness, OK, ERROR
+from tracing import tracer, span, exporter_from_env
+from http_cache import make_etag, is_not_modified, not_modified_response, cached_json
+from shared_cache import SharedCache, cache_key
+from jobs import JobQueue, MongoJobStore, InMemoryJobStore, public_job, TERMINAL_STATES
 
-# New imports for file parsing (legacy)
-from io import BytesIO
-try:
-    from pypdf import PdfReader
-except Exception:
-    PdfReader = None
-try:
-    import docx
-except Exception:
-    docx = None
+# File parsers (pypdf, python-docx) are imported on first use in parse_resume
+from io import BytesIO, TextIOWrapper
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-db_service = DatabaseService()
-ai_service = AIService()
+shared_cache = SharedCache()
+catalog_cache = shared_cache.namespace("catalog", ttl=300, max_entries=5000)
+parse_cache = shared_cache.namespace("parse", ttl=86400, max_entries=2000)
+cover_letter_batch_cache = shared_cache.namespace("cover-letter-batch", ttl=7 * 86400, max_entries=20000)
+optimize_session_cache = shared_cache.namespace("optimize-session", ttl=int(os.environ.get("OPTIMIZE_SESSION_TTL", "86400")), max_entries=20000)
+
+# Artifacts derived only from a job description, shared by every near-duplicate of that posting
+jd_cache = shared_cache.namespace("jd", ttl=7 * 86400, max_entries=20000)
+jd_index = JDSimilarityIndex()
+
+# Mongo-free serving: catalog reads come from a read-only snapshot file (see catalog_snapshot.py)
+CATALOG_SNAPSHOT_PATH = os.environ.get("CATALOG_SNAPSHOT_PATH")
+db_service = SnapshotDatabaseService(CATALOG_SNAPSHOT_PATH) if CATALOG_SNAPSHOT_PATH else DatabaseService()
+ai_service = AIService(cache=shared_cache.namespace("llm", ttl=86400, max_entries=20000), jd_index=jd_index)
+incremental_optimizer = IncrementalOptimizer(ai_service, optimize_session_cache)
+resume_analyzer = ResumeAnalyzer()
+readiness = Readiness(required=["database"])
+loop_monitor = LoopLagMonitor()
+admission = AdmissionController(loop_monitor)
+job_queue = JobQueue(
+    InMemoryJobStore() if os.environ.get("JOB_STORE", "memory" if CATALOG_SNAPSHOT_PATH else "mongo") == "memory" else MongoJobStore(db_service),
+    workers=int(os.environ.get("JOB_WORKERS", "4")),
+)
+JOB_STREAM_TIMEOUT = float(os.environ.get("JOB_STREAM_TIMEOUT", "300"))
 
 app = FastAPI(title="CareerPath AI Lite API", version="1.0.0")
 api_router = APIRouter(prefix="/api")
@@ -42,38 +77,267 @@ api_router = APIRouter(prefix="/api")
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+STARTUP_RETRY_MAX_DELAY = 10.0
+background_tasks = set()
+
+def spawn_background(coro):
+    """Run a coroutine off the request path, keeping a reference until it finishes"""
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+DISCONNECT_POLL_INTERVAL = float(os.environ.get("DISCONNECT_POLL_INTERVAL", "0.5"))
+
+class ClientDisconnected(Exception):
+    """The client went away before an AI call finished; the call was cancelled"""
+
+async def cancel_on_disconnect(http_request: Optional[Request], coro, route: str):
+    """Await an AI call, cancelling it and every subtask it awaits once the client disconnects.
+    Called without a request (e.g. from a job worker) it simply awaits the call."""
+    if http_request is None:
+        return await coro
+    task = asyncio.ensure_future(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_INTERVAL)
+            if done:
+                return task.result()
+            if await http_request.is_disconnected():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                ai_service.counters.incr(f"disconnects.{route}")
+                logger.info(f"Client disconnected, cancelled {route}")
+                raise ClientDisconnected(route)
+    finally:
+        if not task.done():
+            task.cancel()
+
+# Latency-SLO mode: once a route's budget passes, answer with its local fallback marked provisional and
+# let the LLM call finish in the background as a job; its id is returned as resultToken
+AI_DEADLINE_MODE = os.environ.get("AI_DEADLINE_MODE", "off") == "on"
+AI_DEADLINES = {
+    "identity": float(os.environ.get("AI_DEADLINE_IDENTITY", "8")),
+    "optimize": float(os.environ.get("AI_DEADLINE_OPTIMIZE", "20")),
+    "cover-letter": float(os.environ.get("AI_DEADLINE_COVER_LETTER", "15")),
+}
+
+def deadline_budget(http_request: Optional[Request], route: str) -> Optional[float]:
+    """Seconds to wait for the LLM before falling back, or None to wait it out. Clients opt in per
+    request with an X-Deadline header (seconds, or any other value for the route default)."""
+    if http_request is None:
+        return None
+    header = http_request.headers.get("x-deadline")
+    if header is None:
+        return AI_DEADLINES[route] if AI_DEADLINE_MODE else None
+    try:
+        return max(0.0, float(header))
+    except ValueError:
+        return AI_DEADLINES[route]
+
+async def respond_by_deadline(http_request: Request, budget: float, route: str, job_type: str, request, endpoint, fallback):
+    """Serve endpoint(request) if it finishes within budget, else fallback() flagged provisional"""
+    task = asyncio.ensure_future(endpoint(request))
+    try:
+        return await asyncio.wait_for(cancel_on_disconnect(http_request, asyncio.shield(task), route), budget)
+    except asyncio.TimeoutError:
+        pass
+    except BaseException:
+        task.cancel()
+        raise
+
+    async def job_result():
+        return (await task).dict()
+
+    response = fallback()
+    response.provisional = True
+    ai_service.counters.incr(f"deadlines.{route}")
+    try:
+        job = await job_queue.adopt(job_type, request.dict(), job_result())
+        response.resultToken = job["_id"]
+    except Exception as e:
+        logger.warning(f"Could not record background result for {route}: {str(e)}")
+        task.cancel()
+    return response
+
+async def warm_up_database():
+    delay = 0.5
+    while True:
+        try:
+            await db_service.warm_up()
+            readiness.mark("database", OK)
+            spawn_background(db_service.sync_search_index())
+            return
+        except Exception as e:
+            readiness.mark("database", ERROR, str(e))
+            logger.error(f"Database warm-up failed, retrying in {delay:.1f}s: {str(e)}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, STARTUP_RETRY_MAX_DELAY)
+
+async def warm_up_ai():
+    try:
+        await ai_service.warm_up()
+        readiness.mark("llm", OK)
+    except Exception as e:
+        # Not required for readiness: every AI endpoint has a local fallback
+        readiness.mark("llm", ERROR, str(e))
+        logger.warning(f"LLM SDK warm-up failed: {str(e)}")
+
 @app.on_event("startup")
 async def startup_event():
-    await db_service.connect()
+    # Seeding and warm-up run in the background so the app starts serving immediately
+    tracer.configure(exporter_from_env())
+    db_service.open()
+    loop_monitor.start()
+    spawn_background(warm_up_database())
+    spawn_background(warm_up_ai())
+    job_queue.start()
     logger.info("CareerPath AI Lite API started successfully")
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    for task in list(background_tasks):
+        task.cancel()
+    await job_queue.stop()
+    await loop_monitor.stop()
     await db_service.close()
+    tracer.shutdown()
     logger.info("CareerPath AI Lite API shut down")
 
+async def require_admin(x_admin_key: Optional[str] = Header(None)):
+    """Admin endpoints are disabled unless ADMIN_API_KEY is set, and then require it"""
+    admin_key = os.environ.get("ADMIN_API_KEY")
+    if not admin_key or x_admin_key != admin_key:
+        raise HTTPException(status_code=403, detail="Admin access required")
+
 @api_router.get("/")
 async def root():
     return {"message": "CareerPath AI Lite API is running", "status": "healthy"}
 
+# Health probes
+@api_router.get("/health/live")
+async def liveness():
+    """The process is up and the event loop is responsive"""
+    return {"status": "alive"}
+
+@api_router.get("/health/ready")
+async def readiness_probe():
+    """Ready once required dependencies (database connection + seed) are warmed up"""
+    state = readiness.snapshot()
+    return JSONResponse(status_code=200 if state["ready"] else 503, content=state)
+
+# Admin
+@api_router.get("/admin/db/stats", dependencies=[Depends(require_admin)])
+async def database_stats():
+    """Live connection-pool usage and per-method query latency"""
+    return {"success": True, **db_service.stats()}
+
+@api_router.get("/admin/cache/stats", dependencies=[Depends(require_admin)])
+async def cache_stats():
+    """Shared cache backend, namespaces and hit/miss counters for this worker"""
+    return {"success": True, **shared_cache.stats()}
+
+@api_router.get("/admin/ai/stats", dependencies=[Depends(require_admin)])
+async def ai_stats():
+    """LLM concurrency slots in use and call/cancellation/error counters for this worker"""
+    return {"success": True, **ai_service.stats(), "resumeChannel": ResumeChannel.counters.snapshot()}
+
+@api_router.get("/admin/loop/stats", dependencies=[Depends(require_admin)])
+async def loop_stats():
+    """Event-loop lag percentiles, recent stall stack samples and load-shedding counters"""
+    return {"success": True, "loop": loop_monitor.snapshot(), "admission": admission.snapshot()}
+
+@api_router.get("/admin/tracing/stats", dependencies=[Depends(require_admin)])
+async def tracing_stats():
+    """Span exporter, head-sampling rate and sampled/exported/dropped counters for this worker"""
+    return {"success": True, **tracer.stats()}
+
+@api_router.post("/admin/cache/{namespace}/invalidate", dependencies=[Depends(require_admin)])
+async def invalidate_cache(namespace: str):
+    """Drop a cache namespace in every worker process"""
+    if namespace not in shared_cache.namespaces:
+        raise HTTPException(status_code=404, detail="Unknown cache namespace")
+    await shared_cache.namespaces[namespace].invalidate()
+    return {"success": True, "namespace": namespace}
+
+@api_router.post("/admin/careers/ingest", dependencies=[Depends(require_admin)])
+async def ingest_careers(file: UploadFile = File(...), format: Optional[str] = None, batch_size: int = DEFAULT_BATCH_SIZE):
+    """Stream an NDJSON or CSV career catalog into the database (bulk upsert on natural key)"""
+    try:
+        fmt = format or detect_format(file.filename or "")
+        stream = TextIOWrapper(file.file, encoding="utf-8", newline="")
+        report = await db_service.ingest_careers(iter_rows(stream, fmt), batch_size=batch_size)
+        await catalog_cache.invalidate()
+        return {"success": True, "report": report}
+    except ReadOnlyCatalogError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error ingesting careers: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to ingest career catalog")
+
 # Identity
 @api_router.post("/identity/generate", response_model=IdentityGenerationResponse)
-async def generate_identity(request: IdentityGenerationRequest):
+async def generate_identity(request: IdentityGenerationRequest, http_request: Request = None):
+    budget = deadline_budget(http_request, "identity")
+    if budget is not None:
+        return await respond_by_deadline(
+            http_request, budget, "identity", "identity.generate", request, generate_identity,
+            lambda: IdentityGenerationResponse(success=True, statement=ai_service._fallback_career_identity(request.dict()), message="OK"),
+        )
     try:
         user_data = request.dict()
-        identity_statement = await ai_service.generate_career_identity(user_data)
+        identity_statement = await cancel_on_disconnect(http_request, ai_service.generate_career_identity(user_data), "identity")
         return IdentityGenerationResponse(success=True, statement=identity_statement, message="OK")
+    except ClientDisconnected:
+        raise
     except Exception as e:
         logger.error(f"Error generating identity: {str(e)}")
         return IdentityGenerationResponse(success=False, statement="", message="Failed to generate")
 
 # Careers
+async def catalog_validators(request: Request):
+    """ETag/Last-Modified for a catalog read, or (None, None) if the version can't be read"""
+    try:
+        version = await db_service.get_catalog_version()
+        return make_etag(version["version"], request), version["updatedAt"]
+    except Exception as e:
+        logger.warning(f"Catalog version unavailable, serving without validators: {str(e)}")
+        return None, None
+
+async def cached_catalog_read(etag, read):
+    """Catalog snapshot shared across workers; the ETag already encodes catalog version + query"""
+    if not etag:
+        return await read()
+    return await catalog_cache.get_or_compute(etag, read)
+
+def catalog_response(content, etag, last_modified):
+    return cached_json(content, etag, last_modified) if etag else content
+
 @api_router.get("/careers")
-async def get_careers(search: Optional[str] = None, category: Optional[str] = None, limit: int = 50):
-    """Get careers with optional search and filtering"""
+async def get_careers(
+    request: Request,
+    search: Optional[str] = None,
+    category: Optional[str] = None,
+    limit: int = 50,
+    minSalary: Optional[int] = None,
+    maxSalary: Optional[int] = None,
+    minGrowth: Optional[float] = None,
+    maxGrowth: Optional[float] = None,
+    sort: Optional[Literal["salary", "growth", "demand", "title"]] = None,
+    order: Literal["asc", "desc"] = "desc",
+):
+    """Get careers with optional search, salary/growth range filters and sorting"""
     try:
-        careers = await db_service.get_careers(search=search, category=category, limit=limit)
-        return {"success": True, "careers": careers, "count": len(careers)}
+        etag, last_modified = await catalog_validators(request)
+        if etag and is_not_modified(request, etag, last_modified):
+            return not_modified_response(etag, last_modified)
+        careers = await cached_catalog_read(etag, lambda: db_service.get_careers(
+            search=search, category=category, limit=limit, min_salary=minSalary, max_salary=maxSalary,
+            min_growth=minGrowth, max_growth=maxGrowth, sort=sort, order=order,
+        ))
+        return catalog_response({"success": True, "careers": careers, "count": len(careers)}, etag, last_modified)
         
     except Exception as e:
         logger.error(f"Error getting careers: {str(e)}")
@@ -81,26 +345,77 @@ async def get_careers(search: Optional[str] = None, category: Optional[str] = No
 
 # Place categories endpoint BEFORE dynamic id route to avoid shadowing
 @api_router.get("/careers/categories")
-async def get_career_categories():
+async def get_career_categories(request: Request):
     """Get all available career categories"""
     try:
-        categories = await db_service.get_career_categories()
+        etag, last_modified = await catalog_validators(request)
+        if etag and is_not_modified(request, etag, last_modified):
+            return not_modified_response(etag, last_modified)
+        categories = await cached_catalog_read(etag, db_service.get_career_categories)
         logger.info(f"Categories fetched: {categories}")
-        return {"success": True, "categories": categories}
+        return catalog_response({"success": True, "categories": categories}, etag, last_modified)
         
     except Exception as e:
         logger.error(f"Error getting categories: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch career categories")
 
+@api_router.get("/careers/facets")
+async def get_career_facets(
+    request: Request,
+    category: Optional[str] = None,
+    minSalary: Optional[int] = None,
+    maxSalary: Optional[int] = None,
+    minGrowth: Optional[float] = None,
+    maxGrowth: Optional[float] = None,
+):
+    """Category and salary-band counts for the careers matching the given filters"""
+    try:
+        etag, last_modified = await catalog_validators(request)
+        if etag and is_not_modified(request, etag, last_modified):
+            return not_modified_response(etag, last_modified)
+        facets = await cached_catalog_read(etag, lambda: db_service.get_career_facets(
+            category=category, min_salary=minSalary, max_salary=maxSalary, min_growth=minGrowth, max_growth=maxGrowth,
+        ))
+        return catalog_response({"success": True, "facets": facets}, etag, last_modified)
+    except Exception as e:
+        logger.error(f"Error getting career facets: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to fetch career facets")
+
+@api_router.get("/careers/suggest")
+async def suggest_careers(q: str, category: Optional[str] = None, limit: int = 8):
+    """Search-as-you-type: ranked, typo-tolerant title suggestions from the in-process index"""
+    try:
+        results = await db_service.suggest_careers(q, category=category, limit=min(limit, 50))
+        return {"success": True, "suggestions": results}
+    except Exception as e:
+        logger.error(f"Error suggesting careers: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to suggest careers")
+
+@api_router.post("/careers/batch")
+async def get_careers_batch(request: CareerBatchRequest):
+    """Fetch up to 100 careers by id in one query, in request order; unknown ids are marked not found"""
+    try:
+        results = await db_service.get_careers_by_ids(request.ids, fields=request.fields)
+        found = sum(1 for result in results if result["found"])
+        return {"success": True, "results": results, "found": found, "missing": len(results) - found}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error getting careers batch: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to fetch careers")
+
 @api_router.get("/careers/{career_id}")
-async def get_career_detail(career_id: str):
+async def get_career_detail(request: Request, career_id: str):
     """Get detailed information about a specific career"""
     try:
-        career = await db_service.get_career_by_id(career_id)
+        etag, last_modified = await catalog_validators(request)
+        if etag and is_not_modified(request, etag, last_modified):
+            return not_modified_response(etag, last_modified)
+        career = await cached_catalog_read(etag, lambda: db_service.get_career_by_id(career_id))
         if not career:
             raise HTTPException(status_code=404, detail="Career not found")
         
-        return {"success": True, "career": career}
+        return catalog_response({"success": True, "career": career}, etag, last_modified)
         
     except HTTPException:
         raise
@@ -108,6 +423,28 @@ async def get_career_detail(career_id: str):
         logger.error(f"Error getting career detail: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch career details")
 
+@api_router.get("/careers/{career_id}/related")
+async def get_related_careers(request: Request, career_id: str):
+    """Get precomputed related careers for a career"""
+    try:
+        etag, last_modified = await catalog_validators(request)
+        if etag and is_not_modified(request, etag, last_modified):
+            return not_modified_response(etag, last_modified)
+        related = await db_service.get_related_careers(career_id)
+        if related is None:
+            # Not indexed yet (e.g. just ingested); only 404 if the career itself is unknown
+            [lookup] = await db_service.get_careers_by_ids([career_id], fields=["id"])
+            if not lookup["found"]:
+                raise HTTPException(status_code=404, detail="Career not found")
+            related = []
+        return catalog_response({"success": True, "relatedCareers": related, "count": len(related)}, etag, last_modified)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting related careers: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to fetch related careers")
+
 # Legacy resume parser (frontend no longer uses this)
 @api_router.post("/resume/parse")
 async def parse_resume(file: UploadFile = File(...)):
@@ -115,6 +452,10 @@ async def parse_resume(file: UploadFile = File(...)):
         filename = file.filename or "uploaded_file"
         content_type = file.content_type or "application/octet-stream"
         raw_bytes = await file.read()
+        parse_key = cache_key(content_type, Path(filename).suffix.lower(), hashlib.sha256(raw_bytes).hexdigest())
+        cached_text = await parse_cache.get(parse_key)
+        if cached_text is not None:
+            return {"success": True, "filename": filename, "extractedText": cached_text}
         text = ""
         if content_type.startswith("text/") or filename.lower().endswith((".txt", ".md")):
             try:
@@ -122,10 +463,11 @@ async def parse_resume(file: UploadFile = File(...)):
             except Exception:
                 text = raw_bytes.decode("latin-1", errors="replace")
         elif content_type == "application/pdf" or filename.lower().endswith(".pdf"):
-            if not PdfReader:
+            try:
+                from pypdf import PdfReader
+            except ImportError:
                 raise HTTPException(status_code=500, detail="PDF parser not available on server")
-            from pypdf import PdfReader as Reader
-            pdf_reader = Reader(BytesIO(raw_bytes))
+            pdf_reader = PdfReader(BytesIO(raw_bytes))
             pages = []
             for page in pdf_reader.pages:
                 try:
@@ -152,6 +494,7 @@ async def parse_resume(file: UploadFile = File(...)):
         text = (text or "").strip()
         if len(text) > 20000:
             text = text[:20000] + "\n\n[Truncated due to size limit]"
+        await parse_cache.set(parse_key, text)
         return {"success": True, "filename": filename, "extractedText": text}
     except HTTPException:
         raise
@@ -161,10 +504,36 @@ async def parse_resume(file: UploadFile = File(...)):
 
 # Resume & Cover Letter
 @api_router.post("/resume/optimize", response_model=ResumeOptimizationResponse)
-async def optimize_resume(request: ResumeOptimizationRequest):
+async def optimize_resume(request: ResumeOptimizationRequest, http_request: Request = None):
+    budget = deadline_budget(http_request, "optimize")
+    if budget is not None:
+        return await respond_by_deadline(
+            http_request, budget, "optimize", "resume.optimize", request, optimize_resume,
+            lambda: ResumeOptimizationResponse(
+                success=True, message="Resume optimization completed successfully",
+                **ai_service._fallback_resume_optimization(request.dict()),
+            ),
+        )
+    return await run_optimize(request, http_request)
+
+async def run_optimize(request: ResumeOptimizationRequest, http_request: Optional[Request] = None, on_partial=None) -> ResumeOptimizationResponse:
+    """Optimize a resume; with a sessionId and structured jobs only new or changed bullets hit the LLM"""
     try:
         job_info = request.dict()
-        result = await ai_service.optimize_resume(job_info)
+        session_id = job_info.pop("sessionId", None)
+        reused = 0
+        if not job_info.get("jobs") and job_info.get("currentResume"):
+            # Uploaded text that segments cleanly takes the structured (session-cached) path; the sections
+            # without job bullets still go into the prompt as context
+            segmented = jobs_from_text(job_info["currentResume"])
+            if segmented:
+                job_info["jobs"] = segmented
+                job_info["resumeContext"] = context_from_text(job_info["currentResume"])
+                job_info["currentResume"] = None
+        if session_id and job_info.get("jobs"):
+            result, reused = await cancel_on_disconnect(http_request, incremental_optimizer.optimize(job_info, session_id, on_partial), "optimize")
+        else:
+            result = await cancel_on_disconnect(http_request, ai_service.optimize_resume(job_info), "optimize")
         return ResumeOptimizationResponse(
             success=True,
             optimizedContent=result.get("optimizedContent", ""),
@@ -173,8 +542,12 @@ async def optimize_resume(request: ResumeOptimizationRequest):
             bulletEdits=result.get("bulletEdits", []),
             jobEdits=result.get("jobEdits", []),
             proTips=result.get("proTips", []),
+            sessionId=session_id,
+            reusedBullets=reused,
             message="Resume optimization completed successfully"
         )
+    except ClientDisconnected:
+        raise
     except Exception as e:
         logger.error(f"Error optimizing resume: {str(e)}")
         return ResumeOptimizationResponse(
@@ -187,43 +560,213 @@ async def optimize_resume(request: ResumeOptimizationRequest):
             message="Failed to optimize resume. Please try again."
         )
 
+async def jd_keywords(job_description: str, job_title: str, company: str):
+    """JD keyword weights, computed once per posting and reused across its near-duplicates"""
+    match = jd_index.resolve(job_description, job_title, company)
+
+    async def compute():
+        return extract_keywords(match.text, job_title, resume_analyzer.top_keywords)
+
+    keywords = await jd_cache.get_or_compute(cache_key("keywords", match.key, resume_analyzer.top_keywords), compute)
+    return [tuple(item) for item in keywords]
+
+@api_router.post("/resume/segment", response_model=ResumeSegmentResponse)
+async def segment_resume_text(request: ResumeSegmentRequest):
+    """Local split of plain resume text into sections and jobs with confidence scores; no LLM call"""
+    try:
+        result = segment_resume(request.text)
+        return ResumeSegmentResponse(success=True, message="OK", **result)
+    except Exception as e:
+        logger.error(f"Error segmenting resume: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to segment resume")
+
+@api_router.post("/resume/analyze", response_model=ResumeAnalysisResponse)
+async def analyze_resume(request: ResumeAnalysisRequest):
+    """Local ATS keyword-coverage analysis; no LLM call, safe to run on every keystroke"""
+    try:
+        jobs = [job.dict() for job in request.jobs] if request.jobs else None
+        if jobs is None and request.currentResume:
+            jobs = jobs_from_text(request.currentResume)
+        keywords = await jd_keywords(request.jobDescription, request.jobTitle, request.company)
+        result = resume_analyzer.analyze(
+            request.jobDescription,
+            job_title=request.jobTitle,
+            resume_text=request.currentResume,
+            jobs=jobs,
+            keywords=keywords,
+        )
+        return ResumeAnalysisResponse(success=True, message="OK", **result)
+    except Exception as e:
+        logger.error(f"Error analyzing resume: {str(e)}")
+        return ResumeAnalysisResponse(success=False, message="Failed to analyze resume")
+
 @api_router.post("/resume/rewrite-bullet", response_model=RewriteBulletResponse)
-async def rewrite_bullet(request: RewriteBulletRequest):
+async def rewrite_bullet(request: RewriteBulletRequest, http_request: Request = None):
     try:
         job_info = {
             "jobTitle": request.jobTitle,
             "company": request.company,
             "jobDescription": request.jobDescription,
         }
-        data = await ai_service.rewrite_bullet(job_info, request.original, request.context)
+        data = await cancel_on_disconnect(http_request, ai_service.rewrite_bullet(job_info, request.original, request.context), "rewrite-bullet")
         return RewriteBulletResponse(success=True, improved=data["improved"], rationale=data["rationale"], keywords=data.get("keywords", []))
+    except ClientDisconnected:
+        raise
     except Exception as e:
         logger.error(f"Error rewriting bullet: {str(e)}")
         return RewriteBulletResponse(success=False, improved=request.original, rationale="", keywords=[], message="Failed to rewrite")
 
 @api_router.post("/resume/cover-letter", response_model=CoverLetterResponse)
-async def generate_cover_letter(request: CoverLetterRequest):
+async def generate_cover_letter(request: CoverLetterRequest, http_request: Request = None):
+    budget = deadline_budget(http_request, "cover-letter")
+    if budget is not None:
+        return await respond_by_deadline(
+            http_request, budget, "cover-letter", "resume.cover-letter", request, generate_cover_letter,
+            lambda: CoverLetterResponse(
+                success=True, coverLetter=ai_service._fallback_cover_letter(request.dict()),
+                message="Cover letter generated successfully",
+            ),
+        )
     try:
         job_info = {
             "jobTitle": request.jobTitle,
             "company": request.company,
             "jobDescription": request.jobDescription
         }
-        cover_letter = await ai_service.generate_cover_letter(job_info, request.userProfile)
+        cover_letter = await cancel_on_disconnect(http_request, ai_service.generate_cover_letter(job_info, request.userProfile), "cover-letter")
         return CoverLetterResponse(success=True, coverLetter=cover_letter, message="Cover letter generated successfully")
+    except ClientDisconnected:
+        raise
     except Exception as e:
         logger.error(f"Error generating cover letter: {str(e)}")
         return CoverLetterResponse(success=False, coverLetter="", message="Failed to generate cover letter. Please try again.")
 
+async def _ws_optimize(payload, push):
+    return (await run_optimize(ResumeOptimizationRequest(**payload), on_partial=push)).dict()
+
+async def _ws_rewrite_bullet(payload, push):
+    return (await rewrite_bullet(RewriteBulletRequest(**payload))).dict()
+
+async def _ws_cover_letter(payload, push):
+    return (await generate_cover_letter(CoverLetterRequest(**payload))).dict()
+
+RESUME_CHANNEL_OPS = {
+    "optimize": _ws_optimize,
+    "rewrite-bullet": _ws_rewrite_bullet,
+    "cover-letter": _ws_cover_letter,
+}
+
+@api_router.websocket("/ws/resume")
+async def resume_channel(websocket: WebSocket):
+    """Resume Assistant operations multiplexed over one connection; see ResumeChannel for the protocol"""
+    await ResumeChannel(websocket, RESUME_CHANNEL_OPS).run()
+
+def stream_cover_letter_batch(postings, user_profile, batch_id, concurrency):
+    runner = CoverLetterBatchRunner(ai_service, store=cover_letter_batch_cache, concurrency=concurrency or COVER_LETTER_BATCH_CONCURRENCY)
+
+    async def lines():
+        async for record in runner.run(postings, user_profile, batch_id=batch_id):
+            yield json.dumps(record, default=str, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson", headers={"Cache-Control": "no-cache"})
+
+@api_router.post("/resume/cover-letter/batch")
+async def generate_cover_letter_batch(request: CoverLetterBatchRequest):
+    """Cover letters for one profile against many postings, streamed as NDJSON as each completes.
+    The first line carries the batchId; re-send it to resume an interrupted batch."""
+    postings = [posting.dict() for posting in request.postings]
+    return stream_cover_letter_batch(postings, request.userProfile, request.batchId, request.concurrency)
+
+@api_router.post("/resume/cover-letter/batch/upload")
+async def upload_cover_letter_batch(
+    file: UploadFile = File(...),
+    userProfile: Optional[str] = Form(None),
+    batchId: Optional[str] = Form(None),
+    concurrency: Optional[int] = Form(None),
+):
+    """Same as /resume/cover-letter/batch with postings from a CSV or NDJSON file"""
+    try:
+        fmt = detect_format(file.filename)
+        profile = json.loads(userProfile) if userProfile else None
+        postings, errors = read_postings(TextIOWrapper(file.file, encoding="utf-8", newline=""), fmt)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if errors:
+        raise HTTPException(status_code=422, detail=errors[:20])
+    if not postings or len(postings) > MAX_BATCH_POSTINGS:
+        raise HTTPException(status_code=422, detail=f"A batch needs between 1 and {MAX_BATCH_POSTINGS} postings")
+    return stream_cover_letter_batch(postings, profile, batchId, concurrency)
+
+# Async jobs for long-running AI generations
+@api_router.post("/jobs", status_code=202)
+async def submit_job(request: JobSubmitRequest):
+    """Queue an AI generation and return its job id immediately"""
+    job_type = JOB_TYPES.get(request.type)
+    if not job_type:
+        raise HTTPException(status_code=400, detail=f"Unknown job type. Supported: {', '.join(sorted(JOB_TYPES))}")
+    request_model, _ = job_type
+    # Validate up front so bad payloads fail now rather than inside a worker
+    try:
+        payload = request_model(**request.payload).dict()
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+    try:
+        job = await job_queue.submit(request.type, payload)
+        return {"success": True, "jobId": job["_id"], "status": job["status"]}
+    except Exception as e:
+        logger.error(f"Error submitting job: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to submit job")
+
+@api_router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Poll a job's status and result"""
+    job = await job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"success": True, "job": public_job(job)}
+
+@api_router.get("/jobs/{job_id}/stream")
+async def stream_job(job_id: str):
+    """Server-sent events with the job's status until it finishes"""
+    job = await job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def events():
+        current = job
+        last_status = None
+        deadline = asyncio.get_running_loop().time() + JOB_STREAM_TIMEOUT
+        while True:
+            if current["status"] != last_status:
+                last_status = current["status"]
+                data = json.dumps(public_job(current), default=str)
+                yield f"event: {last_status}\ndata: {data}\n\n"
+            if last_status in TERMINAL_STATES or asyncio.get_running_loop().time() > deadline:
+                return
+            await job_queue.wait_for_change(timeout=1.0)
+            current = await job_queue.get(job_id) or current
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
 @api_router.post("/careers/recommend", response_model=CareerRecommendationResponse)
-async def get_career_recommendations(request: CareerRecommendationRequest):
+async def get_career_recommendations(request: CareerRecommendationRequest, http_request: Request):
     try:
         careers = await db_service.get_careers(limit=100)
         recommendations = []
         match_scores = {}
         user_profile_dict = request.userProfile.dict()
-        for career in careers[:10]:
-            match_score = await ai_service.analyze_career_match(user_profile_dict, career)
+        # Shortlist by canonical skill overlap before spending LLM calls on the candidates
+        with span("recommend.shortlist", careers=len(careers)):
+            taxonomy = get_taxonomy()
+            profile_skill_ids = taxonomy.normalize_all(user_profile_dict.get("skills") or [])
+            careers.sort(key=lambda career: -taxonomy.overlap(profile_skill_ids, career.get("skillIds") or []))
+            candidates = careers[:10]
+        # Score candidates concurrently (bounded by the AI concurrency limit); a disconnect cancels them all
+        with span("recommend.score", candidates=len(candidates)):
+            scores = await cancel_on_disconnect(http_request, asyncio.gather(
+                *(ai_service.analyze_career_match(user_profile_dict, career) for career in candidates)
+            ), "recommend")
+        for career, match_score in zip(candidates, scores):
             match_scores[career["id"]] = match_score
             if match_score >= 60:
                 recommendations.append({
@@ -236,13 +779,68 @@ async def get_career_recommendations(request: CareerRecommendationRequest):
                     ]
                 })
         recommendations.sort(key=lambda x: x["matchScore"], reverse=True)
-        return CareerRecommendationResponse(success=True, recommendations=recommendations[:5], matchScores=match_scores, message="Career recommendations generated successfully")
+        with span("recommend.validate", recommendations=len(recommendations)):
+            return CareerRecommendationResponse(success=True, recommendations=recommendations[:5], matchScores=match_scores, message="Career recommendations generated successfully")
+    except ClientDisconnected:
+        raise
     except Exception as e:
         logger.error(f"Error generating recommendations: {str(e)}")
         return CareerRecommendationResponse(success=False, recommendations=[], matchScores={}, message="Failed to generate career recommendations. Please try again.")
 
+# Job type -> (request model, handler); handlers reuse the synchronous endpoints
+JOB_TYPES = {
+    "identity.generate": (IdentityGenerationRequest, generate_identity),
+    "resume.optimize": (ResumeOptimizationRequest, optimize_resume),
+    "resume.rewrite-bullet": (RewriteBulletRequest, rewrite_bullet),
+    "resume.cover-letter": (CoverLetterRequest, generate_cover_letter),
+}
+
+def make_job_handler(job_type, request_model, endpoint):
+    async def handler(payload):
+        with tracer.start_trace(f"job {job_type}", jobType=job_type):
+            response = await endpoint(request_model(**payload))
+            return response.dict()
+    return handler
+
+for _job_type, (_request_model, _endpoint) in JOB_TYPES.items():
+    job_queue.register(_job_type, make_job_handler(_job_type, _request_model, _endpoint))
+
 app.include_router(api_router)
 
+def route_template(request: Request) -> Optional[str]:
+    """Path template of the route a request will match (middleware runs before routing)"""
+    for route in request.app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return route.path
+    return None
+
+@app.middleware("http")
+async def shed_when_lagging(request: Request, call_next):
+    # Low-priority work is refused while the loop is behind, instead of making every request time out
+    path = request.url.path
+    if not admission.admit(path, route_template(request) if admission.is_low_priority(path) else None):
+        return JSONResponse(
+            status_code=503,
+            content={"success": False, "message": "Server busy, please retry shortly"},
+            headers={"Retry-After": "5"},
+        )
+    return await call_next(request)
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    # Continues an incoming W3C traceparent, otherwise starts a head-sampled trace for the request
+    with tracer.start_trace(f"{request.method} {request.url.path}", traceparent=request.headers.get("traceparent"),
+                            **{"http.method": request.method, "http.path": request.url.path}) as root:
+        response = await call_next(request)
+        route = request.scope.get("route")
+        if route is not None:
+            root.name = f"{request.method} {route.path}"
+        root.set(**{"http.status": response.status_code})
+        # Lets a user-reported slow request be found in the trace export
+        response.headers["X-Trace-Id"] = root.trace_id
+        return response
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=False,
@@ -251,6 +849,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(ClientDisconnected)
+async def client_disconnected_handler(request, exc):
+    # Nobody is listening; 499 keeps these out of 5xx error rates in access logs
+    return Response(status_code=499)
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     logger.error(f"Global exception: {str(exc)}")
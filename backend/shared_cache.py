@@ -0,0 +1,272 @@
+import os
+import json
+import time
+import sqlite3
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Optional, Callable, Awaitable
+
+from metrics import Counters
+
+logger = logging.getLogger(__name__)
+
+# Per-process unless SHARED_CACHE_URL names a store; a sqlite file must be given explicitly, in a
+# directory only this app can write to
+DEFAULT_CACHE_URL = "memory://"
+DEFAULT_TTL = 3600
+DEFAULT_MAX_ENTRIES = 10000
+
+
+def _json_default(value):
+    # Match FastAPI's encoding so cached and fresh responses serialize identically
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def cache_key(*parts: Any) -> str:
+    """Stable digest of arbitrary JSON-able key parts"""
+    raw = json.dumps(parts, sort_keys=True, default=_json_default, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class SQLiteCacheBackend:
+    """File-backed store shared by every worker process on the host. WAL mode lets readers run
+    concurrently with a writer; each process funnels its own access through one thread."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shared-cache")
+        self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            # Cached responses may hold user data, so the file is created private to this user
+            os.close(os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600))
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries (namespace TEXT, generation INTEGER, key TEXT, value BLOB, "
+                "expires_at REAL, accessed_at REAL, PRIMARY KEY (namespace, key))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries (namespace, accessed_at)")
+            conn.execute("CREATE TABLE IF NOT EXISTS generations (namespace TEXT PRIMARY KEY, generation INTEGER)")
+            self._conn = conn
+        return self._conn
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    def _generation(self, conn, namespace: str) -> int:
+        row = conn.execute("SELECT generation FROM generations WHERE namespace = ?", (namespace,)).fetchone()
+        return row[0] if row else 0
+
+    def _get(self, namespace: str, key: str) -> Optional[bytes]:
+        conn = self._connect()
+        now = time.time()
+        row = conn.execute(
+            "SELECT e.value, e.accessed_at FROM entries e LEFT JOIN generations g ON g.namespace = e.namespace "
+            "WHERE e.namespace = ? AND e.key = ? AND e.generation = COALESCE(g.generation, 0) AND e.expires_at > ?",
+            (namespace, key, now),
+        ).fetchone()
+        if row is None:
+            return None
+        # Coarse LRU: touching every read would turn reads into writes
+        if now - row[1] > 60:
+            conn.execute("UPDATE entries SET accessed_at = ? WHERE namespace = ? AND key = ?", (now, namespace, key))
+        return row[0]
+
+    def _set(self, namespace: str, key: str, value: bytes, ttl: float, max_entries: int) -> None:
+        conn = self._connect()
+        now = time.time()
+        generation = self._generation(conn, namespace)
+        conn.execute(
+            "INSERT OR REPLACE INTO entries (namespace, generation, key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (namespace, generation, key, value, now + ttl, now),
+        )
+        count = conn.execute("SELECT COUNT(*) FROM entries WHERE namespace = ?", (namespace,)).fetchone()[0]
+        # Evict in chunks once 10% over the limit: expired and stale-generation rows first, then LRU
+        if count > max_entries * 1.1:
+            conn.execute(
+                "DELETE FROM entries WHERE namespace = ? AND (expires_at <= ? OR generation != ?)",
+                (namespace, now, generation),
+            )
+            conn.execute(
+                "DELETE FROM entries WHERE namespace = ? AND key IN (SELECT key FROM entries WHERE namespace = ? "
+                "ORDER BY accessed_at ASC LIMIT MAX(0, (SELECT COUNT(*) FROM entries WHERE namespace = ?) - ?))",
+                (namespace, namespace, namespace, max_entries),
+            )
+
+    def _invalidate(self, namespace: str) -> int:
+        conn = self._connect()
+        conn.execute(
+            "INSERT INTO generations (namespace, generation) VALUES (?, 1) "
+            "ON CONFLICT(namespace) DO UPDATE SET generation = generation + 1",
+            (namespace,),
+        )
+        conn.execute("DELETE FROM entries WHERE namespace = ?", (namespace,))
+        return self._generation(conn, namespace)
+
+    async def get(self, namespace: str, key: str) -> Optional[bytes]:
+        return await self._run(self._get, namespace, key)
+
+    async def set(self, namespace: str, key: str, value: bytes, ttl: float, max_entries: int) -> None:
+        await self._run(self._set, namespace, key, value, ttl, max_entries)
+
+    async def invalidate(self, namespace: str) -> int:
+        return await self._run(self._invalidate, namespace)
+
+
+class RedisCacheBackend:
+    """Redis (or any Redis-protocol server). Entries carry their TTL; a per-namespace sorted set
+    of access times bounds the entry count. Requires the optional redis package."""
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis_asyncio
+        self.redis = redis_asyncio.from_url(url)
+
+    async def _generation(self, namespace: str) -> int:
+        value = await self.redis.get(f"cachegen:{namespace}")
+        return int(value) if value else 0
+
+    async def get(self, namespace: str, key: str) -> Optional[bytes]:
+        generation = await self._generation(namespace)
+        return await self.redis.get(f"cache:{namespace}:{generation}:{key}")
+
+    async def set(self, namespace: str, key: str, value: bytes, ttl: float, max_entries: int) -> None:
+        generation = await self._generation(namespace)
+        full_key = f"cache:{namespace}:{generation}:{key}"
+        lru_key = f"cachelru:{namespace}:{generation}"
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.set(full_key, value, ex=max(1, int(ttl)))
+            pipe.zadd(lru_key, {full_key: time.time()})
+            pipe.expire(lru_key, max(1, int(ttl)))
+            pipe.zcard(lru_key)
+            *_, count = await pipe.execute()
+        if count > max_entries * 1.1:
+            stale = await self.redis.zrange(lru_key, 0, count - max_entries - 1)
+            if stale:
+                await self.redis.delete(*stale)
+                await self.redis.zrem(lru_key, *stale)
+
+    async def invalidate(self, namespace: str) -> int:
+        # Old-generation keys become unreachable and age out via their TTL
+        return int(await self.redis.incr(f"cachegen:{namespace}"))
+
+
+class MemoryCacheBackend:
+    """Per-process store (SHARED_CACHE_URL=memory://, the default) for tests and single-worker runs"""
+
+    def __init__(self):
+        self.namespaces: Dict[str, OrderedDict] = {}
+
+    async def get(self, namespace: str, key: str) -> Optional[bytes]:
+        entries = self.namespaces.get(namespace)
+        item = entries.get(key) if entries else None
+        if item is None or item[1] <= time.time():
+            return None
+        entries.move_to_end(key)
+        return item[0]
+
+    async def set(self, namespace: str, key: str, value: bytes, ttl: float, max_entries: int) -> None:
+        entries = self.namespaces.setdefault(namespace, OrderedDict())
+        entries[key] = (value, time.time() + ttl)
+        entries.move_to_end(key)
+        while len(entries) > max_entries:
+            entries.popitem(last=False)
+
+    async def invalidate(self, namespace: str) -> int:
+        self.namespaces.pop(namespace, None)
+        return 0
+
+
+def create_backend(url: str):
+    if url.startswith("memory://"):
+        return MemoryCacheBackend()
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisCacheBackend(url)
+    if url.startswith("sqlite:///"):
+        return SQLiteCacheBackend(url[len("sqlite:///"):])
+    raise ValueError(f"Unsupported SHARED_CACHE_URL: {url}")
+
+
+class CacheNamespace:
+    """A named slice of the shared cache with its own TTL, size bound and invalidation"""
+
+    def __init__(self, cache: "SharedCache", name: str, ttl: float, max_entries: int):
+        self.cache = cache
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    async def get(self, key: str) -> Any:
+        if self.cache.backend is None:
+            return None
+        try:
+            raw = await self.cache.backend.get(self.name, key)
+        except Exception as e:
+            logger.warning(f"Shared cache get failed ({self.name}): {str(e)}")
+            self.cache.counters.incr(f"{self.name}.errors")
+            return None
+        self.cache.counters.incr(f"{self.name}.{'hits' if raw is not None else 'misses'}")
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: Any) -> None:
+        if self.cache.backend is None:
+            return
+        try:
+            raw = json.dumps(value, default=_json_default, ensure_ascii=False).encode("utf-8")
+            await self.cache.backend.set(self.name, key, raw, self.ttl, self.max_entries)
+        except Exception as e:
+            logger.warning(f"Shared cache set failed ({self.name}): {str(e)}")
+            self.cache.counters.incr(f"{self.name}.errors")
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        value = await self.get(key)
+        if value is None:
+            value = await compute()
+            if value is not None:
+                await self.set(key, value)
+        return value
+
+    async def invalidate(self) -> None:
+        """Drop every entry in this namespace, in all worker processes"""
+        if self.cache.backend is not None:
+            await self.cache.backend.invalidate(self.name)
+
+
+class SharedCache:
+    """Cache tier shared across uvicorn worker processes. Configure with SHARED_CACHE_URL
+    (sqlite:///path, redis://host, memory:// (default) or none); per-namespace TTL and size come from
+    SHARED_CACHE_<NAMESPACE>_TTL / SHARED_CACHE_<NAMESPACE>_MAX_ENTRIES."""
+
+    def __init__(self, url: Optional[str] = None):
+        self.url = url or os.environ.get("SHARED_CACHE_URL", DEFAULT_CACHE_URL)
+        self.counters = Counters()
+        self.namespaces: Dict[str, CacheNamespace] = {}
+        try:
+            self.backend = None if self.url == "none" else create_backend(self.url)
+        except Exception as e:
+            logger.warning(f"Shared cache disabled: {str(e)}")
+            self.backend = None
+
+    def namespace(self, name: str, ttl: float = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES) -> CacheNamespace:
+        if name not in self.namespaces:
+            env = name.upper().replace("-", "_")
+            ttl = float(os.environ.get(f"SHARED_CACHE_{env}_TTL", ttl))
+            max_entries = int(os.environ.get(f"SHARED_CACHE_{env}_MAX_ENTRIES", max_entries))
+            self.namespaces[name] = CacheNamespace(self, name, ttl, max_entries)
+        return self.namespaces[name]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": type(self.backend).__name__ if self.backend else None,
+            "namespaces": {n: {"ttl": ns.ttl, "maxEntries": ns.max_entries} for n, ns in self.namespaces.items()},
+            "counters": self.counters.snapshot(),
+        }
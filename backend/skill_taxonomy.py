@@ -0,0 +1,156 @@
+import re
+import json
+import logging
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Iterable, Set, Tuple
+
+from resume_analyzer import tokenize, STOPWORDS
+
+logger = logging.getLogger(__name__)
+
+TAXONOMY_PATH = Path(__file__).parent / "data" / "skill_taxonomy.json"
+# Composite labels like "HTML/CSS", "SEO/SEM" or "Python, SQL" list several skills
+COMPOSITE_SEPARATOR = re.compile(r"\s*(?:/|,|;|&|\+|\band\b)\s*")
+# Credit for matching a skill's parent (e.g. React vs. Frontend Development) instead of the skill
+PARENT_CREDIT = 0.5
+_END = object()
+
+
+def normalize_label(value: str) -> Tuple[str, ...]:
+    return tuple(tokenize(value))
+
+
+class SkillTaxonomy:
+    """Canonical skills with integer ids, synonyms and parent links. Labels resolve through a hash
+    of normalized token sequences; free text is scanned with a token trie (longest match wins)."""
+
+    def __init__(self, skills: Iterable[Dict[str, Any]], version: Any = None):
+        self.version = version
+        self.names: Dict[int, str] = {}
+        self.slugs: Dict[str, int] = {}
+        self.parents: Dict[int, Optional[int]] = {}
+        self.labels: Dict[Tuple[str, ...], int] = {}
+        self.trie: Dict[Any, Any] = {}
+        skills = list(skills)
+        for skill in skills:
+            self.names[skill["id"]] = skill["name"]
+            self.slugs[skill["slug"]] = skill["id"]
+        for skill in skills:
+            skill_id = skill["id"]
+            self.parents[skill_id] = self.slugs.get(skill["parent"]) if skill.get("parent") else None
+            for label in [skill["name"], skill["slug"].replace("-", " ")] + list(skill.get("synonyms") or []):
+                tokens = normalize_label(label)
+                if not tokens:
+                    continue
+                self.labels.setdefault(tokens, skill_id)
+                # Short or ambiguous single words ("go", "r", "node") only count as an exact label
+                if len(tokens) == 1 and (skill.get("exactOnly") or len(tokens[0]) <= 2 or tokens[0] in STOPWORDS):
+                    continue
+                node = self.trie
+                for token in tokens:
+                    node = node.setdefault(token, {})
+                node.setdefault(_END, skill_id)
+        self._ancestors: Dict[int, Tuple[int, ...]] = {sid: self._walk_up(sid) for sid in self.names}
+
+    @classmethod
+    def load(cls, path: Path = TAXONOMY_PATH) -> "SkillTaxonomy":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        taxonomy = cls(data["skills"], version=data.get("version"))
+        logger.info(f"Loaded skill taxonomy v{taxonomy.version}: {len(taxonomy.names)} skills")
+        return taxonomy
+
+    def _walk_up(self, skill_id: int) -> Tuple[int, ...]:
+        chain = []
+        parent = self.parents.get(skill_id)
+        while parent is not None and parent not in chain:
+            chain.append(parent)
+            parent = self.parents.get(parent)
+        return tuple(chain)
+
+    def ancestors(self, skill_id: int) -> Tuple[int, ...]:
+        return self._ancestors.get(skill_id, ())
+
+    def name(self, skill_id: int) -> str:
+        return self.names.get(skill_id, "")
+
+    def extract(self, text: str) -> List[int]:
+        """Skill ids mentioned anywhere in free text, in order of first mention"""
+        tokens = tokenize(text)
+        found: List[int] = []
+        i = 0
+        while i < len(tokens):
+            node, match, match_end = self.trie, None, i
+            for j in range(i, len(tokens)):
+                node = node.get(tokens[j])
+                if node is None:
+                    break
+                if _END in node:
+                    match, match_end = node[_END], j + 1
+            if match is not None:
+                if match not in found:
+                    found.append(match)
+                i = match_end
+            else:
+                i += 1
+        return found
+
+    def normalize(self, label: str) -> List[int]:
+        """Skill ids for one skill label: an exact synonym, its composite parts, or mentions within it"""
+        tokens = normalize_label(label)
+        if not tokens:
+            return []
+        if tokens in self.labels:
+            return [self.labels[tokens]]
+        parts = [p for p in COMPOSITE_SEPARATOR.split(label) if p]
+        if len(parts) > 1:
+            ids = []
+            for part in parts:
+                ids.extend(i for i in self.normalize(part) if i not in ids)
+            if ids:
+                return ids
+        return self.extract(label)
+
+    def normalize_all(self, labels: Iterable[str]) -> List[int]:
+        ids: List[int] = []
+        for label in labels or []:
+            ids.extend(i for i in self.normalize(label) if i not in ids)
+        return ids
+
+    def expand(self, skill_ids: Iterable[int]) -> Set[int]:
+        """The skills plus every ancestor, for matching at a coarser level"""
+        expanded = set()
+        for skill_id in skill_ids:
+            expanded.add(skill_id)
+            expanded.update(self.ancestors(skill_id))
+        return expanded
+
+    def overlap(self, have: Iterable[int], want: Iterable[int]) -> float:
+        """Fraction of the wanted skills covered: full credit for the skill itself or a more specific
+        one (e.g. TypeScript covers JavaScript), partial credit for a shared parent"""
+        want = list(dict.fromkeys(want))
+        if not want:
+            return 0.0
+        have = set(have)
+        have_with_ancestors = self.expand(have)
+        have_parents = {p for skill_id in have for p in self.ancestors(skill_id)[:1]}
+        score = 0.0
+        for skill_id in want:
+            if skill_id in have_with_ancestors:
+                score += 1.0
+            else:
+                parent = self.parents.get(skill_id)
+                if parent is not None and (parent in have or parent in have_parents):
+                    score += PARENT_CREDIT
+        return score / len(want)
+
+
+_taxonomy: Optional[SkillTaxonomy] = None
+
+
+def get_taxonomy() -> SkillTaxonomy:
+    """Process-wide taxonomy, loaded on first use"""
+    global _taxonomy
+    if _taxonomy is None:
+        _taxonomy = SkillTaxonomy.load()
+    return _taxonomy
@@ -0,0 +1,324 @@
+import os
+import json
+import time
+import asyncio
+import queue
+import random
+import secrets
+import logging
+import threading
+import urllib.request
+import logging.handlers
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, Optional, List, Iterator
+
+from metrics import Counters
+
+logger = logging.getLogger(__name__)
+
+# Share of traces that are recorded. An incoming traceparent keeps its trace id, but its sampled flag
+# only decides recording when callers are trusted (e.g. behind a gateway that sets it); otherwise any
+# client could force every request to be recorded
+TRACE_SAMPLE_RATE = float(os.environ.get("TRACE_SAMPLE_RATE", "0.1"))
+TRACE_TRUST_INCOMING = os.environ.get("TRACE_TRUST_INCOMING", "0").lower() in ("1", "true", "yes")
+# jsonl (default), otlp or none; setting OTEL_EXPORTER_OTLP_ENDPOINT alone selects otlp
+TRACE_EXPORTER = os.environ.get("TRACE_EXPORTER", "")
+LOG_DIR = os.environ.get("LOG_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs"))
+TRACE_FILE = os.environ.get("TRACE_FILE", os.path.join(LOG_DIR, "traces.jsonl"))
+TRACE_FILE_MAX_BYTES = int(os.environ.get("TRACE_FILE_MAX_BYTES", str(10 * 1024 * 1024)))
+TRACE_FILE_BACKUPS = int(os.environ.get("TRACE_FILE_BACKUPS", "5"))
+OTLP_ENDPOINT = os.environ.get("OTEL_EXPORTER_OTLP_ENDPOINT", "")
+OTLP_HEADERS = os.environ.get("OTEL_EXPORTER_OTLP_HEADERS", "")
+SERVICE_NAME = os.environ.get("OTEL_SERVICE_NAME", "careerpath-api")
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+class Span:
+    """One timed operation in a trace. Unsampled spans carry ids (for propagation) but record nothing."""
+
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "sampled", "attributes", "status",
+                 "start_ns", "end_ns", "_started")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], sampled: bool,
+                 attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.attributes = dict(attributes or {}) if sampled else {}
+        self.status = "ok"
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self._started = time.perf_counter()
+
+    def set(self, **attributes: Any) -> None:
+        if self.sampled:
+            self.attributes.update(attributes)
+
+    def finish(self) -> None:
+        self.end_ns = self.start_ns + int((time.perf_counter() - self._started) * 1e9)
+
+    @property
+    def duration_ms(self) -> float:
+        return round((self.end_ns - self.start_ns) / 1e6, 3)
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentId": self.parent_id,
+            "name": self.name,
+            "startNs": self.start_ns,
+            "durationMs": self.duration_ms,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+def parse_traceparent(header: Optional[str]):
+    """(trace_id, parent_span_id, sampled) from a W3C traceparent header, or None if malformed"""
+    parts = (header or "").strip().split("-")
+    if len(parts) < 4 or len(parts[1]) != 32 or len(parts[2]) != 16 or len(parts[3]) != 2:
+        return None
+    try:
+        int(parts[1], 16), int(parts[2], 16)
+        flags = int(parts[3], 16)
+    except ValueError:
+        return None
+    if parts[1] == "0" * 32 or parts[2] == "0" * 16:
+        return None
+    return parts[1], parts[2], bool(flags & 1)
+
+
+class JsonlExporter:
+    """Appends one JSON span per line to a size-rotated file. Writes happen on a listener thread,
+    so exporting never blocks the event loop."""
+
+    name = "jsonl"
+
+    def __init__(self, path: str = TRACE_FILE, max_bytes: int = TRACE_FILE_MAX_BYTES, backups: int = TRACE_FILE_BACKUPS):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, mode=0o750, exist_ok=True)
+        handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._listener = logging.handlers.QueueListener(self._queue, handler)
+        self._listener.start()
+        self._handler = handler
+        self._logger = logging.getLogger(f"{__name__}.spans")
+        self._logger.propagate = False
+        self._logger.setLevel(logging.INFO)
+        self._logger.handlers = [logging.handlers.QueueHandler(self._queue)]
+
+    def export(self, span: Span) -> bool:
+        self._logger.info(json.dumps(span.to_dict(), default=str, ensure_ascii=False))
+        return True
+
+    def shutdown(self) -> None:
+        self._listener.stop()
+        self._handler.close()
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OtlpExporter:
+    """Batches spans and POSTs them as OTLP/JSON to <endpoint>/v1/traces from a daemon thread.
+    When the collector falls behind, spans beyond the queue limit are dropped and counted."""
+
+    name = "otlp"
+
+    def __init__(self, endpoint: str = OTLP_ENDPOINT, headers: str = OTLP_HEADERS, batch_size: int = 512,
+                 interval: float = 5.0, max_queue: int = 8192, timeout: float = 10.0):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.headers = {"Content-Type": "application/json"}
+        for pair in filter(None, (h.strip() for h in headers.split(","))):
+            key, _, value = pair.partition("=")
+            self.headers[key.strip()] = value.strip()
+        self.batch_size = batch_size
+        self.interval = interval
+        self.timeout = timeout
+        self.failures = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="otlp-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, span: Span) -> bool:
+        try:
+            self._queue.put_nowait(span)
+            return True
+        except queue.Full:
+            return False
+
+    def _drain(self) -> List[Span]:
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            while self._post(self._drain()) == self.batch_size:
+                pass
+        # Final flush on shutdown
+        while self._post(self._drain()):
+            pass
+
+    def _post(self, spans: List[Span]) -> int:
+        if not spans:
+            return 0
+        body = json.dumps({"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+            "scopeSpans": [{"scope": {"name": "careerpath"}, "spans": [self._otlp_span(s) for s in spans]}],
+        }]}, default=str).encode("utf-8")
+        try:
+            request = urllib.request.Request(self.url, data=body, headers=self.headers, method="POST")
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+        except Exception as e:
+            self.failures += 1
+            logger.warning(f"OTLP export of {len(spans)} spans failed: {str(e)}")
+        return len(spans)
+
+    @staticmethod
+    def _otlp_span(span: Span) -> Dict[str, Any]:
+        return {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "parentSpanId": span.parent_id or "",
+            "name": span.name,
+            # SERVER for the request root, INTERNAL for everything below it
+            "kind": 2 if span.attributes.get("http.method") else 1,
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in span.attributes.items() if v is not None],
+            "status": {"code": 2 if span.status == "error" else 1},
+        }
+
+    def shutdown(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=self.timeout)
+
+
+class Tracer:
+    """Head-sampled tracing over contextvars. A trace starts at the edge (HTTP middleware, WebSocket
+    op, background job); span() anywhere below it nests under the current span, and is a no-op when
+    there is no trace or the trace was not sampled."""
+
+    def __init__(self, exporter=None, sample_rate: float = TRACE_SAMPLE_RATE, trust_incoming: bool = TRACE_TRUST_INCOMING):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.trust_incoming = trust_incoming
+        self.counters = Counters()
+
+    def configure(self, exporter=None, sample_rate: Optional[float] = None) -> None:
+        if self.exporter is not None:
+            self.exporter.shutdown()
+        self.exporter = exporter
+        if sample_rate is not None:
+            self.sample_rate = sample_rate
+
+    @contextmanager
+    def start_trace(self, name: str, traceparent: Optional[str] = None, **attributes: Any) -> Iterator[Span]:
+        parent = parse_traceparent(traceparent)
+        if parent:
+            trace_id, parent_id, sampled = parent
+            if not self.trust_incoming:
+                sampled = random.random() < self.sample_rate
+        else:
+            trace_id, parent_id = secrets.token_hex(16), None
+            sampled = random.random() < self.sample_rate
+        sampled = sampled and self.exporter is not None
+        self.counters.incr("traces.sampled" if sampled else "traces.unsampled")
+        with self._activate(Span(name, trace_id, parent_id, sampled, attributes)) as span:
+            yield span
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span]:
+        parent = _current_span.get()
+        if parent is None or not parent.sampled:
+            yield _NOOP_SPAN
+            return
+        with self._activate(Span(name, parent.trace_id, parent.span_id, True, attributes)) as span:
+            yield span
+
+    @contextmanager
+    def _activate(self, span: Span) -> Iterator[Span]:
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "cancelled" if isinstance(e, asyncio.CancelledError) else "error"
+            span.set(error=type(e).__name__)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.finish()
+            if span.sampled:
+                self._export(span)
+
+    def _export(self, span: Span) -> None:
+        try:
+            exported = self.exporter.export(span)
+        except Exception as e:
+            exported = False
+            logger.warning(f"Span export failed: {str(e)}")
+        self.counters.incr("spans.exported" if exported else "spans.dropped")
+
+    def shutdown(self) -> None:
+        if self.exporter is not None:
+            self.exporter.shutdown()
+            self.exporter = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "exporter": self.exporter.name if self.exporter else None,
+            "sampleRate": self.sample_rate,
+            "trustIncoming": self.trust_incoming,
+            "counters": self.counters.snapshot(),
+        }
+
+
+_NOOP_SPAN = Span("noop", "0" * 32, None, False)
+tracer = Tracer()
+
+
+def span(name: str, **attributes: Any):
+    """Child span of the current trace; use as `with span("db.get_careers") as s: s.set(...)`"""
+    return tracer.span(name, **attributes)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def exporter_from_env():
+    """The span exporter selected by TRACE_EXPORTER / OTEL_EXPORTER_OTLP_ENDPOINT, or None"""
+    kind = (TRACE_EXPORTER or ("otlp" if OTLP_ENDPOINT else "jsonl")).lower()
+    if kind == "none":
+        return None
+    if kind == "otlp":
+        if not OTLP_ENDPOINT:
+            logger.warning("TRACE_EXPORTER=otlp but OTEL_EXPORTER_OTLP_ENDPOINT is not set; tracing disabled")
+            return None
+        return OtlpExporter()
+    return JsonlExporter()
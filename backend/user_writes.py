@@ -0,0 +1,313 @@
+import os
+import time
+import asyncio
+import logging
+from copy import deepcopy
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Callable, Awaitable, Tuple
+
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from metrics import Counters, LatencyWindow
+
+logger = logging.getLogger(__name__)
+
+# 0 writes every user update through immediately (same code path, no coalescing window)
+USER_WRITE_BEHIND = os.environ.get("USER_WRITE_BEHIND", "1").lower() not in ("0", "false", "no")
+USER_WRITE_FLUSH_INTERVAL = float(os.environ.get("USER_WRITE_FLUSH_INTERVAL", "1.0"))
+# A flush starts early once this many users have pending updates
+USER_WRITE_FLUSH_MAX_USERS = int(os.environ.get("USER_WRITE_FLUSH_MAX_USERS", "500"))
+# A user's update that Mongo rejects this many times is dropped (and logged) instead of retried forever
+USER_WRITE_MAX_ATTEMPTS = int(os.environ.get("USER_WRITE_MAX_ATTEMPTS", "5"))
+
+
+def _set_path(doc: Dict[str, Any], path: str, value: Any) -> None:
+    *parents, leaf = path.split(".")
+    for part in parents:
+        child = doc.get(part)
+        if not isinstance(child, dict):
+            child = doc[part] = {}
+        doc = child
+    doc[leaf] = value
+
+
+class PendingUpdate:
+    """Coalesced changes for one user: $set fields (dotted paths allowed) plus per-array-field
+    $addToSet/$pull values. Later changes win; adding then removing the same value cancels out."""
+
+    __slots__ = ("set", "add", "pull", "changes", "updated_at", "attempts")
+
+    def __init__(self):
+        self.set: Dict[str, Any] = {}
+        self.add: Dict[str, List[Any]] = {}
+        self.pull: Dict[str, List[Any]] = {}
+        self.changes = 0
+        self.updated_at: Optional[datetime] = None
+        # Flushes in which Mongo rejected one of this update's operations
+        self.attempts = 0
+
+    def _touch(self, when: Optional[datetime] = None) -> None:
+        self.changes += 1
+        self.updated_at = max(filter(None, (self.updated_at, when or datetime.utcnow())))
+
+    def set_fields(self, fields: Dict[str, Any], when: Optional[datetime] = None) -> None:
+        for key, value in fields.items():
+            # Mongo rejects a $set that names both a path and its parent, so fold them together here
+            for pending in [k for k in self.set if k.startswith(key + ".")]:
+                del self.set[pending]
+            parent = next((k for k in self.set if key.startswith(k + ".") and isinstance(self.set[k], dict)), None)
+            if parent is not None:
+                _set_path(self.set[parent], key[len(parent) + 1:], deepcopy(value))
+            else:
+                self.set[key] = deepcopy(value)
+            self.add.pop(key, None)
+            self.pull.pop(key, None)
+        self._touch(when)
+
+    def add_to_set(self, field: str, value: Any, when: Optional[datetime] = None) -> None:
+        if isinstance(self.set.get(field), list):
+            if value not in self.set[field]:
+                self.set[field].append(value)
+        else:
+            if value in self.pull.get(field, []):
+                self.pull[field].remove(value)
+            values = self.add.setdefault(field, [])
+            if value not in values:
+                values.append(value)
+        self._touch(when)
+
+    def pull_value(self, field: str, value: Any, when: Optional[datetime] = None) -> None:
+        if isinstance(self.set.get(field), list):
+            self.set[field] = [v for v in self.set[field] if v != value]
+        else:
+            if value in self.add.get(field, []):
+                self.add[field].remove(value)
+            values = self.pull.setdefault(field, [])
+            if value not in values:
+                values.append(value)
+        self._touch(when)
+
+    def merge(self, newer: "PendingUpdate") -> "PendingUpdate":
+        """This (older) update with a newer one applied on top"""
+        changes = self.changes + newer.changes
+        self.set_fields(newer.set, newer.updated_at)
+        for field, values in newer.pull.items():
+            for value in values:
+                self.pull_value(field, value, newer.updated_at)
+        for field, values in newer.add.items():
+            for value in values:
+                self.add_to_set(field, value, newer.updated_at)
+        self.changes = changes
+        return self
+
+    def operations(self, user_id: str) -> List[UpdateOne]:
+        """One UpdateOne, or two when the same array field has values both added and removed"""
+        query = {"_id": ObjectId(user_id)}
+        update: Dict[str, Any] = {"$set": {**self.set, "updatedAt": self.updated_at}}
+        pulls = {f: {"$in": v} for f, v in self.pull.items() if v}
+        if pulls:
+            update["$pull"] = pulls
+        adds = {f: {"$each": v} for f, v in self.add.items() if v and f not in pulls}
+        if adds:
+            update["$addToSet"] = adds
+        ops = [UpdateOne(query, update)]
+        late_adds = {f: {"$each": v} for f, v in self.add.items() if v and f in pulls}
+        if late_adds:
+            ops.append(UpdateOne(query, {"$addToSet": late_adds}))
+        return ops
+
+    def apply(self, doc: Dict[str, Any]) -> None:
+        """Overlay the pending changes on a user document read from Mongo"""
+        for key, value in self.set.items():
+            _set_path(doc, key, deepcopy(value))
+        for field, values in self.pull.items():
+            if isinstance(doc.get(field), list):
+                doc[field] = [v for v in doc[field] if v not in values]
+        for field, values in self.add.items():
+            current = doc.get(field) if isinstance(doc.get(field), list) else []
+            doc[field] = current + [v for v in values if v not in current]
+        if self.updated_at:
+            doc["updatedAt"] = self.updated_at
+
+
+class UserWriteBuffer:
+    """Write-behind buffer for user profile updates. Changes are coalesced per user and written as
+    one bulk_write every USER_WRITE_FLUSH_INTERVAL seconds, or sooner once USER_WRITE_FLUSH_MAX_USERS
+    users are pending, so Mongo writes scale with active users rather than clicks.
+
+    Reads on the same worker see pending changes via read(). Other workers see them after the
+    next flush, and a crash loses at most one interval of updates; stop() flushes what is left."""
+
+    def __init__(self, collection: Callable[[], Any], enabled: bool = USER_WRITE_BEHIND,
+                 flush_interval: float = USER_WRITE_FLUSH_INTERVAL, max_users: int = USER_WRITE_FLUSH_MAX_USERS,
+                 max_attempts: int = USER_WRITE_MAX_ATTEMPTS):
+        # The client is opened at startup, so resolve the collection lazily
+        self.collection = collection
+        self.enabled = enabled
+        self.flush_interval = flush_interval
+        self.max_users = max_users
+        self.max_attempts = max_attempts
+        self.pending: Dict[str, PendingUpdate] = {}
+        self.inflight: Dict[str, PendingUpdate] = {}
+        # Flush generation, and batches written since the oldest in-progress read started:
+        # a read may return a document from before a flush that completed while it waited
+        self.generation = 0
+        self.flushed: List[Tuple[int, Dict[str, PendingUpdate]]] = []
+        self._readers: Dict[int, int] = {}
+        self.counters = Counters()
+        self.flush_latency = LatencyWindow()
+        self._flush_lock = asyncio.Lock()
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def _entry(self, user_id: str) -> PendingUpdate:
+        ObjectId(user_id)  # reject malformed ids at call time, not at flush time
+        entry = self.pending.get(user_id)
+        if entry is None:
+            entry = self.pending[user_id] = PendingUpdate()
+        return entry
+
+    async def set_fields(self, user_id: str, fields: Dict[str, Any]) -> bool:
+        self._entry(user_id).set_fields(fields)
+        return await self._queued()
+
+    async def add_to_set(self, user_id: str, field: str, value: Any) -> bool:
+        self._entry(user_id).add_to_set(field, value)
+        return await self._queued()
+
+    async def pull(self, user_id: str, field: str, value: Any) -> bool:
+        self._entry(user_id).pull_value(field, value)
+        return await self._queued()
+
+    async def _queued(self) -> bool:
+        self.counters.incr("changes")
+        if not self.enabled:
+            return await self.flush()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        if len(self.pending) >= self.max_users:
+            self._wake.set()
+        return True
+
+    async def read(self, find: Awaitable[Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+        """Await a user document read and overlay this worker's changes on it"""
+        started = self.generation
+        self._readers[started] = self._readers.get(started, 0) + 1
+        try:
+            doc = await find
+        finally:
+            self._readers[started] -= 1
+            if not self._readers[started]:
+                del self._readers[started]
+        try:
+            return self.overlay(doc, since=started)
+        finally:
+            oldest = min(self._readers, default=self.generation)
+            self.flushed = [(gen, batch) for gen, batch in self.flushed if gen > oldest]
+
+    def overlay(self, doc: Optional[Dict[str, Any]], since: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """The user document with this worker's unflushed (and in-flight) changes applied, plus
+        (oldest first) batches flushed after generation ``since`` when the document was read then"""
+        if doc is None:
+            return doc
+        user_id = str(doc.get("_id"))
+        flushed = [batch.get(user_id) for gen, batch in self.flushed if since is not None and gen > since]
+        for entry in (*flushed, self.inflight.get(user_id), self.pending.get(user_id)):
+            if entry is not None:
+                entry.apply(doc)
+        return doc
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    async def flush(self) -> bool:
+        """Write every pending update in one bulk_write. Updates in a failed batch are re-queued under
+        newer changes; when Mongo rejects single operations only those users' updates are retried, up
+        to max_attempts times."""
+        async with self._flush_lock:
+            if not self.pending:
+                return True
+            self.inflight, self.pending = self.pending, {}
+            ops, owners = [], []
+            for user_id, entry in self.inflight.items():
+                for op in entry.operations(user_id):
+                    ops.append(op)
+                    owners.append(user_id)
+            changes = sum(entry.changes for entry in self.inflight.values())
+            start = time.perf_counter()
+            failed_users = set()
+            try:
+                await self.collection().bulk_write(ops, ordered=False)
+            except BulkWriteError as e:
+                write_errors = e.details.get("writeErrors", [])
+                # Without per-operation errors (e.g. a write concern error) the whole batch is retried
+                failed_users = {owners[err["index"]] for err in write_errors} or set(self.inflight)
+                self._requeue(failed_users, bool(write_errors), e)
+            except asyncio.CancelledError:
+                # The batch may or may not have landed; every operation is idempotent, so write it again later
+                failed_users = set(self.inflight)
+                self._requeue(failed_users, False)
+                raise
+            except Exception as e:
+                failed_users = set(self.inflight)
+                self._requeue(failed_users, False, e)
+            finally:
+                self.flush_latency.observe(time.perf_counter() - start, error=bool(failed_users))
+                written = {user_id: entry for user_id, entry in self.inflight.items() if user_id not in failed_users}
+                self.inflight = {}
+            if written:
+                self.generation += 1
+                if self._readers:
+                    self.flushed.append((self.generation, written))
+                self.counters.incr("flushes")
+                self.counters.incr("users.written", len(written))
+                self.counters.incr("operations.written", sum(1 for user_id in owners if user_id in written))
+                self.counters.incr("changes.coalesced", max(0, changes - len(ops)))
+            return not failed_users
+
+    def _requeue(self, user_ids: set, rejected: bool, error: Optional[Exception] = None) -> None:
+        """Put failed updates back under any newer changes; ``rejected`` counts an attempt against them"""
+        if error is not None:
+            self.counters.incr("flushes.failed")
+            logger.error(f"User write flush failed for {len(user_ids)} of {len(self.inflight)} users, will retry: {str(error)}")
+        for user_id in user_ids:
+            entry = self.inflight[user_id]
+            if rejected:
+                entry.attempts += 1
+                if entry.attempts >= self.max_attempts:
+                    self.counters.incr("users.dropped")
+                    logger.error(f"Dropping update for user {user_id} after {entry.attempts} rejected writes "
+                                 f"(fields: {sorted({*entry.set, *entry.add, *entry.pull})})")
+                    continue
+            newer = self.pending.get(user_id)
+            self.pending[user_id] = entry.merge(newer) if newer else entry
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if not await self.flush():
+            logger.error(f"Dropping unflushed updates for {len(self.pending)} users at shutdown")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "writeBehind": self.enabled,
+            "flushIntervalS": self.flush_interval,
+            "maxUsers": self.max_users,
+            "maxAttempts": self.max_attempts,
+            "pendingUsers": len(self.pending),
+            "counters": self.counters.snapshot(),
+            "flush": self.flush_latency.snapshot(),
+        }
@@ -61,13 +61,8 @@ const CareerDetail = () => {
 
   const loadRelatedCareers = async (careerIds) => {
     try {
-      const relatedData = await Promise.all(
-        careerIds.slice(0, 3).map(async (careerId) => {
-          const response = await careersAPI.getCareerById(careerId);
-          return response.success ? response.career : null;
-        })
-      );
-      setRelatedCareers(relatedData.filter(Boolean));
+      const results = await careersAPI.getCareersByIds(careerIds.slice(0, 3));
+      setRelatedCareers(results.filter((result) => result.found).map((result) => result.career));
     } catch (error) {
       console.error('Error loading related careers:', error);
     }
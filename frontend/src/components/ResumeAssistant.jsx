@@ -20,7 +20,7 @@ import {
   Wand2
 } from 'lucide-react';
 import { toast } from 'sonner';
-import { resumeAPI } from '../services/api';
+import { resumeAPI, resumeChannel } from '../services/api';
 
 const ResumeAssistant = () => {
   const navigate = useNavigate();
@@ -74,14 +74,26 @@ const ResumeAssistant = () => {
   const handleRewrite = async (jobIdx, bulletIdx, original, context) => {
     const key = `${jobIdx}-${bulletIdx}`;
     setRewriteLoading(prev => ({ ...prev, [key]: true }));
+    const payload = {
+      jobTitle: formData.jobTitle,
+      company: formData.company,
+      jobDescription: formData.jobDescription,
+      context,
+      original
+    };
+    let superseded = false;
     try {
-      const response = await resumeAPI.rewriteBullet({
-        jobTitle: formData.jobTitle,
-        company: formData.company,
-        jobDescription: formData.jobDescription,
-        context,
-        original
-      });
+      let response;
+      try {
+        // A newer rewrite of the same bullet cancels this one on the server
+        response = await resumeChannel.request('rewrite-bullet', payload, { key: `bullet:${key}` });
+      } catch (e) {
+        if (e.cancelled) {
+          superseded = true;
+          return;
+        }
+        response = await resumeAPI.rewriteBullet(payload);
+      }
       if (response.success) {
         setRewrites(prev => ({
           ...prev,
@@ -94,7 +106,8 @@ const ResumeAssistant = () => {
     } catch (e) {
       toast.error('Unable to rewrite. Check your connection.');
     } finally {
-      setRewriteLoading(prev => ({ ...prev, [key]: false }));
+      // The request that superseded this one owns the loading state now
+      if (!superseded) setRewriteLoading(prev => ({ ...prev, [key]: false }));
     }
   };
 
@@ -122,6 +135,8 @@ const ResumeAssistant = () => {
   });
 
   const [error, setError] = useState('');
+  // Lets the backend reuse edits for bullets that did not change since the last optimize
+  const [optimizeSessionId] = useState(() => (window.crypto?.randomUUID ? window.crypto.randomUUID() : `${Date.now()}-${Math.random().toString(36).slice(2)}`));
 
   const handleGenerate = async (type) => {
     setIsGenerating(true);
@@ -141,7 +156,8 @@ const ResumeAssistant = () => {
           company: formData.company,
           jobDescription: formData.jobDescription,
           jobs: jobsTransformed,
-          currentResume: formData.currentResume
+          currentResume: formData.currentResume,
+          sessionId: optimizeSessionId
         };
         const response = await resumeAPI.optimizeResume(payload);
 
@@ -60,12 +60,16 @@ export const identityAPI = {
 
 // Careers API
 export const careersAPI = {
-  getCareers: async (search = '', category = '', limit = 50) => {
+  // filters: { minSalary, maxSalary, minGrowth, maxGrowth, sort: 'salary'|'growth'|'demand'|'title', order: 'asc'|'desc' }
+  getCareers: async (search = '', category = '', limit = 50, filters = {}) => {
     try {
       const params = new URLSearchParams();
       if (search) params.append('search', search);
       if (category) params.append('category', category);
       if (limit) params.append('limit', limit.toString());
+      Object.entries(filters).forEach(([key, value]) => {
+        if (value !== undefined && value !== null && value !== '') params.append(key, value.toString());
+      });
       
       const response = await apiClient.get(`/careers?${params.toString()}`);
       return response.data;
@@ -87,6 +91,34 @@ export const careersAPI = {
     }
   },
 
+  // Many careers in one request; resolves to [{ id, found, career?, error? }] in the order given
+  getCareersByIds: async (ids, fields = null) => {
+    try {
+      const response = await apiClient.post('/careers/batch', fields ? { ids, fields } : { ids });
+      return response.data.results;
+    } catch (error) {
+      // eslint-disable-next-line no-console
+      console.error('Error fetching careers batch:', error);
+      throw error;
+    }
+  },
+
+  getCareerFacets: async (category = '', filters = {}) => {
+    try {
+      const params = new URLSearchParams();
+      if (category) params.append('category', category);
+      Object.entries(filters).forEach(([key, value]) => {
+        if (value !== undefined && value !== null && value !== '') params.append(key, value.toString());
+      });
+      const response = await apiClient.get(`/careers/facets?${params.toString()}`);
+      return response.data.facets;
+    } catch (error) {
+      // eslint-disable-next-line no-console
+      console.error('Error fetching career facets:', error);
+      throw error;
+    }
+  },
+
   getCareerCategories: async () => {
     try {
       const response = await apiClient.get('/careers/categories');
@@ -147,9 +179,116 @@ export const resumeAPI = {
       console.error('Error rewriting bullet:', error);
       throw error;
     }
+  },
+
+  segmentResume: async (text) => {
+    try {
+      const response = await apiClient.post('/resume/segment', { text });
+      return response.data;
+    } catch (error) {
+      // eslint-disable-next-line no-console
+      console.error('Error segmenting resume:', error);
+      throw error;
+    }
   }
 };
 
+// One WebSocket for Resume Assistant operations. Requests sharing a key (e.g. the same bullet)
+// supersede each other server-side, so stale LLM work is cancelled instead of paid for.
+const WS_BASE = API_BASE.replace(/^http/, 'ws');
+
+class ResumeChannel {
+  constructor() {
+    this.socket = null;
+    this.opening = null;
+    this.pending = new Map();
+    this.nextId = 0;
+  }
+
+  connect() {
+    if (this.socket && this.socket.readyState === WebSocket.OPEN) return Promise.resolve(this.socket);
+    if (this.opening) return this.opening;
+    this.opening = new Promise((resolve, reject) => {
+      const socket = new WebSocket(`${WS_BASE}/ws/resume`);
+      socket.onopen = () => { this.socket = socket; this.opening = null; resolve(socket); };
+      socket.onerror = () => { this.opening = null; reject(new Error('Resume channel unavailable')); };
+      socket.onclose = () => {
+        this.socket = null;
+        this.pending.forEach(({ reject: fail }) => fail(new Error('Resume channel closed')));
+        this.pending.clear();
+      };
+      socket.onmessage = (event) => this.handle(JSON.parse(event.data));
+    });
+    return this.opening;
+  }
+
+  handle(message) {
+    const entry = this.pending.get(message.id);
+    if (!entry) return;
+    if (message.type === 'partial') {
+      entry.onPartial?.(message.data);
+    } else if (message.type === 'result') {
+      this.pending.delete(message.id);
+      entry.resolve(message.data);
+    } else if (message.type === 'cancelled' || message.type === 'error') {
+      this.pending.delete(message.id);
+      const error = new Error(message.error || `Request ${message.reason || 'cancelled'}`);
+      error.cancelled = message.type === 'cancelled';
+      entry.reject(error);
+    }
+  }
+
+  async request(op, payload, { key, onPartial } = {}) {
+    const socket = await this.connect();
+    this.nextId += 1;
+    const id = String(this.nextId);
+    return new Promise((resolve, reject) => {
+      this.pending.set(id, { resolve, reject, onPartial });
+      socket.send(JSON.stringify({ id, op, key, payload }));
+    });
+  }
+}
+
+export const resumeChannel = new ResumeChannel();
+
+// Async jobs API for long-running AI generations (avoids the 30s request timeout)
+export const jobsAPI = {
+  submit: async (type, payload) => {
+    try {
+      const response = await apiClient.post('/jobs', { type, payload });
+      return response.data;
+    } catch (error) {
+      // eslint-disable-next-line no-console
+      console.error('Error submitting job:', error);
+      throw error;
+    }
+  },
+
+  getJob: async (jobId) => {
+    const response = await apiClient.get(`/jobs/${jobId}`);
+    return response.data.job;
+  },
+
+  waitForResult: async (jobId, { intervalMs = 1500, timeoutMs = 300000 } = {}) => {
+    const deadline = Date.now() + timeoutMs;
+    while (Date.now() < deadline) {
+      const job = await jobsAPI.getJob(jobId);
+      if (job.status === 'succeeded') return job.result;
+      if (job.status === 'failed') throw new Error(job.error || 'Job failed');
+      await new Promise((resolve) => setTimeout(resolve, intervalMs));
+    }
+    throw new Error('Timed out waiting for job result');
+  },
+
+  // Responses served past their deadline (X-Deadline header) are provisional fallbacks;
+  // this resolves to the final LLM result once it is ready
+  finalResult: async (response, options) => (
+    response && response.provisional && response.resultToken
+      ? jobsAPI.waitForResult(response.resultToken, options)
+      : response
+  )
+};
+
 // Health check API
 export const healthAPI = {
   checkStatus: async () => {
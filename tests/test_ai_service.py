@@ -0,0 +1,75 @@
+import asyncio
+
+from ai_service import AIService
+from jd_similarity import JDSimilarityIndex
+
+JD = " ".join(
+    f"Responsibility {i}: build and operate data pipelines in Python and SQL for the analytics team."
+    for i in range(12)
+)
+
+
+class DictCache:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value):
+        self.data[key] = value
+
+
+def make_service():
+    service = AIService(cache=DictCache(), jd_index=JDSimilarityIndex())
+    prompts = []
+
+    async def fake_call(system_message, prompt, spec):
+        prompts.append(prompt)
+        return '{"improved": "Led the thing", "rationale": "r", "keywords": []}'
+    service._call = fake_call
+    return service, prompts
+
+
+def test_prompt_uses_callers_own_job_description():
+    service, prompts = make_service()
+    job = {"jobTitle": "Data Engineer", "company": "Acme", "jobDescription": JD}
+    near_duplicate = {**job, "jobDescription": JD + " Private note: salary 180k, remote only."}
+
+    asyncio.run(service.rewrite_bullet(job, "did pipelines"))
+    asyncio.run(service.rewrite_bullet(near_duplicate, "helped with reports"))
+
+    assert len(prompts) == 2
+    assert "Private note" not in prompts[0]
+    assert "Private note" in prompts[1]
+
+
+def test_near_duplicate_postings_do_not_share_responses():
+    service, prompts = make_service()
+    job = {"jobTitle": "Data Engineer", "company": "Acme", "jobDescription": JD}
+    reposted = {**job, "jobDescription": JD + " Salary 150k, onsite in Berlin."}
+
+    asyncio.run(service.rewrite_bullet(job, "did pipelines"))
+    asyncio.run(service.rewrite_bullet(reposted, "did pipelines"))
+    asyncio.run(service.rewrite_bullet(job, "did pipelines"))
+
+    # Responses are cached by exact prompt only
+    assert len(prompts) == 2
+    assert "Berlin" in prompts[1]
+
+
+def test_different_company_is_not_treated_as_duplicate():
+    service, prompts = make_service()
+    job = {"jobTitle": "Data Engineer", "company": "Acme", "jobDescription": JD}
+    asyncio.run(service.rewrite_bullet(job, "did pipelines"))
+    asyncio.run(service.rewrite_bullet({**job, "company": "Initech"}, "did pipelines"))
+    assert len(prompts) == 2
+
+
+def test_structured_prompt_includes_resume_context():
+    service, prompts = make_service()
+    job = {"jobTitle": "Data Engineer", "company": "Acme", "jobDescription": JD,
+           "jobs": [{"company": "Initech", "role": "Analyst", "bullets": ["did pipelines"]}],
+           "resumeContext": "Skills\nPython, SQL"}
+    asyncio.run(service.optimize_resume(job))
+    assert "Initech" in prompts[0] and "Skills\nPython, SQL" in prompts[0]
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from career_graph import CareerSimilarityIndex, compute_neighbor_updates
+
+
+def career(cid, category, skills, title=""):
+    return {"id": cid, "title": title or cid, "category": category, "skills": skills, "description": ""}
+
+
+CAREERS = [
+    career("a", "Tech", ["python", "sql"]),
+    career("b", "Tech", ["python", "spark"]),
+    career("c", "Tech", ["excel"]),
+    career("d", "Health", ["nursing"]),
+    career("e", "Health", ["nursing", "sql"]),
+]
+
+
+def brute_force(index, career_id):
+    vector = index.vectors[career_id]
+    return {
+        other: sum(v * vec.get(f, 0.0) for f, v in vector.items())
+        for other, vec in index.vectors.items() if other != career_id
+    }
+
+
+def test_scores_match_brute_force_cosine():
+    index = CareerSimilarityIndex(CAREERS)
+    for cid in index.vectors:
+        expected = {k: v for k, v in brute_force(index, cid).items() if v > 0}
+        assert index.scores(cid) == pytest.approx(expected)
+
+
+def test_common_features_add_to_candidates_but_do_not_enumerate_them():
+    index = CareerSimilarityIndex(CAREERS, max_postings=2)
+    # cat:tech has three postings, so "c" (which shares only the category) is no candidate of "a"...
+    scores = index.scores("a")
+    assert "c" not in scores
+    # ...while "b" (found through python) still gets the category's share of the cosine
+    assert scores["b"] == pytest.approx(brute_force(index, "a")["b"])
+
+
+def test_career_with_only_common_features_still_gets_neighbors():
+    index = CareerSimilarityIndex(CAREERS, max_postings=2)
+    assert set(index.scores("c")) == {"a", "b"}
+
+
+def test_incremental_update_targets_affected_careers():
+    full = compute_neighbor_updates(CAREERS, {}, None, top_n=2)
+    assert set(full["upserts"]) == {"a", "b", "c", "d", "e"}
+    assert full["deletes"] == []
+
+    careers = [c for c in CAREERS if c["id"] != "d"]
+    result = compute_neighbor_updates(careers, full["upserts"], {"d"}, top_n=2)
+    assert result["deletes"] == ["d"]
+    assert "e" in result["upserts"]
+    assert all(n["id"] != "d" for neighbors in result["upserts"].values() for n in neighbors)
+
+
+def test_ingest_schedules_related_refresh_in_background():
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    from database import DatabaseService
+
+    db_service = DatabaseService()
+    db_service.client = mongomock_motor.AsyncMongoMockClient()
+    db_service.db = db_service.catalog_db = db_service.client["test"]
+    base = {"description": "Works with data", "averageSalary": "$90,000", "growthRate": "10%", "education": "BS",
+            "jobPostings": 100, "companies": ["Acme"], "category": "Tech"}
+    rows = [
+        {**base, "title": "Data Analyst", "skills": ["sql", "python"]},
+        {**base, "title": "Data Engineer", "skills": ["sql", "spark"]},
+    ]
+
+    async def run():
+        report = await db_service.ingest_careers(enumerate(rows, start=1))
+        assert report["relatedRefresh"] == "scheduled"
+        await db_service.wait_related_refresh()
+        return await db_service.db.career_neighbors.count_documents({})
+
+    assert asyncio.run(run()) == 2
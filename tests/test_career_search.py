@@ -0,0 +1,72 @@
+import pytest
+
+from career_search import CareerSearchIndex, edit_distance, max_edits
+from skill_taxonomy import get_taxonomy
+
+CAREERS = [
+    {"id": "1", "title": "Data Scientist", "category": "Tech", "skills": ["Python", "Statistics"],
+     "description": "Builds predictive models from data"},
+    {"id": "2", "title": "Data Engineer", "category": "Tech", "skills": ["SQL", "Spark"],
+     "description": "Maintains data pipelines"},
+    {"id": "3", "title": "Frontend Developer", "category": "Tech", "skills": ["JavaScript", "React"],
+     "description": "Builds user interfaces"},
+    {"id": "4", "title": "Registered Nurse", "category": "Healthcare", "skills": ["Patient Care"],
+     "description": "Cares for patients and works with data from monitors"},
+]
+
+
+@pytest.fixture
+def index():
+    taxonomy = get_taxonomy()
+    docs = [{**career, "skillIds": taxonomy.normalize_all(career["skills"])} for career in CAREERS]
+    index = CareerSearchIndex()
+    index.rebuild(docs, version=7)
+    return index
+
+
+def ids(results):
+    return [career["id"] for career, _ in results]
+
+
+@pytest.mark.parametrize("a, b, limit, expected", [
+    ("engineer", "engineer", 2, 0),
+    ("enigneer", "engineer", 2, 1),  # adjacent transposition is one edit
+    ("enginer", "engineer", 2, 1),
+    ("nurse", "engineer", 1, 2),  # over the limit reports limit + 1
+])
+def test_edit_distance(a, b, limit, expected):
+    assert edit_distance(a, b, limit) == expected
+
+
+def test_edit_budget_grows_with_length():
+    assert [max_edits(t) for t in ("sql", "nurse", "engineer")] == [0, 1, 2]
+
+
+def test_title_hits_outrank_description_hits(index):
+    assert ids(index.search("data")) == ["2", "1", "4"]
+
+
+def test_every_token_must_match(index):
+    assert ids(index.search("data engineer")) == ["2"]
+
+
+def test_prefix_and_typo_matches(index):
+    assert ids(index.search("front")) == ["3"]
+    assert ids(index.search("scientsit")) == ["1"]
+
+
+def test_skill_synonyms_match_canonical_ids(index):
+    assert ids(index.search("js")) == ["3"]
+
+
+def test_category_filter_and_limit(index):
+    assert ids(index.search("data", category="Healthcare")) == ["4"]
+    assert len(index.search("data", limit=1)) == 1
+
+
+def test_remove_and_readd_keep_index_consistent(index):
+    index.remove("2")
+    assert ids(index.search("pipelines")) == []
+    index.add({**CAREERS[1], "skillIds": []})
+    assert ids(index.search("pipelines")) == ["2"]
+    assert index.version == 7 and len(index) == 4
@@ -0,0 +1,94 @@
+import asyncio
+import io
+
+import pytest
+
+from catalog_ingest import CatalogIngestor, parse_salary_range, parse_growth_percent, iter_rows, detect_format, numeric_fields
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("$75,000 - $120,000", (75000, 120000)),
+    ("$90k+", (90000, 90000)),
+    ("$60-90k", (60000, 90000)),
+    ("60k - 90k", (60000, 90000)),
+    ("85000", (85000, 85000)),
+    ("$1.2M", (1200000, 1200000)),
+    # Years and other stray numbers are not salary bounds
+    ("Up to $200,000 (2023)", (200000, 200000)),
+    ("$60,000 - $90,000 in 2024", (60000, 90000)),
+    ("2023", (None, None)),
+    ("Top 5 roles, 90k", (90000, 90000)),
+    # A lower bound under a tenth of the top is dropped
+    ("$5 - $120,000", (120000, 120000)),
+    ("$120,000 plus $5,000 signing bonus", (120000, 120000)),
+    ("Competitive", (None, None)),
+    ("", (None, None)),
+    (None, (None, None)),
+])
+def test_parse_salary_range(text, expected):
+    assert parse_salary_range(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("13% (Much faster than average)", 13.0),
+    ("-2.5% decline", -2.5),
+    ("Stable", None),
+])
+def test_parse_growth_percent(text, expected):
+    assert parse_growth_percent(text) == expected
+
+
+def test_numeric_fields():
+    doc = {"averageSalary": "$95,000 - $140,000 (2024 data)", "growthRate": "22%"}
+    assert numeric_fields(doc) == {"salaryMin": 95000, "salaryMax": 140000, "growthPercent": 22.0}
+
+
+def test_iter_rows_reports_bad_ndjson_lines():
+    stream = io.StringIO('{"title": "A"}\nnot json\n\n{"title": "B"}\n')
+    rows = list(iter_rows(stream, "ndjson"))
+    assert [line for line, _ in rows] == [1, 2, 4]
+    assert isinstance(rows[1][1], ValueError)
+
+
+def test_detect_format():
+    assert detect_format("careers.csv") == "csv"
+    assert detect_format("careers.ndjson") == "ndjson"
+
+
+def test_duplicate_key_race_retry_reports_changed_ids():
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    from pymongo.errors import BulkWriteError
+
+    class RacingCollection:
+        """Lets another batch insert the same keys first, then fails the upserts with E11000"""
+
+        def __init__(self, collection):
+            self.collection = collection
+            self.raced = False
+
+        def __getattr__(self, name):
+            return getattr(self.collection, name)
+
+        async def bulk_write(self, ops, ordered=True):
+            if self.raced:
+                return await self.collection.bulk_write(ops, ordered=ordered)
+            self.raced = True
+            await self.collection.bulk_write(ops, ordered=ordered)
+            raise BulkWriteError({"writeErrors": [{"index": i, "code": 11000, "errmsg": "E11000"} for i in range(len(ops))],
+                                  "nUpserted": 0, "nModified": 0, "upserted": []})
+
+    class DB:
+        def __init__(self, db):
+            self.careers = RacingCollection(db.careers)
+
+    db = DB(mongomock_motor.AsyncMongoMockClient()["test"])
+    base = {"description": "Works with data", "averageSalary": "$90,000", "growthRate": "10%", "education": "BS",
+            "jobPostings": 100, "companies": ["Acme"], "category": "Tech", "skills": ["sql"]}
+    rows = [{**base, "title": "Data Analyst"}, {**base, "title": "Data Engineer"}]
+    report = asyncio.run(CatalogIngestor(db).ingest(enumerate(rows, start=1)))
+
+    async def stored_ids():
+        return {str(doc["_id"]) async for doc in db.careers.collection.find({}, {"_id": 1})}
+
+    assert sorted(report.changed_ids) == sorted(asyncio.run(stored_ids()))
+    assert len(report.changed_ids) == 2 and not report.errors
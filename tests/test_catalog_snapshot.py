@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+
+from catalog_snapshot import (
+    SnapshotDatabaseService, CatalogSnapshot, ReadOnlyCatalogError, careers_from_catalog_file, write_snapshot,
+)
+from database import SEED_CATALOG_PATH
+
+ID = "{:024x}".format
+
+CAREERS = [
+    {"id": ID(1), "title": "Data Scientist", "category": "Tech", "skills": ["Python"], "description": "Models",
+     "salaryMin": 100000, "salaryMax": 150000, "growthPercent": 30.0, "jobPostings": 500},
+    {"id": ID(2), "title": "Data Engineer", "category": "Tech", "skills": ["SQL"], "description": "Pipelines",
+     "salaryMin": 90000, "salaryMax": 130000, "growthPercent": 20.0, "jobPostings": 800},
+    {"id": ID(3), "title": "Registered Nurse", "category": "Healthcare", "skills": ["Care"], "description": "Data too",
+     "salaryMin": 60000, "salaryMax": 90000, "jobPostings": 1200},
+]
+
+
+@pytest.fixture
+def service(tmp_path):
+    path = str(tmp_path / "catalog.snap")
+    write_snapshot(path, CAREERS, {ID(1): [{"id": ID(2), "score": 0.5}]}, catalog_version=4)
+    service = SnapshotDatabaseService(path)
+    yield service
+    asyncio.run(service.close())
+
+
+def titles(careers):
+    return [career["title"] for career in careers]
+
+
+def test_snapshot_round_trips_docs_and_ids(tmp_path):
+    path = str(tmp_path / "catalog.snap")
+    header = write_snapshot(path, CAREERS, catalog_version=4)
+    snapshot = CatalogSnapshot(path)
+    try:
+        assert snapshot.count == 3 and header["version"].startswith("4-")
+        assert snapshot.doc(snapshot.ordinal(ID(3))) == CAREERS[2]
+        assert snapshot.ordinal(ID(9)) is None
+    finally:
+        snapshot.close()
+
+
+@pytest.mark.parametrize("filters, expected", [
+    ({"category": "Tech"}, ["Data Scientist", "Data Engineer"]),
+    ({"category": "Unknown"}, []),
+    # Salary bounds match overlapping ranges, like the Mongo filter
+    ({"min_salary": 140000}, ["Data Scientist"]),
+    ({"max_salary": 95000}, ["Data Engineer", "Registered Nurse"]),
+    # A missing growth value never matches a growth bound
+    ({"min_growth": 0}, ["Data Scientist", "Data Engineer"]),
+    ({"max_growth": 25}, ["Data Engineer"]),
+])
+def test_filter_masks_match_the_mongo_semantics(service, filters, expected):
+    assert titles(asyncio.run(service.get_careers(**filters))) == expected
+
+
+def test_sorting_puts_missing_values_last_when_descending(service):
+    assert titles(asyncio.run(service.get_careers(sort="growth"))) == ["Data Scientist", "Data Engineer", "Registered Nurse"]
+    assert titles(asyncio.run(service.get_careers(sort="title", order="asc"))) == [
+        "Data Engineer", "Data Scientist", "Registered Nurse"]
+
+
+def test_search_is_filtered_by_the_mask(service):
+    assert titles(asyncio.run(service.get_careers(search="data", min_salary=120000))) == ["Data Engineer", "Data Scientist"]
+
+
+def test_batch_lookup_related_and_facets(service):
+    results = asyncio.run(service.get_careers_by_ids([ID(2), ID(9), "bad"], fields=["title"]))
+    assert results == [
+        {"id": ID(2), "found": True, "career": {"id": ID(2), "title": "Data Engineer"}},
+        {"id": ID(9), "found": False, "error": "not_found"},
+        {"id": "bad", "found": False, "error": "invalid_id"},
+    ]
+    assert asyncio.run(service.get_related_careers(ID(1))) == [{"id": ID(2), "score": 0.5}]
+    assert asyncio.run(service.get_career_categories()) == ["Tech", "Healthcare"]
+    assert asyncio.run(service.get_career_facets()) == asyncio.run(service.get_career_facets(min_salary=0))
+
+
+def test_writes_are_rejected(service):
+    with pytest.raises(ReadOnlyCatalogError):
+        asyncio.run(service.update_user(ID(1), {"name": "x"}))
+
+
+def test_seed_catalog_converts_with_stable_ids():
+    first = careers_from_catalog_file(str(SEED_CATALOG_PATH), "ndjson")
+    second = careers_from_catalog_file(str(SEED_CATALOG_PATH), "ndjson")
+    assert first and [c["id"] for c in first] == [c["id"] for c in second]
+
+
+def test_facets_band_top_salaries_as_open_ended(tmp_path):
+    path = str(tmp_path / "catalog.snap")
+    write_snapshot(path, CAREERS + [{"id": ID(4), "title": "Chief Data Officer", "category": "Tech", "salaryMin": 300000,
+                                     "salaryMax": 400000}])
+    service = SnapshotDatabaseService(path)
+    try:
+        bands = asyncio.run(service.get_career_facets())["salaryBands"]
+    finally:
+        asyncio.run(service.close())
+    assert bands[-1] == {"min": 250000, "max": None, "count": 1}
+    assert sum(band["count"] for band in bands) == 4
+
+
+def test_batch_lookup_rejects_non_public_fields(service):
+    with pytest.raises(ValueError):
+        asyncio.run(service.get_careers_by_ids([ID(1)], fields=["key"]))
+    assert asyncio.run(service.get_careers_by_ids([ID(1)], fields=["id"]))[0]["career"] == {"id": ID(1)}
@@ -0,0 +1,79 @@
+import io
+import math
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+from cohort_scoring import CohortModel, score_cohort, read_profiles, load_catalog_file, _terms, PROFILE_TEXT_FIELDS
+from skill_taxonomy import get_taxonomy
+
+SEED = Path(__file__).resolve().parent.parent / "backend" / "data" / "careers_seed.ndjson"
+
+PROFILES = [
+    {"skills": ["Python", "SQL"], "interests": "machine learning and statistics", "careerGoals": "analyze data"},
+    {"skills": ["Figma", "CSS"], "interests": "user research and design", "currentRole": "Designer"},
+    {"skills": [], "interests": "", "careerGoals": ""},
+    {"skills": ["unknown skill"], "interests": "cloud infrastructure security"},
+]
+
+
+def careers():
+    return load_catalog_file(str(SEED))
+
+
+def dense_cosine(model, catalog, profiles):
+    """Reference: plain TF-IDF cosine over the full vocabulary"""
+    def vector(text):
+        v = np.zeros(len(model.vocab))
+        for term, count in Counter(_terms(text)).items():
+            if term in model.vocab:
+                v[model.vocab[term]] = count * model.idf[model.vocab[term]]
+        n = np.linalg.norm(v)
+        return v / n if n else v
+    career_vectors = np.array([vector(f"{c.get('title', '')} {c.get('category', '')} {c.get('description', '')}") for c in catalog])
+    profile_vectors = np.array([vector(" ".join(str(p.get(f) or "") for f in PROFILE_TEXT_FIELDS)) for p in profiles])
+    return profile_vectors @ career_vectors.T
+
+
+def test_sparse_text_similarity_matches_dense_cosine():
+    catalog = careers()
+    model = CohortModel(catalog)
+    np.testing.assert_allclose(model.text_similarity(PROFILES), dense_cosine(model, catalog, PROFILES), atol=1e-5)
+
+
+def test_skill_overlap_matches_taxonomy():
+    catalog = careers()
+    model = CohortModel(catalog)
+    taxonomy = get_taxonomy()
+    overlap = model.skill_credit(PROFILES) @ model.wants.T
+    for i, profile in enumerate(PROFILES):
+        have = taxonomy.normalize_all(profile["skills"])
+        for j, career in enumerate(catalog):
+            assert math.isclose(overlap[i, j], taxonomy.overlap(have, career["skillIds"]), abs_tol=1e-5)
+
+
+def test_saved_model_scores_identically(tmp_path):
+    model = CohortModel(careers())
+    model.save(str(tmp_path))
+    loaded = CohortModel.load(str(tmp_path))
+    expected, actual = model.score_chunk(PROFILES, 3), loaded.score_chunk(PROFILES, 3)
+    for name in expected:
+        np.testing.assert_allclose(actual[name], expected[name])
+
+
+def test_workers_match_single_process():
+    model = CohortModel(careers())
+    profiles = [(f"p{i}", PROFILES[i % len(PROFILES)]) for i in range(20)]
+    single = score_cohort(model, profiles, top_n=3, chunk_size=4, workers=1)
+    pooled = score_cohort(model, profiles, top_n=3, chunk_size=4, workers=2)
+    for name in single:
+        np.testing.assert_array_equal(single[name], pooled[name])
+    assert len(single["rank"]) == 60
+
+
+def test_read_profiles_ids_and_errors():
+    stream = io.StringIO('{"studentId": "s1", "skills": ["Python"]}\n{"skills": "not a list"}\n{"skills": ["SQL"]}\n')
+    profiles, errors = read_profiles(stream, "ndjson")
+    assert [pid for pid, _ in profiles] == ["s1", "3"]
+    assert errors[0]["line"] == 2
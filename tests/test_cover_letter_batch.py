@@ -0,0 +1,66 @@
+import asyncio
+import io
+
+from ai_service import AIService
+from cover_letter_batch import CoverLetterBatchRunner, read_postings
+
+
+class DictCache:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value):
+        self.data[key] = value
+
+
+POSTINGS = [
+    {"id": "a", "jobTitle": "Data Engineer", "company": "Acme", "jobDescription": "Build pipelines"},
+    {"id": "b", "jobTitle": "Analyst", "company": "Initech", "jobDescription": "Write SQL reports"},
+]
+
+
+def flaky_service(failing):
+    service = AIService()
+
+    async def fake_send(system_message, prompt, task="default", cache_prompt=None):
+        if any(company in prompt for company in failing):
+            raise RuntimeError("model unavailable")
+        return "Dear hiring manager, ..."
+    service._send = fake_send
+    return service
+
+
+async def collect(runner, postings, batch_id):
+    return [event async for event in runner.run(postings, {"skills": ["sql"]}, batch_id=batch_id)]
+
+
+def test_llm_failure_counts_as_failed_and_is_not_cached():
+    store = DictCache()
+    runner = CoverLetterBatchRunner(flaky_service(failing={"Initech"}), store=store)
+    events = asyncio.run(collect(runner, POSTINGS, "batch-1"))
+
+    done = events[-1]
+    assert (done["succeeded"], done["failed"]) == (1, 1)
+    failed = next(e for e in events if e["type"] == "result" and not e["success"])
+    assert failed["key"] == "b" and "coverLetter" not in failed
+    assert len(store.data) == 1
+
+    # Resuming once the model recovers regenerates only the failed posting
+    runner.ai_service = flaky_service(failing=set())
+    events = asyncio.run(collect(runner, POSTINGS, "batch-1"))
+    assert events[-1] == {"type": "done", "batchId": "batch-1", "succeeded": 1, "failed": 0, "resumed": 1}
+
+
+def test_single_cover_letter_endpoint_still_falls_back():
+    letter = asyncio.run(flaky_service(failing={"Acme"}).generate_cover_letter(POSTINGS[0]))
+    assert letter
+
+
+def test_read_postings_reports_invalid_rows():
+    stream = io.StringIO("title,company,description\nData Engineer,Acme,Build pipelines\n,Initech,\n")
+    postings, errors = read_postings(stream, "csv")
+    assert [p["jobTitle"] for p in postings] == ["Data Engineer"]
+    assert errors and errors[0]["line"] == 3
@@ -0,0 +1,177 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+from database import DatabaseService, PoolStatsListener  # noqa: E402
+
+BASE = {"description": "Works with data", "averageSalary": "$90,000", "growthRate": "10%", "education": "BS",
+        "jobPostings": 100, "companies": ["Acme"], "category": "Tech"}
+
+
+def make_service():
+    db_service = DatabaseService()
+    db_service.client = mongomock_motor.AsyncMongoMockClient()
+    db_service.db = db_service.catalog_db = db_service.client["test"]
+    db_service.catalog_version_ttl = 0
+    return db_service
+
+
+async def ingest(db_service, *rows):
+    await db_service.ingest_careers(enumerate(rows, start=1), refresh_related=False)
+
+
+def titles(db_service, query):
+    return [career["title"] for career, _ in db_service.search_index.search(query, limit=10)]
+
+
+def test_sync_reindexes_changed_careers_regardless_of_timestamps():
+    db_service = make_service()
+
+    async def run():
+        await ingest(db_service, {**BASE, "title": "Data Analyst", "skills": ["sql"]})
+        await db_service.sync_search_index()
+        assert titles(db_service, "analyst") == ["Data Analyst"]
+
+        await ingest(db_service, {**BASE, "title": "Data Analyst", "skills": ["sql"], "description": "Builds dashboards"})
+        # A writer with a slow clock: the change must not be skipped for being "older" than the last sync
+        await db_service.db.careers.update_many({}, {"$set": {"updatedAt": datetime(2000, 1, 1)}})
+        await db_service.bump_catalog_version()
+        await db_service.sync_search_index()
+        return titles(db_service, "dashboards")
+
+    assert asyncio.run(run()) == ["Data Analyst"]
+
+
+def test_sync_drops_deleted_careers_and_related_careers():
+    db_service = make_service()
+
+    async def run():
+        await ingest(db_service,
+                     {**BASE, "title": "Data Analyst", "skills": ["sql"]},
+                     {**BASE, "title": "Data Engineer", "skills": ["spark"]})
+        await db_service.db.careers.update_many({}, {"$set": {"relatedCareers": ["x"]}})
+        await db_service.sync_search_index()
+        assert all("relatedCareers" not in doc for doc in db_service.search_index.docs.values())
+
+        await db_service.db.careers.delete_one({"title": "Data Engineer"})
+        # No version bump: the periodic reconcile still notices the deletion
+        db_service._search_reconciled_at = 0.0
+        await db_service.sync_search_index()
+        return titles(db_service, "data")
+
+    assert asyncio.run(run()) == ["Data Analyst"]
+
+
+def test_get_careers_by_ids_keeps_request_order_and_reports_misses():
+    db_service = make_service()
+
+    async def run():
+        await ingest(db_service,
+                     {**BASE, "title": "Data Analyst", "skills": ["sql"]},
+                     {**BASE, "title": "Data Engineer", "skills": ["spark"]})
+        ids = {doc["title"]: str(doc["_id"]) async for doc in db_service.db.careers.find({}, {"title": 1})}
+        missing = "0" * 24
+        return ids, missing, await db_service.get_careers_by_ids(
+            [ids["Data Engineer"], missing, "bad", ids["Data Analyst"], ids["Data Engineer"]], fields=["title"])
+
+    ids, missing, results = asyncio.run(run())
+    assert [r.get("career", {}).get("title") for r in results] == ["Data Engineer", None, None, "Data Analyst", "Data Engineer"]
+    assert results[1] == {"id": missing, "found": False, "error": "not_found"}
+    assert results[2] == {"id": "bad", "found": False, "error": "invalid_id"}
+    assert set(results[0]["career"]) == {"id", "title"}
+
+
+@pytest.mark.parametrize("fields", [["contentHash"], ["title", "$where"], ["skills.0"]])
+def test_get_careers_by_ids_rejects_non_public_fields(fields):
+    db_service = make_service()
+    with pytest.raises(ValueError, match="Unknown career fields"):
+        asyncio.run(db_service.get_careers_by_ids(["0" * 24], fields=fields))
+
+
+def test_range_filters_and_sorting_agree_between_mongo_and_the_search_index():
+    db_service = make_service()
+
+    async def run():
+        await ingest(db_service,
+                     {**BASE, "title": "Data Scientist", "averageSalary": "$100,000 - $150,000", "growthRate": "30%", "skills": ["ml"]},
+                     {**BASE, "title": "Data Engineer", "averageSalary": "$90k - $130k", "growthRate": "20%", "skills": ["spark"]},
+                     {**BASE, "title": "Data Clerk", "averageSalary": "$40,000", "growthRate": "Stable", "skills": ["excel"]})
+        queries = [{"min_salary": 120000}, {"max_salary": 95000}, {"min_growth": 0}, {"sort": "growth"},
+                   {"sort": "salary", "order": "asc"}]
+        by_mongo = [[c["title"] for c in await db_service.get_careers(search=None, **q)] for q in queries]
+        await db_service.sync_search_index()
+        by_index = [[c["title"] for c in await db_service.get_careers(search="data", **q)] for q in queries]
+        return by_mongo, by_index
+
+    by_mongo, by_index = asyncio.run(run())
+    assert by_mongo[0] == ["Data Scientist", "Data Engineer"]
+    assert by_mongo[1] == ["Data Engineer", "Data Clerk"]
+    # A missing growth value never matches a growth bound
+    assert by_mongo[2] == ["Data Scientist", "Data Engineer"]
+    assert by_mongo[4] == ["Data Clerk", "Data Engineer", "Data Scientist"]
+    assert [sorted(t) for t in by_index[:3]] == [sorted(t) for t in by_mongo[:3]]
+    assert by_index[3:] == by_mongo[3:]
+
+
+def test_pool_listener_counts_pool_clears():
+    listener = PoolStatsListener()
+    listener.pool_cleared(object())
+    listener.pool_cleared(object())
+    assert listener.snapshot()["poolCleared"] == 2
+
+
+def test_version_change_reconciles_in_the_background():
+    db_service = make_service()
+
+    async def run():
+        await ingest(db_service, {**BASE, "title": "Data Analyst", "skills": ["sql"]})
+        await db_service.sync_search_index()
+        await ingest(db_service, {**BASE, "title": "Data Engineer", "skills": ["spark"]})
+        release = asyncio.Event()
+        sync = db_service.sync_search_index
+
+        async def slow_sync():
+            await release.wait()
+            await sync()
+        db_service.sync_search_index = slow_sync
+
+        # The request is served from the current index without waiting for the reconcile
+        before = [c["title"] for c in await asyncio.wait_for(db_service.get_careers(search="data"), 1)]
+        release.set()
+        for _ in range(20):
+            await asyncio.sleep(0)
+        return before, [c["title"] for c in await db_service.get_careers(search="data")]
+
+    before, after = asyncio.run(run())
+    assert before == ["Data Analyst"]
+    assert sorted(after) == ["Data Analyst", "Data Engineer"]
+
+
+def test_search_hits_have_the_same_shape_as_catalog_reads():
+    db_service = make_service()
+
+    async def run():
+        await ingest(db_service, {**BASE, "title": "Data Analyst", "skills": ["sql"]})
+        await db_service.db.careers.update_many({}, {"$set": {"relatedCareers": ["x"]}})
+        await db_service.sync_search_index()
+        return (await db_service.get_careers(search="analyst"))[0], (await db_service.get_careers())[0]
+
+    hit, listed = asyncio.run(run())
+    assert hit == listed and hit["relatedCareers"] == ["x"]
+
+
+def test_salary_facets_include_an_open_ended_top_band():
+    db_service = make_service()
+
+    async def run():
+        await ingest(db_service,
+                     {**BASE, "title": "Data Analyst", "averageSalary": "$60,000", "skills": ["sql"]},
+                     {**BASE, "title": "Chief Data Officer", "averageSalary": "$300,000 - $400,000", "skills": ["strategy"]})
+        return await db_service.get_career_facets()
+
+    facets = asyncio.run(run())
+    assert facets["total"] == 2
+    assert facets["salaryBands"] == [{"min": 50000, "max": 75000, "count": 1}, {"min": 250000, "max": None, "count": 1}]
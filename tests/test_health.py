@@ -0,0 +1,17 @@
+from health import Readiness, OK, ERROR, STARTING
+
+
+def test_ready_only_once_every_required_component_is_ok():
+    readiness = Readiness(["database", "search"])
+    assert not readiness.is_ready()
+    assert readiness.snapshot()["components"]["search"] == {"status": STARTING}
+
+    readiness.mark("database", OK)
+    readiness.mark("search", ERROR, "index build failed")
+    assert not readiness.is_ready()
+    assert readiness.snapshot()["components"]["search"]["detail"] == "index build failed"
+
+    readiness.mark("search", OK)
+    # Optional components do not gate readiness
+    readiness.mark("ai", ERROR)
+    assert readiness.is_ready() and readiness.snapshot()["ready"]
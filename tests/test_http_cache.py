@@ -0,0 +1,44 @@
+from datetime import datetime
+
+from starlette.requests import Request
+
+from http_cache import make_etag, is_not_modified, validator_headers
+
+MODIFIED = datetime(2024, 5, 1, 12, 0, 0, 500000)
+
+
+def make_request(path="/api/careers", query=b"", headers=None):
+    return Request({
+        "type": "http", "method": "GET", "path": path, "query_string": query, "root_path": "",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+    })
+
+
+def test_etag_ignores_query_order_and_tracks_version():
+    a = make_etag(3, make_request(query=b"category=Tech&limit=10"))
+    assert a == make_etag(3, make_request(query=b"limit=10&category=Tech"))
+    assert a != make_etag(4, make_request(query=b"category=Tech&limit=10"))
+    assert a != make_etag(3, make_request(path="/api/careers/facets", query=b"category=Tech&limit=10"))
+
+
+def test_if_none_match_uses_weak_comparison_and_wins_over_dates():
+    etag = make_etag(1, make_request())
+    assert is_not_modified(make_request(headers={"If-None-Match": f'"other", W/{etag}'}), etag, MODIFIED)
+    assert is_not_modified(make_request(headers={"If-None-Match": "*"}), etag, MODIFIED)
+    stale = {"If-None-Match": '"other"', "If-Modified-Since": "Wed, 01 May 2024 13:00:00 GMT"}
+    assert not is_not_modified(make_request(headers=stale), etag, MODIFIED)
+
+
+def test_if_modified_since_compares_whole_seconds():
+    etag = make_etag(1, make_request())
+    assert is_not_modified(make_request(headers={"If-Modified-Since": "Wed, 01 May 2024 12:00:00 GMT"}), etag, MODIFIED)
+    assert not is_not_modified(make_request(headers={"If-Modified-Since": "Wed, 01 May 2024 11:59:59 GMT"}), etag, MODIFIED)
+    assert not is_not_modified(make_request(headers={"If-Modified-Since": "not a date"}), etag, MODIFIED)
+
+
+def test_validator_headers():
+    headers = validator_headers('"abc"', MODIFIED)
+    assert headers["ETag"] == '"abc"'
+    assert headers["Last-Modified"] == "Wed, 01 May 2024 12:00:00 GMT"
+    assert headers["Cache-Control"].startswith("public, max-age=")
+    assert "Last-Modified" not in validator_headers('"abc"', None)
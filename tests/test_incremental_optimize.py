@@ -0,0 +1,142 @@
+import asyncio
+
+from incremental_optimize import IncrementalOptimizer, bullet_hash
+
+
+class DictStore:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value):
+        self.data[key] = value
+
+
+class FakeAI:
+    """optimize_resume stand-in that rewrites every bullet it is sent"""
+
+    jd_index = None
+
+    def __init__(self):
+        self.sent = []
+        self.failing = False
+
+    async def optimize_resume(self, job_info, use_fallback=True):
+        self.sent.append([list(job["bullets"]) for job in job_info["jobs"]])
+        if self.failing:
+            raise RuntimeError("provider down")
+        return {
+            "optimizedGuide": "guide",
+            "proTips": ["tip"],
+            "jobEdits": [
+                {"jobIndex": i, "bulletEdits": [{"original": b, "improved": b.upper()} for b in job["bullets"]]}
+                for i, job in enumerate(job_info["jobs"])
+            ],
+        }
+
+    def _fallback_resume_optimization(self, job_info):
+        return {"optimizedGuide": "generic", "optimizedContent": "generic", "suggestions": [], "proTips": ["generic tip"]}
+
+
+def job_info(*bullets):
+    return {"jobTitle": "Data Engineer", "company": "Acme", "jobDescription": "Build pipelines",
+            "jobs": [{"company": "Initech", "role": "Analyst", "bullets": list(bullets)}]}
+
+
+def test_bullet_hash_ignores_whitespace_and_case():
+    job = {"company": "Initech", "role": "Analyst"}
+    assert bullet_hash(job, "Built  ETL jobs") == bullet_hash(job, "built etl jobs ")
+    assert bullet_hash(job, "Built ETL jobs") != bullet_hash({**job, "role": "Lead"}, "Built ETL jobs")
+
+
+def test_only_new_bullets_go_to_the_llm():
+    ai = FakeAI()
+    optimizer = IncrementalOptimizer(ai, DictStore())
+    partials = []
+
+    async def on_partial(partial):
+        partials.append(partial)
+
+    async def run():
+        await optimizer.optimize(job_info("built etl jobs", "wrote reports"), "s1")
+        return await optimizer.optimize(job_info("Built  ETL jobs", "mentored interns"), "s1", on_partial)
+
+    result, reused = asyncio.run(run())
+    assert ai.sent == [[["built etl jobs", "wrote reports"]], [["mentored interns"]]]
+    assert reused == 1
+    edits = result["jobEdits"][0]["bulletEdits"]
+    # Reused edits echo the bullet as sent this time
+    assert edits == [{"original": "Built  ETL jobs", "improved": "BUILT ETL JOBS"},
+                     {"original": "mentored interns", "improved": "MENTORED INTERNS"}]
+    assert partials == [{"jobEdits": [{**result["jobEdits"][0], "bulletEdits": edits[:1]}], "pendingBullets": 1}]
+
+
+def test_unchanged_resume_is_served_from_the_session():
+    ai = FakeAI()
+    optimizer = IncrementalOptimizer(ai, DictStore())
+
+    async def run():
+        await optimizer.optimize(job_info("built etl jobs"), "s1")
+        return await optimizer.optimize(job_info("built etl jobs"), "s1")
+
+    result, reused = asyncio.run(run())
+    assert len(ai.sent) == 1 and reused == 1
+    assert result["optimizedGuide"] == "guide" and result["proTips"] == ["tip"]
+
+
+def test_sessions_and_job_descriptions_are_isolated():
+    ai = FakeAI()
+    optimizer = IncrementalOptimizer(ai, DictStore())
+
+    async def run():
+        await optimizer.optimize(job_info("built etl jobs"), "s1")
+        await optimizer.optimize(job_info("built etl jobs"), "s2")
+        await optimizer.optimize({**job_info("built etl jobs"), "jobDescription": "Lead analytics"}, "s1")
+
+    asyncio.run(run())
+    assert len(ai.sent) == 3
+
+
+def test_edits_map_back_by_text_then_position():
+    optimizer = IncrementalOptimizer(FakeAI(), DictStore())
+    job = {"company": "Initech", "role": "Analyst", "bullets": ["a one", "b two", "c three"]}
+    fresh = optimizer._index_edits([
+        {"jobIndex": 0, "bulletEdits": [{"original": "C THREE", "improved": "3"}, {"original": "??", "improved": "1"},
+                                        {"original": "??", "improved": "2"}]},
+        {"jobIndex": 7, "bulletEdits": [{"original": "a one", "improved": "x"}]},
+    ], [job])
+    assert {edit["improved"] for edit in fresh.values()} == {"1", "2", "3"}
+    assert fresh[bullet_hash(job, "c three")]["improved"] == "3"
+    assert fresh[bullet_hash(job, "a one")]["improved"] == "1"
+
+
+def test_changed_resume_context_recomputes_the_guide():
+    ai = FakeAI()
+    optimizer = IncrementalOptimizer(ai, DictStore())
+
+    async def run():
+        await optimizer.optimize({**job_info("built etl jobs"), "resumeContext": "Skills\nSQL"}, "s1")
+        await optimizer.optimize({**job_info("built etl jobs"), "resumeContext": "Skills\nSQL"}, "s1")
+        return await optimizer.optimize({**job_info("built etl jobs"), "resumeContext": "Skills\nSQL, Spark"}, "s1")
+
+    _, reused = asyncio.run(run())
+    assert ai.sent == [[["built etl jobs"]], [[]]] and reused == 1
+
+
+def test_llm_failure_is_served_but_not_stored_in_the_session():
+    ai = FakeAI()
+    optimizer = IncrementalOptimizer(ai, DictStore())
+
+    async def run():
+        ai.failing = True
+        degraded, _ = await optimizer.optimize(job_info("built etl jobs"), "s1")
+        ai.failing = False
+        recovered, _ = await optimizer.optimize(job_info("built etl jobs"), "s1")
+        return degraded, recovered
+
+    degraded, recovered = asyncio.run(run())
+    assert degraded["optimizedGuide"] == "generic" and degraded["jobEdits"][0]["bulletEdits"] == []
+    assert recovered["optimizedGuide"] == "guide" and recovered["jobEdits"][0]["bulletEdits"]
+    assert len(ai.sent) == 2
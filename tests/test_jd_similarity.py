@@ -0,0 +1,63 @@
+import numpy as np
+
+from jd_similarity import JDSimilarityIndex, MinHasher, canonicalize_jd, shingles
+
+JD = "\n".join([
+    "We are hiring a data engineer to design and maintain batch and streaming pipelines.",
+    "You will own ingestion from product databases into the warehouse and keep data quality high.",
+    "Work closely with analysts to model metrics, tune slow queries and document datasets.",
+    "Experience with Python, SQL, Spark and Airflow on a cloud platform is expected.",
+    "You will mentor two junior engineers and take part in the on-call rotation.",
+    "We offer remote work, a learning budget and a generous parental leave policy.",
+])
+
+
+def test_canonicalize_strips_links_boilerplate_and_whitespace():
+    noisy = "Apply now at https://jobs.example.com/123?utm=x\n  Build   pipelines  \nPosted 3 days ago\n\n"
+    assert canonicalize_jd(noisy) == "Build pipelines"
+
+
+def test_minhash_estimates_jaccard():
+    hasher = MinHasher(num_permutations=512)
+    a = [f"item {i}" for i in range(100)]
+    b = [f"item {i}" for i in range(50, 150)]  # Jaccard 50/150
+    estimate = float(np.mean(hasher.signature(a) == hasher.signature(b)))
+    assert abs(estimate - 1 / 3) < 0.08
+    assert np.array_equal(hasher.signature(a), hasher.signature(list(reversed(a))))
+
+
+def test_exact_and_near_duplicates_share_a_key():
+    index = JDSimilarityIndex(threshold=0.8)
+    first = index.resolve(JD, "Data Engineer", "Acme")
+    assert first.exact
+    assert index.resolve("  " + JD.replace("\n", "\n\n") + "\nApply now", "Data Engineer", "ACME").key == first.key
+
+    edited = JD.replace("two junior engineers", "three junior engineers")
+    near = index.resolve(edited, "Data Engineer", "Acme")
+    assert near.key == first.key and not near.exact and near.similarity >= 0.8
+    assert near.text == canonicalize_jd(JD)
+    assert index.counters.snapshot() == {"new": 1, "exact": 1, "near": 1}
+
+
+def test_different_company_or_title_is_a_different_job():
+    index = JDSimilarityIndex()
+    first = index.resolve(JD, "Data Engineer", "Acme")
+    assert index.resolve(JD, "Data Engineer", "Globex").key != first.key
+    assert index.resolve(JD, "Analytics Engineer", "Acme").key != first.key
+
+
+def test_short_postings_only_match_exactly():
+    index = JDSimilarityIndex(threshold=0.5)
+    short = "Data engineer, Python and SQL."
+    assert len(shingles(short)) < 20
+    first = index.resolve(short, "Data Engineer", "Acme")
+    assert index.resolve(short + " Remote.", "Data Engineer", "Acme").key != first.key
+
+
+def test_least_recently_matched_entries_are_evicted():
+    index = JDSimilarityIndex(max_entries=2)
+    keys = [index.resolve(JD, "Data Engineer", company).key for company in ("A", "B")]
+    index.resolve(JD, "Data Engineer", "A")  # touch A so B is the oldest
+    index.resolve(JD, "Data Engineer", "C")
+    assert set(index.entries) == {keys[0], index.resolve(JD, "Data Engineer", "C").key}
+    assert all(keys[1] not in bucket for bucket in index.buckets.values())
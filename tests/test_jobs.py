@@ -0,0 +1,123 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import jobs
+from jobs import JobQueue, InMemoryJobStore, QUEUED, RUNNING, SUCCEEDED, FAILED
+
+
+async def echo(payload):
+    return {"echo": payload}
+
+
+async def wait_for_status(store, job_id, status, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while asyncio.get_running_loop().time() < deadline:
+        doc = await store.get(job_id)
+        if doc and doc["status"] == status:
+            return doc
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job {job_id} never reached {status}: {await store.get(job_id)}")
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_unknown_job_type_fails_without_killing_the_worker():
+    async def scenario():
+        store = InMemoryJobStore()
+        queue = JobQueue(store, workers=1)
+        queue.register("echo", echo)
+        stale = await queue.submit("echo", {"n": 1})
+        # A job type this process does not know (e.g. from another deploy)
+        store.jobs[stale["_id"]]["type"] = "retired"
+        queue.start()
+        try:
+            failed = await wait_for_status(store, stale["_id"], FAILED)
+            assert "Unknown job type" in failed["error"]
+            ok = await queue.submit("echo", {"n": 2})
+            done = await wait_for_status(store, ok["_id"], SUCCEEDED)
+            assert done["result"] == {"echo": {"n": 2}}
+        finally:
+            await queue.stop()
+    run(scenario())
+
+
+def test_failing_finish_does_not_kill_the_worker():
+    class FlakyStore(InMemoryJobStore):
+        def __init__(self):
+            super().__init__()
+            self.finish_failures = 1
+
+        async def finish(self, job_id, worker_id, update):
+            if self.finish_failures:
+                self.finish_failures -= 1
+                raise RuntimeError("mongo down")
+            await super().finish(job_id, worker_id, update)
+
+    async def boom(payload):
+        raise ValueError("handler failed")
+
+    async def scenario():
+        store = FlakyStore()
+        queue = JobQueue(store, workers=1)
+        queue.register("boom", boom)
+        queue.register("echo", echo)
+        lost = await queue.submit("boom", {})
+        queue.start()
+        try:
+            ok = await queue.submit("echo", {"n": 3})
+            await wait_for_status(store, ok["_id"], SUCCEEDED)
+            # The failure could not be recorded, so the job stays leased until the lease lapses
+            assert (await store.get(lost["_id"]))["status"] != QUEUED
+            assert store.finish_failures == 0
+        finally:
+            await queue.stop()
+    run(scenario())
+
+
+def test_exhausted_attempts_are_marked_failed(monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_MAX_ATTEMPTS", 0)
+
+    async def scenario():
+        store = InMemoryJobStore()
+        queue = JobQueue(store, workers=1)
+        queue.register("echo", echo)
+        job = await queue.submit("echo", {})
+        queue.start()
+        try:
+            failed = await wait_for_status(store, job["_id"], FAILED)
+            assert failed["error"] == "Job exceeded maximum attempts"
+        finally:
+            await queue.stop()
+    run(scenario())
+
+
+def test_leases_are_exclusive_until_they_lapse():
+    async def scenario():
+        store = InMemoryJobStore()
+        queue = JobQueue(store, workers=1)
+        queue.register("echo", echo)
+        job = await queue.submit("echo", {})
+        claimed = await store.claim("w1")
+        assert claimed["_id"] == job["_id"] and claimed["attempts"] == 1
+        assert await store.claim("w2") is None
+        # Only the lease holder can renew or finish
+        store.jobs[job["_id"]]["leaseUntil"] = datetime.utcnow() - timedelta(seconds=1)
+        await store.renew(job["_id"], "w2")
+        reclaimed = await store.claim("w2")
+        assert reclaimed["workerId"] == "w2" and reclaimed["attempts"] == 2
+        await store.finish(job["_id"], "w1", {"status": SUCCEEDED})
+        assert (await store.get(job["_id"]))["status"] == RUNNING
+    run(scenario())
+
+
+def test_oldest_queued_job_is_claimed_first():
+    async def scenario():
+        store = InMemoryJobStore()
+        queue = JobQueue(store, workers=1)
+        queue.register("echo", echo)
+        first = await queue.submit("echo", {"n": 1})
+        await queue.submit("echo", {"n": 2})
+        assert (await store.claim("w1"))["_id"] == first["_id"]
+    run(scenario())
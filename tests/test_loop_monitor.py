@@ -0,0 +1,49 @@
+import pytest
+from fastapi import FastAPI
+from starlette.requests import Request
+
+from loop_monitor import LoopLagMonitor, AdmissionController
+
+
+def make_controller(lag):
+    monitor = LoopLagMonitor()
+    monitor.current_lag = lag
+    return AdmissionController(monitor, budget=0.1, low_priority=["/api/careers/recommend", "/api/reports/"])
+
+
+def test_high_priority_paths_are_always_admitted_and_not_counted():
+    controller = make_controller(lag=1.0)
+    assert controller.admit("/api/careers")
+    assert controller.counters.snapshot() == {}
+
+
+def test_low_priority_paths_are_shed_while_lagging():
+    controller = make_controller(lag=1.0)
+    assert not controller.admit("/api/careers/recommend", "/api/careers/recommend")
+    controller.monitor.current_lag = 0.0
+    assert controller.admit("/api/careers/recommend", "/api/careers/recommend")
+    assert controller.counters.snapshot() == {"shed./api/careers/recommend": 1, "admitted./api/careers/recommend": 1}
+
+
+def test_counters_are_keyed_by_route_not_raw_path():
+    controller = make_controller(lag=0.0)
+    for report_id in range(50):
+        controller.admit(f"/api/reports/{report_id}", "/api/reports/{report_id}")
+        controller.admit(f"/api/reports/{report_id}/missing")
+    assert controller.counters.snapshot() == {"admitted./api/reports/{report_id}": 50, "admitted.unmatched": 50}
+
+
+def test_route_template_resolves_before_routing():
+    server = pytest.importorskip("server")
+    app = FastAPI()
+
+    @app.get("/api/reports/{report_id}")
+    async def report(report_id: str):
+        return {}
+
+    def request(path):
+        return Request({"type": "http", "method": "GET", "path": path, "root_path": "", "query_string": b"",
+                        "headers": [], "app": app})
+
+    assert server.route_template(request("/api/reports/7")) == "/api/reports/{report_id}"
+    assert server.route_template(request("/api/nothing")) is None
@@ -0,0 +1,30 @@
+from metrics import Counters, LatencyRegistry, LatencyWindow
+
+
+def test_latency_window_keeps_totals_but_only_recent_percentiles():
+    latency = LatencyWindow(window=10)
+    for ms in range(1, 101):
+        latency.observe(ms / 1000, error=ms % 50 == 0)
+    snapshot = latency.snapshot()
+    assert snapshot["count"] == 100 and snapshot["errors"] == 2
+    assert snapshot["maxMs"] == 100.0 and snapshot["avgMs"] == 50.5
+    assert snapshot["p50Ms"] == 96.0 and snapshot["p99Ms"] == 100.0
+
+
+def test_empty_window_reports_zeroes():
+    assert LatencyWindow().snapshot() == {"count": 0, "errors": 0, "avgMs": 0.0, "maxMs": 0.0,
+                                          "p50Ms": 0.0, "p95Ms": 0.0, "p99Ms": 0.0}
+
+
+def test_registry_and_counters_snapshot_sorted():
+    registry = LatencyRegistry()
+    registry.observe("get_careers", 0.01)
+    registry.observe("get_career_by_id", 0.02)
+    assert list(registry.snapshot()) == ["get_career_by_id", "get_careers"]
+    assert registry.get("get_careers") is registry.get("get_careers")
+
+    counters = Counters()
+    counters.incr("b")
+    counters.incr("a", 3)
+    assert counters.snapshot() == {"a": 3, "b": 1}
+    assert counters.get("missing") == 0
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+import model_routing
+from ai_service import AIService
+from model_routing import ModelSpec, ModelRouter, Route, load_routes, BASELINE
+
+
+def test_defaults_keep_baseline_model_without_caps_or_budgets():
+    routes = load_routes({})
+    for route in routes.values():
+        assert route.primary == BASELINE
+        assert route.primary.max_tokens is None
+        assert route.budget is None
+
+
+def test_env_overrides():
+    routes = load_routes({
+        "AI_ROUTE_OPTIMIZE": "openai:gpt-4o:4000",
+        "AI_ROUTE_OPTIMIZE_BUDGET": "10",
+        "AI_ROUTE_CAREER_MATCH_SECONDARY": "none",
+    })
+    assert routes["optimize"].primary == ModelSpec("openai", "gpt-4o", 4000)
+    assert routes["optimize"].budget == 10.0
+    assert routes["career-match"].secondary is None
+
+
+def test_budget_that_leaves_no_room_for_failover_is_ignored():
+    routes = load_routes({"AI_ROUTE_OPTIMIZE_BUDGET": "40", "AI_TOTAL_BUDGET": "25"})
+    assert routes["optimize"].budget is None
+
+
+@pytest.mark.parametrize("value", ["gpt-4o", "openai:", ":gpt-4o", "a:b:c:d"])
+def test_invalid_model_spec(value):
+    with pytest.raises(ValueError):
+        ModelSpec.parse(value)
+
+
+def make_service(routes, total_budget, delays):
+    service = AIService(router=ModelRouter(routes, total_budget=total_budget))
+    calls = []
+
+    async def fake_call(system_message, prompt, spec):
+        calls.append(spec.name)
+        await asyncio.sleep(delays.get(spec.name, 0))
+        return f"from {spec.name}"
+    service._call = fake_call
+    return service, calls
+
+
+def test_failover_after_primary_budget():
+    primary, secondary = ModelSpec("openai", "slow"), ModelSpec("gemini", "fast")
+    routes = {"optimize": Route("optimize", primary, secondary, budget=0.05), "default": Route("default", primary)}
+    service, calls = make_service(routes, total_budget=1.0, delays={primary.name: 1.0})
+    assert asyncio.run(service._send("s", "p", task="optimize")) == "from gemini:fast"
+    assert calls == [primary.name, secondary.name]
+
+
+def test_total_budget_bounds_the_whole_call():
+    primary, secondary = ModelSpec("openai", "slow"), ModelSpec("gemini", "slow")
+    routes = {"optimize": Route("optimize", primary, secondary, budget=0.05), "default": Route("default", primary)}
+    service, _ = make_service(routes, total_budget=0.15, delays={primary.name: 1.0, secondary.name: 1.0})
+
+    async def timed():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        with pytest.raises(asyncio.TimeoutError):
+            await service._send("s", "p", task="optimize")
+        return loop.time() - start
+    assert asyncio.run(timed()) < 0.5
+
+
+def test_errors_fail_over_and_trip_the_cooldown(monkeypatch):
+    monkeypatch.setattr(model_routing, "FAILOVER_THRESHOLD", 2)
+    primary, secondary = ModelSpec("openai", "broken"), ModelSpec("gemini", "ok")
+    router = ModelRouter({"optimize": Route("optimize", primary, secondary), "default": Route("default", primary)})
+    for _ in range(2):
+        router.record("optimize", primary, 0.1, ok=False)
+    assert router.candidates("optimize") == [secondary, primary]
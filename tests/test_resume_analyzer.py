@@ -0,0 +1,44 @@
+from resume_analyzer import tokenize, split_bullets, extract_keywords, ResumeAnalyzer
+
+JD = """Senior Data Engineer. You will build data pipelines in Python and SQL on AWS.
+Data pipelines must be reliable; experience with Spark and Airflow is preferred. Python is required."""
+
+
+def test_tokenize_keeps_tech_terms():
+    assert tokenize("Shipped C++ and Node.js services via CI/CD.") == ["shipped", "c++", "and", "node.js", "services", "via", "ci/cd"]
+
+
+def test_split_bullets_skips_headings_and_short_lines():
+    text = "Jane Doe\nEXPERIENCE\n• Built ETL jobs in Python\nManaged a team of five engineers daily\nShort line here"
+    assert split_bullets(text) == ["Built ETL jobs in Python", "Managed a team of five engineers daily"]
+
+
+def test_extract_keywords_boosts_skills_and_repeated_bigrams():
+    keywords = dict(extract_keywords(JD, "Data Engineer"))
+    # "data pipelines" repeats and shares the title's terms; python is a known skill
+    assert keywords["data pipelines"] == 1.0
+    assert keywords["python"] > keywords["pipelines"]
+    # A one-off bigram that is not a known skill is noise
+    assert "reliable experience" not in keywords
+    assert "experience" not in keywords
+
+
+def test_analyze_scores_coverage_and_bullet_quality():
+    jobs = [{"role": "Data Engineer", "company": "Acme", "bullets": [
+        "Built data pipelines in Python and SQL processing 2M rows a day",
+        "Responsible for weekly reports",
+    ]}]
+    result = ResumeAnalyzer().analyze(JD, "Data Engineer", jobs=jobs)
+    assert "python" in result["matchedKeywords"]
+    assert "spark" in result["missingSkills"]
+    first, second = result["bulletScores"]
+    assert first["startsWithActionVerb"] and first["quantified"] and first["relevance"] > 0
+    assert second["jobIndex"] == 0 and second["bulletIndex"] == 1 and second["relevance"] == 0
+    assert result["actionVerbStats"]["weakOpenerCount"] == 1
+    assert 0 < result["atsScore"] < 100
+
+
+def test_analyze_without_bullets_scores_coverage_only():
+    result = ResumeAnalyzer().analyze(JD, resume_text="Skills: Python, SQL, AWS")
+    assert result["bulletScores"] == []
+    assert result["atsScore"] == round(100 * result["keywordCoverage"] * 0.6, 1)
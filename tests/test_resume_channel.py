@@ -0,0 +1,119 @@
+import asyncio
+import json
+
+from starlette.websockets import WebSocketDisconnect
+
+from resume_channel import ResumeChannel
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.incoming: asyncio.Queue = asyncio.Queue()
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def receive_text(self):
+        message = await self.incoming.get()
+        if message is None:
+            raise WebSocketDisconnect()
+        return message
+
+    async def send_text(self, text):
+        self.sent.append(json.loads(text))
+
+    def of(self, request_id):
+        return [m["type"] for m in self.sent if m.get("id") == request_id]
+
+
+def run_channel(messages, handlers, max_in_flight=8, settle=0.05):
+    async def run():
+        ws = FakeWebSocket()
+        channel = ResumeChannel(ws, handlers, max_in_flight=max_in_flight)
+        task = asyncio.create_task(channel.run())
+        for message in messages:
+            await ws.incoming.put(message if isinstance(message, str) else json.dumps(message))
+            await asyncio.sleep(0)
+        await asyncio.sleep(settle)
+        await ws.incoming.put(None)
+        await task
+        return ws, channel
+
+    return asyncio.run(run())
+
+
+async def echo(payload, push):
+    await push({"step": 1})
+    return {"echo": payload}
+
+
+async def slow(payload, push):
+    await asyncio.sleep(10)
+    return {}
+
+
+def test_result_with_partials():
+    ws, _ = run_channel([{"id": 1, "op": "echo", "payload": {"x": 1}}], {"echo": echo})
+    assert ws.of("1") == ["accepted", "partial", "result"]
+    assert ws.sent[-1]["data"] == {"echo": {"x": 1}}
+
+
+def test_same_key_supersedes_unfinished_request():
+    ws, _ = run_channel([
+        {"id": "a", "op": "slow", "key": "bullet:0-1"},
+        {"id": "b", "op": "echo", "key": "bullet:0-1"},
+    ], {"slow": slow, "echo": echo})
+    assert ws.of("a") == ["accepted", "cancelled"]
+    assert [m for m in ws.sent if m.get("id") == "a"][-1]["by"] == "b"
+    assert ws.of("b")[-1] == "result"
+
+
+def test_client_cancel_and_disconnect_cancel_work():
+    ws, channel = run_channel([
+        {"id": "a", "op": "slow"},
+        {"id": "a", "op": "cancel"},
+        {"id": "b", "op": "slow"},
+    ], {"slow": slow})
+    assert ws.of("a") == ["accepted", "cancelled"]
+    assert ws.of("b") == ["accepted"]
+    assert not channel.tasks
+    assert channel.counters.snapshot()["cancelled.disconnect"] >= 1
+
+
+def test_rejects_bad_messages_unknown_ops_duplicates_and_overload():
+    ws, _ = run_channel([
+        "not json",
+        {"id": "a", "op": "nope"},
+        {"id": "b", "op": "slow"},
+        {"id": "b", "op": "slow"},
+        {"id": "c", "op": "slow"},
+    ], {"slow": slow}, max_in_flight=1)
+    errors = [m["error"] for m in ws.sent if m["type"] == "error"]
+    assert errors == ["expected JSON with id and op", "unknown op 'nope'", "duplicate request id",
+                      "too many requests in flight"]
+
+
+def test_handler_failure_reports_internal_error():
+    async def broken(payload, push):
+        raise RuntimeError("boom")
+
+    ws, _ = run_channel([{"id": "a", "op": "broken"}], {"broken": broken})
+    assert ws.sent[-1] == {"id": "a", "type": "error", "error": "internal error"}
+
+
+def test_superseded_requests_free_their_slot_at_once():
+    async def slow_to_unwind(payload, push):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            await asyncio.sleep(0.02)
+            raise
+
+    ws, channel = run_channel([
+        {"id": "a", "op": "slow", "key": "bullet:0-1"},
+        {"id": "b", "op": "echo", "key": "bullet:0-1"},
+    ], {"slow": slow_to_unwind, "echo": echo}, max_in_flight=1)
+    assert ws.of("a") == ["accepted", "cancelled"]
+    assert ws.of("b") == ["accepted", "partial", "result"]
+    assert not channel.tasks and not channel.cancelling
@@ -0,0 +1,60 @@
+from resume_segmenter import context_from_text, heading_section, jobs_from_text, segment_resume
+
+RESUME = """Jane Doe
+jane@example.com
+
+Professional Summary
+Data engineer with six years of experience.
+
+Work Experience
+Senior Data Engineer | Acme Inc | Jan 2020 - Present
+• Built streaming pipelines processing 2M events per day
+• Cut warehouse costs by 30% through query
+  tuning and partitioning
+
+Data Analyst at Globex Corporation
+2016 - 2019
+- Automated weekly reporting for the finance team
+- Designed dashboards used by 200 people
+
+Education
+BS Computer Science, State University, 2016
+"""
+
+
+def test_headings_tolerate_case_colons_and_ampersands():
+    assert heading_section("WORK EXPERIENCE:") == "experience"
+    assert heading_section("Honors & Awards") == "awards"
+    assert heading_section("Built pipelines for the experience team") is None
+
+
+def test_sections_and_jobs_are_segmented():
+    result = segment_resume(RESUME)
+    assert [s["name"] for s in result["sections"]] == ["other", "summary", "experience", "education"]
+    first, second = result["jobs"]
+    assert (first["role"], first["company"], first["period"]) == ("Senior Data Engineer", "Acme Inc", "Jan 2020 - Present")
+    # A wrapped bullet line is joined onto the bullet it continues
+    assert first["bullets"][1] == "Cut warehouse costs by 30% through query tuning and partitioning"
+    assert (second["role"], second["company"], second["period"]) == ("Data Analyst", "Globex Corporation", "2016 - 2019")
+    assert len(second["bullets"]) == 2
+    assert result["confidence"] >= 0.9
+
+
+def test_unmarked_bullets_after_a_dated_header():
+    text = "Experience\nSoftware Engineer, Initech LLC, 2018 - 2021\nDeveloped internal tools for the support team\nLed migration of billing services to the cloud\n"
+    job, = segment_resume(text)["jobs"]
+    assert job["company"] == "Initech LLC" and len(job["bullets"]) == 2
+
+
+def test_jobs_from_text_falls_back_when_not_confident():
+    assert jobs_from_text("Just a paragraph about me and what I like to do on weekends.") is None
+    assert jobs_from_text("") is None
+    jobs = jobs_from_text(RESUME)
+    assert [set(job) for job in jobs] == [{"company", "role", "period", "bullets"}] * 2
+
+
+def test_context_keeps_the_sections_without_job_bullets():
+    context = context_from_text(RESUME)
+    assert context.startswith("Professional Summary\nData engineer with six years of experience.")
+    assert "Education\nBS Computer Science" in context
+    assert "Acme" not in context and "jane@example.com" not in context
@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+
+from jobs import JobQueue, InMemoryJobStore, SUCCEEDED
+
+server = pytest.importorskip("server")
+
+
+class FakeRequest:
+    def __init__(self, headers=None, disconnect_after=None):
+        self.headers = headers or {}
+        self.polls = 0
+        self.disconnect_after = disconnect_after
+
+    async def is_disconnected(self):
+        self.polls += 1
+        return self.disconnect_after is not None and self.polls > self.disconnect_after
+
+
+def test_disconnect_cancels_the_ai_call(monkeypatch):
+    monkeypatch.setattr(server, "DISCONNECT_POLL_INTERVAL", 0.01)
+    cancelled = []
+
+    async def llm_call():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def run():
+        with pytest.raises(server.ClientDisconnected):
+            await server.cancel_on_disconnect(FakeRequest(disconnect_after=1), llm_call(), "identity")
+
+    before = server.ai_service.counters.get("disconnects.identity")
+    asyncio.run(run())
+    assert cancelled == [True]
+    assert server.ai_service.counters.get("disconnects.identity") == before + 1
+
+
+def test_connected_clients_and_job_workers_get_the_result(monkeypatch):
+    monkeypatch.setattr(server, "DISCONNECT_POLL_INTERVAL", 0.01)
+
+    async def llm_call():
+        await asyncio.sleep(0.03)
+        return "statement"
+
+    async def run():
+        return (await server.cancel_on_disconnect(FakeRequest(), llm_call(), "identity"),
+                await server.cancel_on_disconnect(None, llm_call(), "identity"))
+
+    assert asyncio.run(run()) == ("statement", "statement")
+
+
+def test_deadline_budget_from_header_or_route_default(monkeypatch):
+    monkeypatch.setattr(server, "AI_DEADLINE_MODE", False)
+    assert server.deadline_budget(None, "identity") is None
+    assert server.deadline_budget(FakeRequest(), "identity") is None
+    assert server.deadline_budget(FakeRequest({"x-deadline": "2.5"}), "identity") == 2.5
+    assert server.deadline_budget(FakeRequest({"x-deadline": "yes"}), "identity") == server.AI_DEADLINES["identity"]
+    monkeypatch.setattr(server, "AI_DEADLINE_MODE", True)
+    assert server.deadline_budget(FakeRequest(), "optimize") == server.AI_DEADLINES["optimize"]
+
+
+def deadline_scenario(monkeypatch, llm_seconds):
+    store = InMemoryJobStore()
+    monkeypatch.setattr(server, "job_queue", JobQueue(store, workers=1))
+    request = server.IdentityGenerationRequest(currentRole="Analyst", yearsExperience="3", education="BS", selectedSkills=["SQL"],
+                                               interests="data", achievements="dashboards", careerGoals="lead")
+
+    async def endpoint(request, http_request=None):
+        await asyncio.sleep(llm_seconds)
+        return server.IdentityGenerationResponse(success=True, statement="final")
+
+    def fallback():
+        return server.IdentityGenerationResponse(success=True, statement="template")
+
+    async def run():
+        response = await server.respond_by_deadline(FakeRequest(), 0.05, "identity", "identity", request, endpoint, fallback)
+        await asyncio.sleep(llm_seconds + 0.05)
+        return response, await store.get(response.resultToken) if response.resultToken else None
+
+    return asyncio.run(run())
+
+
+def test_fast_results_are_served_directly(monkeypatch):
+    response, job = deadline_scenario(monkeypatch, 0.0)
+    assert response.statement == "final" and not response.provisional and job is None
+
+
+def test_slow_results_fall_back_and_backfill_as_a_job(monkeypatch):
+    response, job = deadline_scenario(monkeypatch, 0.1)
+    assert response.statement == "template" and response.provisional
+    assert job["status"] == SUCCEEDED and job["result"]["statement"] == "final"
+
+
+def test_segmented_uploads_keep_summary_and_skills_in_the_prompt(monkeypatch):
+    sent = []
+
+    async def optimize_resume(job_info):
+        sent.append(job_info)
+        return {"optimizedGuide": "guide", "jobEdits": []}
+
+    monkeypatch.setattr(server.ai_service, "optimize_resume", optimize_resume)
+    resume = ("Summary\nData engineer with six years of experience.\n\nExperience\n"
+              "Senior Data Engineer | Acme Inc | Jan 2020 - Present\n- Built streaming pipelines for billing\n"
+              "- Cut warehouse costs by 30%\n\nSkills\nPython, SQL, Airflow\n")
+    request = server.ResumeOptimizationRequest(jobTitle="Data Engineer", company="Globex", jobDescription="Pipelines",
+                                               currentResume=resume)
+    response = asyncio.run(server.run_optimize(request))
+    assert response.success
+    job_info, = sent
+    assert [job["company"] for job in job_info["jobs"]] == ["Acme Inc"]
+    assert "Data engineer with six years of experience." in job_info["resumeContext"]
+    assert "Python, SQL, Airflow" in job_info["resumeContext"]
+
+
+def test_batch_lookup_rejects_unknown_fields_with_400():
+    from fastapi import HTTPException
+
+    request = server.CareerBatchRequest(ids=["0" * 24], fields=["title", "contentHash"])
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(server.get_careers_batch(request))
+    assert error.value.status_code == 400 and "contentHash" in error.value.detail
@@ -0,0 +1,44 @@
+import asyncio
+import os
+import stat
+
+from shared_cache import SharedCache, MemoryCacheBackend, SQLiteCacheBackend, cache_key
+
+
+def test_default_is_per_process_memory(monkeypatch):
+    monkeypatch.delenv("SHARED_CACHE_URL", raising=False)
+    assert isinstance(SharedCache().backend, MemoryCacheBackend)
+
+
+def test_cache_key_ignores_dict_order():
+    assert cache_key({"a": 1, "b": 2}, "x") == cache_key({"b": 2, "a": 1}, "x")
+    assert cache_key("x") != cache_key("y")
+
+
+def test_memory_namespace_round_trip_and_invalidate():
+    namespace = SharedCache("memory://").namespace("careers", ttl=60, max_entries=2)
+
+    async def run():
+        await namespace.set("a", {"value": 1})
+        await namespace.set("b", 2)
+        await namespace.set("c", 3)
+        evicted = await namespace.get("a")
+        kept = await namespace.get("c")
+        await namespace.invalidate()
+        return evicted, kept, await namespace.get("c")
+
+    assert asyncio.run(run()) == (None, 3, None)
+
+
+def test_sqlite_file_is_private_and_shared_between_instances(tmp_path):
+    url = f"sqlite:///{tmp_path / 'cache.sqlite3'}"
+    writer = SharedCache(url).namespace("ai")
+    reader = SharedCache(url).namespace("ai")
+
+    async def run():
+        await writer.set("k", ["v"])
+        return await reader.get("k")
+
+    assert asyncio.run(run()) == ["v"]
+    assert isinstance(writer.cache.backend, SQLiteCacheBackend)
+    assert stat.S_IMODE(os.stat(tmp_path / "cache.sqlite3").st_mode) == 0o600
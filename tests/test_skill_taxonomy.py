@@ -0,0 +1,55 @@
+import pytest
+
+from skill_taxonomy import SkillTaxonomy, PARENT_CREDIT, get_taxonomy
+
+SKILLS = [
+    {"id": 1, "slug": "programming", "name": "Programming", "parent": None, "synonyms": ["coding"], "exactOnly": True},
+    {"id": 2, "slug": "javascript", "name": "JavaScript", "parent": "programming", "synonyms": ["js", "java script"]},
+    {"id": 3, "slug": "typescript", "name": "TypeScript", "parent": "javascript", "synonyms": ["ts"]},
+    {"id": 4, "slug": "python", "name": "Python", "parent": "programming", "synonyms": []},
+    {"id": 5, "slug": "go", "name": "Go", "parent": "programming", "synonyms": ["golang"], "exactOnly": True},
+    {"id": 6, "slug": "html", "name": "HTML", "parent": None, "synonyms": []},
+    {"id": 7, "slug": "css", "name": "CSS", "parent": None, "synonyms": []},
+]
+
+
+@pytest.fixture
+def taxonomy():
+    return SkillTaxonomy(SKILLS, version=1)
+
+
+def test_labels_resolve_through_synonyms_and_slugs(taxonomy):
+    assert taxonomy.normalize("JS") == [2]
+    assert taxonomy.normalize("Java Script") == [2]
+    assert taxonomy.normalize("golang") == [5]
+    assert taxonomy.normalize("") == []
+
+
+def test_composite_labels_split_into_parts(taxonomy):
+    assert taxonomy.normalize("HTML/CSS") == [6, 7]
+    assert taxonomy.normalize_all(["Python and JavaScript", "JS", "css"]) == [4, 2, 7]
+
+
+def test_free_text_extraction_skips_ambiguous_short_words(taxonomy):
+    assert taxonomy.extract("Built apps in typescript and python; go to market fast") == [3, 4]
+    # Every label of an exactOnly skill only resolves as a whole label
+    assert taxonomy.extract("coding in golang") == []
+    assert taxonomy.normalize("coding") == [1]
+
+
+def test_ancestors_and_expand(taxonomy):
+    assert taxonomy.ancestors(3) == (2, 1)
+    assert taxonomy.expand([3]) == {3, 2, 1}
+
+
+def test_overlap_gives_full_credit_to_specific_skills_and_partial_to_siblings(taxonomy):
+    assert taxonomy.overlap([3], [2]) == 1.0  # TypeScript covers JavaScript
+    assert taxonomy.overlap([4], [2]) == PARENT_CREDIT  # Python and JavaScript share a parent
+    assert taxonomy.overlap([6], [2, 4]) == 0.0
+    assert taxonomy.overlap([2], []) == 0.0
+
+
+def test_bundled_taxonomy_loads():
+    taxonomy = get_taxonomy()
+    assert taxonomy.normalize("JavaScript") == taxonomy.normalize("js")
+    assert taxonomy.version is not None
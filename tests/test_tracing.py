@@ -0,0 +1,69 @@
+import json
+import os
+
+import pytest
+
+import tracing
+from tracing import Tracer, JsonlExporter, parse_traceparent
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+SAMPLED = f"00-{TRACE_ID}-00f067aa0ba902b7-01"
+
+
+class ListExporter:
+    name = "list"
+
+    def __init__(self):
+        self.spans = []
+
+    def export(self, span):
+        self.spans.append(span)
+        return True
+
+    def shutdown(self):
+        pass
+
+
+@pytest.mark.parametrize("header, expected", [
+    (SAMPLED, (TRACE_ID, "00f067aa0ba902b7", True)),
+    (f"00-{TRACE_ID}-00f067aa0ba902b7-00", (TRACE_ID, "00f067aa0ba902b7", False)),
+    ("00-" + "0" * 32 + "-00f067aa0ba902b7-01", None),
+    ("00-xyz-00f067aa0ba902b7-01", None),
+    (None, None),
+])
+def test_parse_traceparent(header, expected):
+    assert parse_traceparent(header) == expected
+
+
+def test_untrusted_sampled_flag_does_not_force_recording():
+    exporter = ListExporter()
+    tracer = Tracer(exporter, sample_rate=0.0, trust_incoming=False)
+    with tracer.start_trace("GET /api/careers", traceparent=SAMPLED) as root:
+        pass
+    assert root.trace_id == TRACE_ID and not root.sampled
+    assert exporter.spans == []
+
+
+def test_trusted_sampled_flag_is_honored_and_children_nest():
+    exporter = ListExporter()
+    tracer = Tracer(exporter, sample_rate=0.0, trust_incoming=True)
+    with tracer.start_trace("GET /api/careers", traceparent=SAMPLED) as root:
+        with tracer.span("db.get_careers") as child:
+            child.set(rows=3)
+    assert [s.name for s in exporter.spans] == ["db.get_careers", "GET /api/careers"]
+    assert child.parent_id == root.span_id and child.attributes == {"rows": 3}
+
+
+def test_jsonl_defaults_to_log_dir():
+    assert os.path.dirname(tracing.TRACE_FILE) == tracing.LOG_DIR
+    assert os.path.isabs(tracing.LOG_DIR)
+
+
+def test_jsonl_exporter_writes_one_span_per_line(tmp_path):
+    exporter = JsonlExporter(str(tmp_path / "logs" / "traces.jsonl"))
+    tracer = Tracer(exporter, sample_rate=1.0)
+    with tracer.start_trace("job cover-letter", jobType="cover-letter"):
+        pass
+    tracer.shutdown()
+    lines = (tmp_path / "logs" / "traces.jsonl").read_text().splitlines()
+    assert [json.loads(line)["attributes"] for line in lines] == [{"jobType": "cover-letter"}]
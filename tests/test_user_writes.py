@@ -0,0 +1,174 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from pymongo.errors import BulkWriteError, AutoReconnect
+
+from user_writes import PendingUpdate, UserWriteBuffer
+
+ALICE = str(ObjectId())
+BOB = str(ObjectId())
+
+
+def test_set_folds_child_paths_into_parent():
+    update = PendingUpdate()
+    update.set_fields({"careerIdentity.statement": "old"})
+    update.set_fields({"careerIdentity": {"statement": "new"}})
+    update.set_fields({"careerIdentity.generatedAt": "today"})
+    assert update.set == {"careerIdentity": {"statement": "new", "generatedAt": "today"}}
+    assert update.changes == 3
+
+
+def test_add_then_pull_cancels_out():
+    update = PendingUpdate()
+    update.add_to_set("savedCareers", "a")
+    update.pull_value("savedCareers", "a")
+    assert update.add == {"savedCareers": []}
+    assert update.pull == {"savedCareers": ["a"]}
+    update.add_to_set("savedCareers", "a")
+    assert update.add == {"savedCareers": ["a"]}
+    assert update.pull == {"savedCareers": []}
+
+
+def test_array_changes_apply_to_a_pending_set():
+    update = PendingUpdate()
+    update.set_fields({"savedCareers": ["a"]})
+    update.add_to_set("savedCareers", "b")
+    update.pull_value("savedCareers", "a")
+    assert update.set == {"savedCareers": ["b"]}
+    assert not update.add and not update.pull
+
+
+def test_operations_split_add_and_pull_of_the_same_field():
+    update = PendingUpdate()
+    update.pull_value("savedCareers", "a")
+    update.add_to_set("savedCareers", "b")
+    update.add_to_set("tags", "x")
+    first, second = update.operations(ALICE)
+    assert first._doc["$pull"] == {"savedCareers": {"$in": ["a"]}}
+    assert first._doc["$addToSet"] == {"tags": {"$each": ["x"]}}
+    assert second._doc == {"$addToSet": {"savedCareers": {"$each": ["b"]}}}
+
+
+def test_merge_applies_newer_changes_last():
+    older, newer = PendingUpdate(), PendingUpdate()
+    older.set_fields({"name": "Old"}, datetime(2024, 1, 1))
+    older.add_to_set("savedCareers", "a")
+    newer.set_fields({"name": "New"}, datetime(2024, 1, 2))
+    newer.pull_value("savedCareers", "a")
+    merged = older.merge(newer)
+    assert merged.set == {"name": "New"}
+    assert merged.pull == {"savedCareers": ["a"]}
+    assert merged.changes == 4
+
+    doc = {"_id": ALICE, "name": "Stored", "savedCareers": ["a", "c"]}
+    merged.apply(doc)
+    assert doc["name"] == "New" and doc["savedCareers"] == ["c"]
+
+
+class FakeUsers:
+    """bulk_write stand-in: applies UpdateOne $set ops to dicts, failing as scripted"""
+
+    def __init__(self):
+        self.docs = {}
+        self.calls = []
+        self.reject = set()
+        self.error = None
+        self.gate = None
+
+    async def bulk_write(self, ops, ordered=True):
+        self.calls.append(ops)
+        if self.gate is not None:
+            await self.gate.wait()
+        if self.error is not None:
+            raise self.error
+        errors = []
+        for i, op in enumerate(ops):
+            user_id = str(op._filter["_id"])
+            if user_id in self.reject:
+                errors.append({"index": i, "code": 2, "errmsg": "bad op"})
+                continue
+            self.docs.setdefault(user_id, {"_id": user_id}).update(op._doc.get("$set", {}))
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "writeConcernErrors": []})
+
+    async def find_one(self, user_id, started=None, release=None):
+        doc = dict(self.docs.get(user_id, {"_id": user_id}))
+        if started is not None:
+            started.set()
+            await release.wait()
+        return doc
+
+
+def make_buffer(users, **kwargs):
+    return UserWriteBuffer(lambda: users, enabled=False, **kwargs)
+
+
+def test_read_sees_a_flush_that_completes_while_it_waits():
+    users = FakeUsers()
+    buffer = UserWriteBuffer(lambda: users, enabled=True, flush_interval=60)
+
+    async def run():
+        await buffer.set_fields(ALICE, {"name": "New"})
+        started, release = asyncio.Event(), asyncio.Event()
+        # The read returns a document from before the flush, and completes after it
+        read = asyncio.create_task(buffer.read(users.find_one(ALICE, started, release)))
+        await started.wait()
+        assert await buffer.flush()
+        release.set()
+        doc = await read
+        await buffer.stop()
+        return doc
+
+    assert asyncio.run(run())["name"] == "New"
+    assert buffer.flushed == []
+
+
+def test_rejected_operations_only_retry_their_user():
+    users = FakeUsers()
+    users.reject = {BOB}
+    buffer = make_buffer(users)
+
+    async def run():
+        await buffer.set_fields(ALICE, {"name": "Alice"})
+        assert not await buffer.set_fields(BOB, {"name": "Bob"})
+        assert set(buffer.pending) == {BOB}
+        users.reject = set()
+        assert await buffer.flush()
+
+    asyncio.run(run())
+    assert users.docs[ALICE]["name"] == "Alice" and users.docs[BOB]["name"] == "Bob"
+    assert len(users.calls[1]) == 1
+
+
+def test_permanently_rejected_update_is_dropped_after_max_attempts():
+    users = FakeUsers()
+    users.reject = {BOB}
+    buffer = make_buffer(users, max_attempts=3)
+
+    async def run():
+        for _ in range(3):
+            await buffer.set_fields(BOB, {"name": "Bob"})
+        assert not buffer.pending
+        assert await buffer.set_fields(ALICE, {"name": "Alice"})
+
+    asyncio.run(run())
+    assert buffer.counters.snapshot()["users.dropped"] == 1
+    assert BOB not in users.docs
+
+
+def test_batch_failure_requeues_without_counting_attempts():
+    users = FakeUsers()
+    users.error = AutoReconnect("primary stepped down")
+    buffer = make_buffer(users, max_attempts=1)
+
+    async def run():
+        await buffer.set_fields(ALICE, {"name": "Alice"})
+        await buffer.set_fields(ALICE, {"title": "Analyst"})
+        assert buffer.pending[ALICE].attempts == 0
+        users.error = None
+        assert await buffer.flush()
+
+    asyncio.run(run())
+    assert users.docs[ALICE]["name"] == "Alice" and users.docs[ALICE]["title"] == "Analyst"